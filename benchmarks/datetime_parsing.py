@@ -0,0 +1,57 @@
+"""
+Benchmark of the per call cost of parsing and formatting the canonical datetimes (%Y-%m-%d %H:%M:%S), comparing
+datetime.strptime/strftime with the fast helpers of clockzy.lib.utils.time.
+
+Usage: PYTHONPATH=src python benchmarks/datetime_parsing.py [--datetimes 20000] [--repeat 5]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from clockzy.lib.utils import time
+
+
+def build_date_times(num_date_times):
+    """Build distinct datetimes, 17 minutes apart.
+
+    Args:
+        num_date_times (int): Number of datetimes.
+
+    Returns:
+        list(datetime): Datetime objects.
+    """
+    first_date_time = datetime(2022, 1, 1, 8)
+
+    return [first_date_time + timedelta(minutes=17 * index) for index in range(num_date_times)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Canonical datetime parsing and formatting per call cost')
+    parser.add_argument('--datetimes', type=int, default=20000, help='Number of datetimes')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs of each benchmark (the best is shown)')
+    args = parser.parse_args()
+
+    date_times = build_date_times(args.datetimes)
+    date_time_strings = [date_time.strftime(time.DATE_TIME_FORMAT) for date_time in date_times]
+    # The same few strings again and again, as the time range limits of the reports
+    repeated_strings = date_time_strings[:10] * (args.datetimes // 10)
+
+    def parse_uncached(strings):
+        time._parse_canonical_date_time.cache_clear()
+        return [time.parse_date_time(date_time) for date_time in strings]
+
+    benchmarks = [
+        ('strptime', lambda: [datetime.strptime(date_time, time.DATE_TIME_FORMAT) for date_time in date_time_strings]),
+        ('parse_date_time (distinct)', lambda: parse_uncached(date_time_strings)),
+        ('parse_date_time (repeated)', lambda: [time.parse_date_time(date_time) for date_time in repeated_strings]),
+        ('strftime', lambda: [date_time.strftime(time.DATE_TIME_FORMAT) for date_time in date_times]),
+        ('datetime_to_str', lambda: [time.datetime_to_str(date_time) for date_time in date_times])
+    ]
+
+    for name, function in benchmarks:
+        best_time = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        print(f"{name:<30}{best_time * 1e6 / args.datetimes:>8.2f} us/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark of the per clock cost of the worked time calculation, comparing the datetime strings round trip (format and
+parse each clock datetime) with the epoch seconds representation of clockzy.lib.utils.time.
+
+Usage: PYTHONPATH=src python benchmarks/time_representation.py [--clocks 20000] [--repeat 5]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from clockzy.lib.clocking import get_worked_time_per_day
+from clockzy.lib.models.clock import Clock
+from clockzy.lib.utils import time
+
+
+def build_clocks(num_clocks):
+    """Build a user clocks, with a IN/PAUSE/RETURN/OUT working day every 4 clocks.
+
+    Args:
+        num_clocks (int): Number of clocks.
+
+    Returns:
+        list(Clock): Clocks ordered by date_time (with datetime objects).
+    """
+    day_actions = [('IN', timedelta(hours=8)), ('PAUSE', timedelta(hours=14)), ('RETURN', timedelta(hours=15)),
+                   ('OUT', timedelta(hours=17, minutes=30))]
+    first_day = datetime(2022, 1, 1)
+
+    return [Clock('benchmark', day_actions[index % 4][0],
+                  first_day + timedelta(days=index // 4) + day_actions[index % 4][1]) for index in range(num_clocks)]
+
+
+def string_round_trip(clocks):
+    """Format and parse each clock datetime, as the datetime strings helpers do."""
+    return [datetime.strptime(time.datetime_to_str(clock_item.date_time), '%Y-%m-%d %H:%M:%S') for clock_item in clocks]
+
+
+def epoch_seconds(clocks):
+    """Get the epoch seconds of each clock datetime."""
+    return [time.get_epoch_seconds(clock_item.date_time) for clock_item in clocks]
+
+
+def string_worked_time(clocks):
+    """Calculate the worked time of each day with the datetime strings helpers (one time difference per pair)."""
+    days = {}
+
+    for clock_item in clocks:
+        days.setdefault(time.datetime_to_str(clock_item.date_time).split(' ')[0], []).append(clock_item)
+
+    worked_seconds = 0
+
+    for day_clocks in days.values():
+        for previous_clock, clock_item in zip(day_clocks, day_clocks[1:]):
+            if previous_clock.action in ('IN', 'RETURN') and clock_item.action in ('PAUSE', 'OUT'):
+                worked_seconds += time.get_time_difference(time.datetime_to_str(previous_clock.date_time),
+                                                           time.datetime_to_str(clock_item.date_time))
+
+    return worked_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worked time calculation per clock cost')
+    parser.add_argument('--clocks', type=int, default=20000, help='Number of clocks')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs of each benchmark (the best is shown)')
+    args = parser.parse_args()
+
+    clocks = build_clocks(args.clocks)
+    lower_limit = f"{clocks[0].date_time.date()} 00:00:00"
+    upper_limit = f"{clocks[-1].date_time.date()} 23:59:59"
+
+    benchmarks = [
+        ('datetime string round trip', lambda: string_round_trip(clocks)),
+        ('epoch seconds', lambda: epoch_seconds(clocks)),
+        ('worked time with datetime strings', lambda: string_worked_time(clocks)),
+        ('worked time with epoch seconds', lambda: get_worked_time_per_day(clocks, lower_limit, upper_limit,
+                                                                            upper_limit))
+    ]
+
+    for name, function in benchmarks:
+        best_time = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        print(f"{name:<36}{best_time * 1e6 / args.clocks:>8.2f} us/clock")
+
+
+if __name__ == '__main__':
+    main()
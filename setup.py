@@ -11,6 +11,7 @@ setup(name='clockzy',
       license='GPLv3',
       package_dir={"": "src"},
       packages=find_namespace_packages(where="src"),
+      package_data={"clockzy.config": ["calendars/*.yaml"]},
       zip_safe=False)
 
 # Clean build files
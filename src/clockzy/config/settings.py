@@ -3,11 +3,30 @@ import os
 
 
 # DATABASE CONFIGURATION
+# Database backend: 'mysql', or 'sqlite' for an embedded database (tests, benchmarks and small deployments)
+DB_BACKEND = os.environ.get('CLOCKZY_DB_BACKEND', 'mysql')
+DB_SQLITE_PATH = os.environ.get('CLOCKZY_DB_SQLITE_PATH', ':memory:')  # SQLite database file, or :memory:
 DB_ROOT_USER = 'root'
 DB_ROOT_PASSWORD = '<YOUR_DB_PASSWORD>'
 DB_PORT = 3306
 DB_HOST = 'mysql-service'
 DB_NAME = 'clockzy'
+DB_POOL_SIZE = 5  # Maximum number of connections per worker process
+DB_POOL_RECYCLE = 3600  # Seconds after which a pooled connection is replaced (must be lower than MySQL wait_timeout)
+DB_POOL_TIMEOUT = 30  # Seconds to wait for a free connection when the pool is exhausted
+DB_POOL_PRE_PING = True  # Check that the pooled connection is alive before using it
+DB_STATEMENT_CACHE_SIZE = 256  # Number of distinct query strings whose parsed statement is kept
+DB_BULK_CHUNK_SIZE = 1000  # Number of rows sent in each multi-row statement of the bulk operations
+DB_STREAM_BATCH_SIZE = 500  # Number of rows fetched from the server at a time when streaming a query
+DB_INSTRUMENTATION = False  # Measure the queries and log the database usage of each request
+DB_SLOW_QUERY_THRESHOLD = 0.5  # Seconds from which a query is logged in the slow queries log (if instrumentation)
+DB_RETRY_MAX_ATTEMPTS = 3  # Maximum number of retries of an operation after a transient error (lost connection...)
+DB_RETRY_BASE_DELAY = 0.05  # Seconds of the first retry backoff (it doubles on every retry, with random jitter)
+DB_RETRY_MAX_DELAY = 2  # Maximum seconds of a retry backoff
+DB_RETRY_BUDGET = 10  # Maximum number of retries of all the queries of a request
+# Read replicas of the DB_HOST primary, as (host, port) tuples. e.g. [('mysql-replica-service', 3306)]. The reads are
+# balanced between them, and all of them are sent to the primary if the list is empty.
+DB_REPLICAS = []
 
 # SERVICE CONFIGURATION
 APP_PATH = '/app'
@@ -15,6 +34,13 @@ DEBUG_MODE = False
 SLACK_SERVICE_HOST = '0.0.0.0'
 SLACK_SERVICE_PORT = '10030'
 LOGS_PATH = os.path.join(APP_PATH, 'logs')
+# Seconds a cached user state (last clock action) is valid. It bounds the time the clock writes made by other processes
+# (e.g. the web app) take to be seen by the status checks (/check). The clock validation always reads the database.
+USER_STATE_CACHE_TTL = 60
+WORKED_TIME_CACHE_SIZE = 50000  # Maximum number of user days whose worked time is cached (least recently used evicted)
+# Directory of the <region>.yaml working calendars (weekend days and holidays), and region used in the reports
+WORKING_CALENDARS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendars')
+WORKING_CALENDAR_REGION = 'default'
 
 # WEB APP CONFIGURATION
 WEB_APP_SERVICE_HOST = '0.0.0.0'
@@ -1,5 +1,19 @@
-from clockzy.lib.db.database_interface import get_last_clock_from_user, get_clock_data_in_time_range
+import random
+from itertools import groupby
+from pymysql import MySQLError
+
+from clockzy.config.settings import WORKING_CALENDAR_REGION
+from clockzy.lib.db.database import transaction, in_transaction
+from clockzy.lib.db.database_interface import iter_clock_data_with_previous_clock, run_query, \
+                                              run_query_getting_status, stream_query, build_clock_object, \
+                                              get_clock_data_in_time_range_query, get_daily_worked_time_data, \
+                                              get_worked_time_version, run_many_getting_status
+from clockzy.lib.db.query_builder import Query
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_NOT_EXISTS
+from clockzy.lib.clocking.user_state import load_user_state
+from clockzy.lib.clocking import worked_time_cache
 from clockzy.lib.utils import time
+from clockzy.lib.utils.working_calendar import get_working_calendar
 
 
 IN_ACTION = 'in'
@@ -18,7 +32,9 @@ def user_can_clock_this_action(user_id, action):
     Returns
         Tuple(boolean, str): If the user can clock the action and the error message in negative case.
     """
-    last_clocked_object = get_last_clock_from_user(user_id)
+    # The state is read from the database, not from the user state cache, which may not have the clocks made by other
+    # processes yet. Inside the clocking transaction, it is read after locking the user
+    user_state = load_user_state(user_id)
 
     white_list = {
         IN_ACTION: [PAUSE_ACTION, OUT_ACTION],
@@ -28,14 +44,14 @@ def user_can_clock_this_action(user_id, action):
     }
 
     # If no previous records and action is not IN
-    if last_clocked_object is None and action != IN_ACTION:
+    if user_state is None and action != IN_ACTION:
         return (False, 'You do not have any previous registration, so the coherent thing is that you sign an entry'
                        '(`IN`)')
     # If no previous records but the action is IN
-    elif last_clocked_object is None:
+    elif user_state is None:
         return (True, None)
 
-    last_clocked_action = last_clocked_object.action.lower()
+    last_clocked_action = user_state[0]
 
     # If previous records but the action is wrong
     if action not in white_list[last_clocked_action]:
@@ -46,81 +62,431 @@ def user_can_clock_this_action(user_id, action):
     return (True, None)
 
 
-def calculate_worked_time(user_id, time_range=None, lower_limit=None, upper_limit=None, timezone='Europe/Berlin'):
+def get_clock_state(clock_item):
+    """Get the epoch seconds of a clock and if it opens a working period.
+
+    Args:
+        clock_item (Clock): Clock with a datetime object.
+
+    Returns:
+        tuple(int, boolean): Epoch seconds, and True if the action is IN/RETURN (False if PAUSE/OUT).
+    """
+    return time.get_epoch_seconds(clock_item.date_time), clock_item.action.lower() in (IN_ACTION, RETURN_ACTION)
+
+
+def get_day_worked_seconds(day_clocks, day_start, day_end):
+    """Calculate the worked time of a day with clocks.
+
+    Note: The time is counted between the IN/RETURN actions and the next PAUSE/OUT actions. If the first action is a
+          PAUSE/OUT one, the time is counted since the day start, and if the last one is an IN/RETURN action, the time
+          is counted until the day end.
+
+    Args:
+        day_clocks (list(tuple(int, boolean))): Clock states of the day ordered by date_time (see get_clock_state).
+        day_start (int): Day start epoch seconds.
+        day_end (int): Day end epoch seconds (the next day start, or the current time if the day has not ended yet).
+
+    Returns:
+        int: Worked seconds.
+    """
+    worked_seconds = 0
+
+    # Add worked time if worked in the early morning hours
+    if not day_clocks[0][1]:
+        worked_seconds += day_clocks[0][0] - day_start
+
+    # Add the time between the IN/RETURN actions and the next PAUSE/OUT actions
+    for (previous_epoch, previous_open), (epoch, is_open) in zip(day_clocks, day_clocks[1:]):
+        if previous_open and not is_open:
+            worked_seconds += epoch - previous_epoch
+
+    # Add the time remaining until the end of the day before pausing or exiting (time worked but not clocked)
+    if day_clocks[-1][1]:
+        worked_seconds += max(day_end - day_clocks[-1][0], 0)
+
+    return worked_seconds
+
+
+def get_worked_time_per_day(clock_data, lower_limit, upper_limit, current_date_time):
+    """Calculate the worked time of each day of the time range in a single pass over the clocking data.
+
+    Note: The time of each day with clocks is calculated with get_day_worked_seconds, where the day ends when the next
+          one starts (or at the current time if it has not ended yet). The days without clocks are worked days if the
+          user was working when they started. The calculation is done with epoch seconds and day indices, and the days
+          are only formatted in the result.
+
+    Args:
+        clock_data (iterable(Clock)): Clocks of the user ordered by date_time. It can start with clocks made before the
+                                      lower limit, which give the state of the user when the time range starts.
+        lower_limit (str|int): Lower limit datetime in format %Y-%m-%d %H:%M:%S (or epoch seconds).
+        upper_limit (str|int): Upper limit datetime in format %Y-%m-%d %H:%M:%S (or epoch seconds).
+        current_date_time (str|int): Current datetime in format %Y-%m-%d %H:%M:%S (or epoch seconds), in the user
+                                     timezone.
+
+    Returns:
+        tuple(dict, int): Dict with an item for each day of the time range ({'%Y-%m-%d': {'worked_seconds': int,
+                          'clocks': list(Clock)}}) ordered by date, and the total of worked seconds.
+    """
+    lower_epoch, upper_epoch = time.get_epoch_seconds(lower_limit), time.get_epoch_seconds(upper_limit)
+    current_epoch = time.get_epoch_seconds(current_date_time)
+    day_starts = time.get_day_starts(lower_epoch, upper_epoch)
+    first_day = time.get_day_index(lower_epoch)
+    day_clocks = [[] for _ in day_starts]
+    day_states = [[] for _ in day_starts]
+    working = False
+
+    # Group the clocks by day, keeping the state of the user when the time range starts
+    for clock_item in clock_data:
+        epoch, is_open = clock_state = get_clock_state(clock_item)
+
+        if epoch < lower_epoch:
+            working = is_open
+        elif epoch <= upper_epoch:
+            day = time.get_day_index(epoch) - first_day
+            day_clocks[day].append(clock_item)
+            day_states[day].append(clock_state)
+
+    days = {}
+    total_worked_seconds = 0
+
+    for day, day_start in enumerate(day_starts):
+        # The day ends when the next one starts, so that the days time adds up to the time worked across midnight
+        day_end = min(day_start + time.SECONDS_PER_DAY, upper_epoch, current_epoch)
+        day_start = max(day_start, lower_epoch)
+        worked_seconds = 0
+
+        if len(day_states[day]) > 0:
+            worked_seconds = get_day_worked_seconds(day_states[day], day_start, day_end)
+            working = day_states[day][-1][1]
+        # The user has been working all the day (or until now)
+        elif working:
+            worked_seconds = max(day_end - day_start, 0)
+
+        days[time.day_index_to_str(first_day + day)] = {'worked_seconds': worked_seconds, 'clocks': day_clocks[day]}
+        total_worked_seconds += worked_seconds
+
+    return days, total_worked_seconds
+
+
+def calculate_worked_time_per_day(user_id, lower_limit, upper_limit, timezone='Europe/Berlin', time_context=None):
+    """Calculate the worked time of each day of the time range, getting the clocking data in a single query.
+
+    Args:
+        user_id (str): User identifier for searching the clocking data and calculating the worked time.
+        lower_limit (str): Lower limit datetime in format %Y-%m-%d %H:%M:%S
+        upper_limit (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
+        timezone (str): User timezone.
+        time_context (TimeContext): Request time snapshot. By default, a new one for the timezone.
+
+    Returns:
+        tuple(dict, int): Worked seconds and clocks of each day, and the total of worked seconds (see
+                          get_worked_time_per_day).
+    """
+    clock_data = iter_clock_data_with_previous_clock(user_id, lower_limit, upper_limit)
+
+    time_context = time_context if time_context else time.TimeContext(timezone)
+
+    return get_worked_time_per_day(clock_data, lower_limit, upper_limit, time_context.current_epoch)
+
+
+def build_daily_worked_time(user_id, day, day_clocks):
+    """Build the worked time rollup of a day with clocks.
+
+    Args:
+        user_id (str): User identifier.
+        day (str): Day in format %Y-%m-%d.
+        day_clocks (list(Clock)): Clocks of the day ordered by date_time (with datetime objects).
+
+    Returns:
+        DailyWorkedTime: Day worked time, counting the periods not closed until the end of the day.
+    """
+    # Avoid circular import
+    from clockzy.lib.models.daily_worked_time import DailyWorkedTime
+
+    day_start = time.get_epoch_seconds(f"{day} 00:00:00")
+    day_states = [get_clock_state(clock_item) for clock_item in day_clocks]
+    worked_seconds = get_day_worked_seconds(day_states, day_start, day_start + time.SECONDS_PER_DAY)
+    open_state = day_states[-1][1]
+
+    return DailyWorkedTime(user_id, day, worked_seconds, open_state)
+
+
+def refresh_daily_worked_time(user_id, day):
+    """Recalculate the worked time rollup of a user day from its clocks.
+
+    Note: Call it in the same transaction that writes the clocks. The clocks are read with a locking read, so that the
+          rollup is calculated from their last committed version.
+
+    Args:
+        user_id (str): User identifier.
+        day (str): Day in format %Y-%m-%d.
+
+    Raises:
+        MySQLError: If the rollup can not be updated.
+    """
+    # Avoid circular import
+    from clockzy.lib.models.daily_worked_time import DailyWorkedTime
+
+    query = get_clock_data_in_time_range_query(user_id, f"{day} 00:00:00", f"{day} 23:59:59").order_by('date_time') \
+        .order_by('id').for_update()
+    day_clocks = [build_clock_object(clock_item) for clock_item in run_query(*query.build())]
+
+    if len(day_clocks) == 0:
+        status_code = DailyWorkedTime(user_id, day, 0, False).delete()
+    else:
+        status_code = build_daily_worked_time(user_id, day, day_clocks).upsert()
+
+    if status_code not in (SUCCESS, ITEM_NOT_EXISTS):
+        raise MySQLError(f"The daily worked time of the user {user_id} on {day} could not be updated")
+
+    update_worked_time_versions([user_id])
+
+
+def refresh_users_daily_worked_time(user_days):
+    """Recalculate the worked time rollups of several user days, reading the clocks of all of them in a single query.
+
+    Note: Call it in the same transaction that writes the clocks. As in refresh_daily_worked_time, the clocks are read
+          with a locking read. The clocks are streamed and the rollups are saved with multi-row upserts, so the number
+          of queries does not grow with the number of days (use refresh_daily_worked_time for a single day).
+
+    Args:
+        user_days (iterable(tuple(str, str))): (user_id, day) of each day to recalculate, in format %Y-%m-%d.
+
+    Raises:
+        MySQLError: If the rollups can not be updated.
+    """
+    # Avoid circular import
+    from clockzy.lib.db.db_schema import CLOCK_TABLE
+    from clockzy.lib.models.daily_worked_time import DailyWorkedTime
+
+    user_days = set(user_days)
+
+    if len(user_days) == 0:
+        return
+
+    days = sorted(day for _, day in user_days)
+    query = Query(CLOCK_TABLE).select('id', 'user_id', 'action', 'date_time') \
+        .where_in('user_id', sorted({user_id for user_id, _ in user_days})) \
+        .where_between('date_time', f"{days[0]} 00:00:00", f"{days[-1]} 23:59:59").order_by('user_id') \
+        .order_by('date_time').order_by('id').for_update()
+
+    clock_data = (build_clock_object(clock_item) for clock_item in stream_query(*query.build()))
+    clocks_per_day = groupby(clock_data, key=lambda item: (item.user_id, item.date_time.date().isoformat()))
+    # The range also contains days that have not been written, which are skipped
+    daily_worked_times = [build_daily_worked_time(user_id, day, list(day_clocks))
+                          for (user_id, day), day_clocks in clocks_per_day if (user_id, day) in user_days]
+
+    if len(daily_worked_times) > 0 and DailyWorkedTime.bulk_upsert(daily_worked_times) != SUCCESS:
+        raise MySQLError('The daily worked time could not be updated')
+
+    # The days whose clocks have all been removed
+    for user_id, day in sorted(user_days - {(item.user_id, item.day) for item in daily_worked_times}):
+        if DailyWorkedTime(user_id, day, 0, False).delete() not in (SUCCESS, ITEM_NOT_EXISTS):
+            raise MySQLError(f"The daily worked time of the user {user_id} on {day} could not be updated")
+
+    update_worked_time_versions({user_id for user_id, _ in user_days})
+
+
+def update_worked_time_versions(user_ids):
+    """Replace the worked time version of the users, so that the processes that have cached their worked time read
+    the rollups again (see clockzy.lib.clocking.worked_time_cache).
+
+    Note: Call it in the same transaction that updates the rollups.
+
+    Args:
+        user_ids (iterable(str)): Users whose rollups have been updated.
+
+    Raises:
+        MySQLError: If the versions can not be updated.
+    """
+    # Avoid circular import
+    from clockzy.lib.db.db_schema import WORKED_TIME_VERSION_TABLE
+
+    # Random versions, so that a version is not repeated after the table is emptied (see rebuild_daily_worked_time)
+    update_versions_query = f"INSERT INTO {WORKED_TIME_VERSION_TABLE} VALUES (%s, %s) AS new ON DUPLICATE KEY UPDATE " \
+                            'version=new.version'
+    versions_data = [(user_id, random.getrandbits(62)) for user_id in sorted(user_ids)]
+
+    if run_many_getting_status(update_versions_query, versions_data) != SUCCESS:
+        raise MySQLError('The worked time versions could not be updated')
+
+
+def rebuild_daily_worked_time():
+    """Recalculate the worked time rollups of all the users and days from the clocking data, in a single transaction.
+
+    Note: The clocks are streamed, so only the rollups are kept in memory.
+
+    Raises:
+        MySQLError: If the rollups can not be updated.
+    """
+    # Avoid circular import
+    from clockzy.lib.db.db_schema import CLOCK_TABLE, DAILY_WORKED_TIME_TABLE, WORKED_TIME_VERSION_TABLE
+    from clockzy.lib.models.daily_worked_time import DailyWorkedTime
+
+    query = Query(CLOCK_TABLE).select('id', 'user_id', 'action', 'date_time').order_by('user_id') \
+        .order_by('date_time').order_by('id')
+
+    with transaction():
+        # The users without version are not cached until their next clock write
+        run_query_getting_status(f"DELETE FROM {WORKED_TIME_VERSION_TABLE}")
+        run_query_getting_status(f"DELETE FROM {DAILY_WORKED_TIME_TABLE}")
+        clock_data = (build_clock_object(clock_item) for clock_item in stream_query(*query.build()))
+        clocks_per_day = groupby(clock_data, key=lambda item: (item.user_id, item.date_time.date()))
+        daily_worked_times = [build_daily_worked_time(user_id, day.isoformat(), list(day_clocks))
+                              for (user_id, day), day_clocks in clocks_per_day]
+
+        if DailyWorkedTime.bulk_upsert(daily_worked_times) != SUCCESS:
+            raise MySQLError('The daily worked time could not be rebuilt')
+
+
+def get_ended_days_worked_seconds(user_id, lower_day, last_day):
+    """Calculate the worked time of the ended days of the time range from their daily worked time rollups.
+
+    Note: The days without rollup have no clocks, so they are fully worked if the user was working when they started.
+
+    Args:
+        user_id (str): User identifier.
+        lower_day (int): First day index of the time range.
+        last_day (int): Day index of the first not ended day (not included).
+
+    Returns:
+        tuple(dict, int): Worked seconds of each ended day ({'%Y-%m-%d': int}) ordered by date, and the worked time
+                          version of the rollups (None if the user does not have it, or any rollup).
+    """
+    rollups = {}
+    working = False
+    version = None
+
+    for day, seconds, open_state, version in get_daily_worked_time_data(user_id, time.day_index_to_str(lower_day),
+                                                                        time.day_index_to_str(last_day - 1)):
+        day = time.get_day_index(time.get_epoch_seconds(day))
+        if day < lower_day:
+            working = bool(open_state)
+        else:
+            rollups[day] = (seconds, bool(open_state))
+
+    worked_seconds_per_day = {}
+
+    for day in range(lower_day, last_day):
+        if day in rollups:
+            worked_seconds, working = rollups[day]
+        else:
+            worked_seconds = time.SECONDS_PER_DAY if working else 0
+        worked_seconds_per_day[time.day_index_to_str(day)] = worked_seconds
+
+    return worked_seconds_per_day, version
+
+
+def get_worked_seconds_per_day(user_id, lower_limit, upper_limit, timezone='Europe/Berlin', time_context=None):
+    """Calculate the worked time of each day of the time range, reading the ended days from the cache (or from their
+    daily worked time rollups) and calculating the last day (usually today) from its clocks.
+
+    Note: If the lower limit is not the start of a day, all the time range is calculated from the clocks. The cached
+          days are used if the worked time version of the user has not changed (see worked_time_cache).
+
+    Args:
+        user_id (str): User identifier for searching the clocking data and calculating the worked time.
+        lower_limit (str): Lower limit datetime in format %Y-%m-%d %H:%M:%S
+        upper_limit (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
+        timezone (str): User timezone.
+        time_context (TimeContext): Request time snapshot. By default, a new one for the timezone.
+
+    Returns:
+        tuple(dict, int): Dict with the worked seconds of each day of the time range ({'%Y-%m-%d': int}) ordered by
+                          date, and the total of worked seconds.
+    """
+    time_context = time_context if time_context else time.TimeContext(timezone)
+    lower_epoch = time.get_epoch_seconds(lower_limit)
+    lower_day = time.get_day_index(lower_epoch)
+    last_day = min(time.get_day_index(time.get_epoch_seconds(upper_limit)),
+                   time.get_day_index(time_context.current_epoch))
+
+    if lower_epoch != time.get_day_start(lower_day) or last_day <= lower_day:
+        days, total_worked_seconds = calculate_worked_time_per_day(user_id, lower_limit, upper_limit,
+                                                                   time_context=time_context)
+        return {day: day_data['worked_seconds'] for day, day_data in days.items()}, total_worked_seconds
+
+    # Ended days: get them from the cache if they have not been changed, or read their rollups. The rollups read
+    # inside a transaction could be rolled back, so the cache is not used
+    ended_days = [time.day_index_to_str(day) for day in range(lower_day, last_day)]
+    worked_seconds_per_day, cached_version = worked_time_cache.get_worked_seconds(user_id, ended_days,
+                                                                                  time_context.timezone)
+
+    if worked_seconds_per_day is None or in_transaction() or get_worked_time_version(user_id) != cached_version:
+        worked_seconds_per_day, version = get_ended_days_worked_seconds(user_id, lower_day, last_day)
+
+        if version is not None and not in_transaction():
+            worked_time_cache.set_worked_seconds(user_id, worked_seconds_per_day, time_context.timezone, version)
+
+    # Last day (and the following ones until the upper limit): calculate it from its clocks
+    days, _ = calculate_worked_time_per_day(user_id, time.epoch_to_str(time.get_day_start(last_day)), upper_limit,
+                                            time_context=time_context)
+    worked_seconds_per_day.update({day: day_data['worked_seconds'] for day, day_data in days.items()})
+
+    return worked_seconds_per_day, sum(worked_seconds_per_day.values())
+
+
+def get_worked_seconds_per_month(worked_seconds_per_day):
+    """Aggregate the worked time of each day by month, in a single pass over the days.
+
+    Args:
+        worked_seconds_per_day (dict): Worked seconds of each day ({'%Y-%m-%d': int}) ordered by date.
+
+    Returns:
+        dict: Worked seconds of each month ({'%Y-%m': int}) ordered by date.
+    """
+    worked_seconds_per_month = {}
+
+    for day, worked_seconds in worked_seconds_per_day.items():
+        worked_seconds_per_month[day[:7]] = worked_seconds_per_month.get(day[:7], 0) + worked_seconds
+
+    return worked_seconds_per_month
+
+
+def get_num_average_days(worked_seconds_per_day, lower_limit, upper_limit, region=WORKING_CALENDAR_REGION):
+    """Get the number of days to average the worked time of a time range: its working days, without the weekend days
+    and holidays of the region calendar, plus the non-working days with worked time.
+
+    Args:
+        worked_seconds_per_day (dict): Worked seconds of each day ({'%Y-%m-%d': int}).
+        lower_limit (str): Lower limit datetime in format %Y-%m-%d %H:%M:%S
+        upper_limit (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
+        region (str): Working calendar region (see clockzy.lib.utils.working_calendar).
+
+    Returns:
+        tuple(int, int): Number of days to average the worked time and number of working days of the range.
+    """
+    working_calendar = get_working_calendar(region)
+    num_working_days = working_calendar.count_working_days(lower_limit, upper_limit)
+    num_extra_days = len([day for day, worked_seconds in worked_seconds_per_day.items()
+                          if worked_seconds >= 60 and not working_calendar.is_working_day(day)])
+
+    return num_working_days + num_extra_days, num_working_days
+
+
+def calculate_worked_time(user_id, time_range=None, lower_limit=None, upper_limit=None, timezone='Europe/Berlin',
+                          time_context=None):
     """Calculate the worked time (using the clocking data) in the specified time range.
 
     Note: You can specify the time_range or the lower_limit and upper_limit.
 
     Args:
         user_id (str): User identifier for searching the clocking data and calculating the worked time.
-        time_range (str): enum: [today, week, month].
+        time_range (str): enum: [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
         lower_limit (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
         upper_limit (str): Upper limit datetime  in format %Y-%m-%d %H:%M:%S
         timezone (str): User timezone.
+        time_context (TimeContext): Request time snapshot. By default, a new one for the timezone.
 
     Returns:
         str: Worked time in the following format [x]h [y]m
     """
+    time_context = time_context if time_context else time.TimeContext(timezone)
+
     if time_range:
-        lower_limit = time.get_lower_time_from_time_range(time_range, timezone)
-        upper_limit = time.get_current_date_time(timezone)
-
-    # Get the clocking objects
-    clock_data = get_clock_data_in_time_range(user_id, lower_limit, upper_limit)
-
-    # If there is no data in the specified range
-    if len(clock_data) == 0:
-        previous_month_datetime = time.subtract_days_to_datetime(lower_limit, 31)
-        # Get the clockings data between the lower datetime and one month back from that date
-        before_clockings = get_clock_data_in_time_range(user_id, previous_month_datetime, lower_limit)
-        # If the user has not made any clock registration yet (in one month)
-        if len(before_clockings) == 0:
-            return time.get_time_hh_mm_from_seconds(0)
-        # Get time in case of continuing from the previous clocking
-        user_last_clock = before_clockings[-1]
-        if user_last_clock.action.lower() == IN_ACTION or user_last_clock.action.lower() == RETURN_ACTION:
-            lower_limit = f"{time.get_current_date_time(timezone).split(' ')[0]} 00:00:00"
-            time_difference = time.get_time_difference(lower_limit, time.get_current_date_time(timezone))
-            return time.get_time_hh_mm_from_seconds(time_difference)
-        # The user closed the previous days and has not started yet
-        else:
-            return time.get_time_hh_mm_from_seconds(0)
+        lower_limit = time_context.get_lower_time(time_range)
+        upper_limit = time_context.get_upper_time(time_range)
 
-    # Calculate the number of worked seconds
-    worked_seconds = 0
-    before_action = ''
-    before_action_datetime = ''
-
-    for index, clock_item in enumerate(clock_data):
-        # Add worked time if worked in the early morning hours
-        if index == 0 and (clock_item.action.lower() == OUT_ACTION or clock_item.action.lower() == PAUSE_ACTION):
-            morning_time = f"{time.datetime_to_str(clock_item.date_time).split(' ')[0]} 00:00:00"
-            worked_seconds += time.get_time_difference(morning_time, time.datetime_to_str(clock_item.date_time))
-
-        # Add clocking time
-        if (clock_item.action.lower() == PAUSE_ACTION and before_action == IN_ACTION) or \
-           (clock_item.action.lower() == OUT_ACTION and before_action == IN_ACTION) or \
-           (clock_item.action.lower() == OUT_ACTION and before_action == RETURN_ACTION) or \
-           (clock_item.action.lower() == PAUSE_ACTION and before_action == RETURN_ACTION):
-            worked_seconds += time.get_time_difference(before_action_datetime,
-                                                       time.datetime_to_str(clock_item.date_time))
-        before_action = clock_item.action.lower()
-        before_action_datetime = time.datetime_to_str(clock_item.date_time)
-
-    # Get information about the last clockings to calculate time not closed if necessary
-    last_clocked_action = clock_data[-1].action.lower()
-    last_clocked_datetime = time.datetime_to_str(clock_data[-1].date_time)
-
-    # Add the time remaining until now before pausing or exiting (time worked but not clocked)
-    if last_clocked_action != OUT_ACTION and last_clocked_action != PAUSE_ACTION:
-        # If the date is today, then add up to the current time
-        if last_clocked_datetime.split(' ')[0] == time.get_current_date_time(timezone).split(' ')[0]:
-            last_clocked_datetime_end = time.get_current_date_time(timezone)
-        # If the date is not today, then add to the end of that day
-        else:
-            last_clocked_datetime_end = f"{last_clocked_datetime.split(' ')[0]} 23:59:59"
-        # Add the working time not closed
-        last_non_clocked_time = time.get_time_difference(last_clocked_datetime, last_clocked_datetime_end)
-        worked_seconds += last_non_clocked_time
+    _, worked_seconds = get_worked_seconds_per_day(user_id, lower_limit, upper_limit, time_context=time_context)
 
     return time.get_time_hh_mm_from_seconds(worked_seconds)
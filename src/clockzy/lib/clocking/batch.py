@@ -0,0 +1,157 @@
+"""
+Batch worked time calculation for many users at once, using NumPy arrays.
+
+The clocks of all the users are loaded in a single query into three arrays (user indices, epoch seconds and action
+codes), and the worked seconds of each user and day are calculated with vectorized operations, following the same rules
+as clockzy.lib.clocking.get_worked_time_per_day.
+"""
+import numpy as np
+
+from clockzy.lib.clocking import IN_ACTION, PAUSE_ACTION, RETURN_ACTION, OUT_ACTION
+from clockzy.lib.db.database_interface import iter_clock_data_from_users_with_previous_clock
+from clockzy.lib.utils import time
+
+
+ACTION_CODES = {IN_ACTION: 0, PAUSE_ACTION: 1, RETURN_ACTION: 2, OUT_ACTION: 3}
+OPEN_ACTION_CODES = [ACTION_CODES[IN_ACTION], ACTION_CODES[RETURN_ACTION]]
+CLOSE_ACTION_CODES = [ACTION_CODES[PAUSE_ACTION], ACTION_CODES[OUT_ACTION]]
+
+
+def build_clock_arrays(clock_rows, user_ids):
+    """Build the clock arrays from the clock rows.
+
+    Args:
+        clock_rows (iterable(tuple)): Clock rows (user_id, action, date_time), where date_time is a datetime object.
+        user_ids (list(str)): Users of the clocks. The clocks of other users are ignored.
+
+    Returns:
+        tuple(np.ndarray, np.ndarray, np.ndarray): User indices (position in user_ids), epoch seconds and action codes
+                                                   of the clocks, sorted by user and date_time.
+    """
+    user_indices = {user_id: index for index, user_id in enumerate(user_ids)}
+    users, date_times, actions = [], [], []
+
+    for user_id, action, date_time in clock_rows:
+        if user_id in user_indices:
+            users.append(user_indices[user_id])
+            date_times.append(date_time)
+            actions.append(ACTION_CODES[action.lower()])
+
+    users = np.array(users, dtype=np.int64)
+    epochs = np.array(date_times, dtype='datetime64[s]').astype(np.int64)
+    actions = np.array(actions, dtype=np.int8)
+
+    # Stable sort, so the clocks with the same date_time keep their order
+    order = np.lexsort((epochs, users))
+
+    return users[order], epochs[order], actions[order]
+
+
+def get_worked_seconds_matrix(users, epochs, actions, num_users, lower_limit, upper_limit, current_date_time):
+    """Calculate the worked seconds of each user and day of the time range.
+
+    Note: The clocks made before the lower limit only give the state of each user when the time range starts.
+
+    Args:
+        users (np.ndarray): User index of each clock.
+        epochs (np.ndarray): Epoch seconds of each clock.
+        actions (np.ndarray): Action code of each clock.
+        num_users (int): Number of users (rows of the result).
+        lower_limit (str): Lower limit datetime in format %Y-%m-%d %H:%M:%S
+        upper_limit (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
+        current_date_time (str|int): Current datetime in format %Y-%m-%d %H:%M:%S (or epoch seconds), in the users
+                                     timezone.
+
+    Returns:
+        tuple(list(str), np.ndarray): Days of the time range (%Y-%m-%d), and the worked seconds of each user (rows) and
+                                      day (columns). Both are empty if the upper limit is before the lower limit day.
+    """
+    lower_epoch, upper_epoch = time.get_epoch_seconds(lower_limit), time.get_epoch_seconds(upper_limit)
+    current_epoch = time.get_epoch_seconds(current_date_time)
+    first_day_epoch = time.get_day_start(time.get_day_index(lower_epoch))
+    num_days = (upper_epoch - first_day_epoch) // time.SECONDS_PER_DAY + 1
+
+    if num_days <= 0:
+        return [], np.zeros((num_users, 0), dtype=np.int64)
+
+    days = [str(day) for day in np.datetime64(first_day_epoch, 's').astype('datetime64[D]') + np.arange(num_days)]
+
+    # Day limits, as in get_worked_time_per_day: the day ends when the next one starts (or now)
+    day_midnights = first_day_epoch + np.arange(num_days, dtype=np.int64) * time.SECONDS_PER_DAY
+    day_starts = np.maximum(day_midnights, lower_epoch)
+    day_ends = np.minimum(np.minimum(day_midnights + time.SECONDS_PER_DAY, upper_epoch), current_epoch)
+
+    worked_seconds = np.zeros((num_users, num_days), dtype=np.int64)
+    is_open = np.isin(actions, OPEN_ACTION_CODES)
+    is_close = np.isin(actions, CLOSE_ACTION_CODES)
+
+    # State of each user when the time range starts: the last clock before the lower limit
+    previous = epochs < lower_epoch
+    last_previous = previous.copy()
+    last_previous[:-1] &= (users[1:] != users[:-1]) | ~previous[1:]
+    start_state = np.zeros(num_users, dtype=bool)
+    start_state[users[last_previous]] = is_open[last_previous]
+
+    # Clocks of the time range, grouped by user and day
+    in_range = ~previous & (epochs <= upper_epoch)
+    users, epochs, is_open, is_close = users[in_range], epochs[in_range], is_open[in_range], is_close[in_range]
+    clock_days = (epochs - first_day_epoch) // time.SECONDS_PER_DAY
+    same_group = (users[1:] == users[:-1]) & (clock_days[1:] == clock_days[:-1])
+    first_of_day = np.ones(len(users), dtype=bool)
+    first_of_day[1:] = ~same_group
+    last_of_day = np.ones(len(users), dtype=bool)
+    last_of_day[:-1] = ~same_group
+
+    # Time between the IN/RETURN actions and the next PAUSE/OUT actions of the same day
+    pairs = same_group & is_open[:-1] & is_close[1:]
+    np.add.at(worked_seconds, (users[1:][pairs], clock_days[1:][pairs]), (epochs[1:] - epochs[:-1])[pairs])
+
+    # Time since the day start if the first action of the day is a PAUSE/OUT one
+    morning = first_of_day & is_close
+    np.add.at(worked_seconds, (users[morning], clock_days[morning]),
+              epochs[morning] - day_starts[clock_days[morning]])
+
+    # Time until the day end if the last action of the day is an IN/RETURN one
+    evening = last_of_day & is_open
+    np.add.at(worked_seconds, (users[evening], clock_days[evening]),
+              np.maximum(day_ends[clock_days[evening]] - epochs[evening], 0))
+
+    # The days without clocks are fully worked if the user was working when they started: forward fill the state of
+    # the last day with clocks (column 0 is the state when the time range starts)
+    has_clocks = np.zeros((num_users, num_days + 1), dtype=bool)
+    end_state = np.zeros((num_users, num_days + 1), dtype=bool)
+    has_clocks[:, 0] = True
+    end_state[:, 0] = start_state
+    has_clocks[users[last_of_day], clock_days[last_of_day] + 1] = True
+    end_state[users[last_of_day], clock_days[last_of_day] + 1] = is_open[last_of_day]
+
+    last_day_with_clocks = np.maximum.accumulate(np.where(has_clocks, np.arange(num_days + 1), 0), axis=1)
+    working_at_start = np.take_along_axis(end_state, last_day_with_clocks, axis=1)[:, :-1]
+    worked_seconds += np.where(~has_clocks[:, 1:] & working_at_start, np.maximum(day_ends - day_starts, 0), 0)
+
+    return days, worked_seconds
+
+
+def calculate_worked_time_per_user_day(user_ids, lower_limit, upper_limit, timezone='Europe/Berlin',
+                                       time_context=None):
+    """Calculate the worked seconds of each user and day of the time range, getting the clocking data of all the users
+    in a single query.
+
+    Args:
+        user_ids (list(str)): User identifiers.
+        lower_limit (str): Lower limit datetime in format %Y-%m-%d %H:%M:%S
+        upper_limit (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
+        timezone (str): Users timezone.
+        time_context (TimeContext): Request time snapshot. By default, a new one for the timezone.
+
+    Returns:
+        tuple(list(str), np.ndarray): Days of the time range (%Y-%m-%d), and the worked seconds of each user (rows, in
+                                      the user_ids order) and day (columns).
+    """
+    clock_rows = iter_clock_data_from_users_with_previous_clock(user_ids, lower_limit, upper_limit)
+    users, epochs, actions = build_clock_arrays(clock_rows, user_ids)
+
+    time_context = time_context if time_context else time.TimeContext(timezone)
+
+    return get_worked_seconds_matrix(users, epochs, actions, len(user_ids), lower_limit, upper_limit,
+                                     time_context.current_epoch)
@@ -0,0 +1,110 @@
+"""
+In-memory cache of the current state of each user (the action and datetime of their last clock), so that the status
+checks (/check) do not query the last clock on every call.
+
+The cache is write-through: the clock writes (see clockzy.lib.models.clock.write_clocks) store the new state of their
+users when their transaction is committed. Each process has its own cache, so the entries expire after
+USER_STATE_CACHE_TTL seconds to pick up the writes made by other processes (the other workers, the web app edits or the
+import scripts). Until then, a status check served by another process can show the previous state.
+
+For that reason, the clock validation does not use the cache: it reads the state from the database with the user
+locked (see clockzy.lib.clocking.user_can_clock_this_action). Inside a transaction the cache is not used either, so that
+the state is read with the locks and the uncommitted writes of the transaction.
+"""
+import threading
+import time
+
+from clockzy.config.settings import USER_STATE_CACHE_TTL
+from clockzy.lib.db.database import pin_to_primary, in_transaction
+from clockzy.lib.db.database_interface import get_last_clock_from_user
+
+
+# Cached states, as user_id: (state, expiration monotonic time)
+_states = {}
+
+# Version of each user entry, increased on every write, so that a state loaded before a write is not cached after it
+_versions = {}
+
+# Version of all the entries, increased when the whole cache is invalidated
+_generation = 0
+
+_lock = threading.Lock()
+
+
+def _get_version(user_id):
+    return _generation, _versions.get(user_id, 0)
+
+
+def load_user_state(user_id):
+    """Load the current state of a user from the database.
+
+    Args:
+        user_id (str): User identifier.
+
+    Returns:
+        tuple(str, datetime): Action (in lower case) and datetime of the user last clock, or None if the user does not
+                              have any clock.
+    """
+    with pin_to_primary():
+        last_clock = get_last_clock_from_user(user_id)
+
+    return None if last_clock is None else (last_clock.action.lower(), last_clock.date_time)
+
+
+def get_user_state(user_id):
+    """Get the current state of a user, loading it from the database if it is not cached or it has expired.
+
+    Args:
+        user_id (str): User identifier.
+
+    Returns:
+        tuple(str, datetime): Action (in lower case) and datetime of the user last clock, or None if the user does not
+                              have any clock.
+    """
+    if in_transaction():
+        return load_user_state(user_id)
+
+    with _lock:
+        cached_state = _states.get(user_id)
+        version = _get_version(user_id)
+
+    if cached_state is not None and cached_state[1] > time.monotonic():
+        return cached_state[0]
+
+    state = load_user_state(user_id)
+
+    with _lock:
+        if _get_version(user_id) == version:
+            _states[user_id] = (state, time.monotonic() + USER_STATE_CACHE_TTL)
+
+    return state
+
+
+def set_user_state(user_id, state):
+    """Store the current state of a user in the cache.
+
+    Args:
+        user_id (str): User identifier.
+        state (tuple(str, datetime)): Action (in lower case) and datetime of the user last clock, or None if the user
+                                      does not have any clock.
+    """
+    with _lock:
+        _versions[user_id] = _versions.get(user_id, 0) + 1
+        _states[user_id] = (state, time.monotonic() + USER_STATE_CACHE_TTL)
+
+
+def invalidate_user_state(user_id=None):
+    """Remove the state of a user from the cache, so that the next lookup loads it from the database.
+
+    Args:
+        user_id (str): User identifier. If None, the states of all the users are removed.
+    """
+    global _generation
+
+    with _lock:
+        if user_id is None:
+            _generation += 1
+            _states.clear()
+        else:
+            _versions[user_id] = _versions.get(user_id, 0) + 1
+            _states.pop(user_id, None)
@@ -0,0 +1,72 @@
+"""
+In-memory LRU cache of the worked seconds of the ended days of each user, so that the time reports do not read the
+daily worked time rollups of the past days on every call.
+
+Each entry is stored with the worked time version of its user (see the worked_time_version table), which every rollup
+update replaces, whatever process makes it (the other workers, the web app edits or the import scripts). The cached days
+are only used if the version of the database is still the same, so a single primary key lookup replaces the rollups
+read and the days changed by any process are never served.
+"""
+import threading
+from collections import OrderedDict
+
+from clockzy.config.settings import WORKED_TIME_CACHE_SIZE
+
+
+# Cached days, as (user_id, day, timezone): (worked seconds, version), from the least to the most recently used
+_days = OrderedDict()
+
+_lock = threading.Lock()
+
+
+def get_worked_seconds(user_id, days, timezone):
+    """Get the cached worked seconds of the user days.
+
+    Args:
+        user_id (str): User identifier.
+        days (list(str)): Days in format %Y-%m-%d.
+        timezone (str): User timezone.
+
+    Returns:
+        tuple(dict, int): Worked seconds of each day ({'%Y-%m-%d': int}) and the worked time version they were cached
+                          with, or (None, None) if any of them is not cached or they have different versions.
+    """
+    worked_seconds_per_day = {}
+    version = None
+
+    with _lock:
+        for day in days:
+            cached_day = _days.get((user_id, day, timezone))
+
+            if cached_day is None or (version is not None and cached_day[1] != version):
+                return None, None
+
+            _days.move_to_end((user_id, day, timezone))
+            worked_seconds_per_day[day] = cached_day[0]
+            version = cached_day[1]
+
+    return worked_seconds_per_day, version
+
+
+def set_worked_seconds(user_id, worked_seconds_per_day, timezone, version):
+    """Store the worked seconds of the user days, evicting the least recently used days if the cache is full.
+
+    Args:
+        user_id (str): User identifier.
+        worked_seconds_per_day (dict): Worked seconds of each ended day ({'%Y-%m-%d': int}).
+        timezone (str): User timezone.
+        version (int): Worked time version read together with the rollups the days were calculated from.
+    """
+    with _lock:
+        for day, worked_seconds in worked_seconds_per_day.items():
+            _days[(user_id, day, timezone)] = (worked_seconds, version)
+            _days.move_to_end((user_id, day, timezone))
+
+        while len(_days) > WORKED_TIME_CACHE_SIZE:
+            _days.popitem(last=False)
+
+
+def clear_worked_seconds():
+    """Remove all the cached days."""
+    with _lock:
+        _days.clear()
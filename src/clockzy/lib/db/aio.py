@@ -0,0 +1,229 @@
+"""
+Asyncio counterpart of the database_interface lookups, so that independent lookups can run concurrently in an event
+loop. e.g:
+
+    user, config, last_clock = await asyncio.gather(get_user_object(user_id), get_config_object(user_id),
+                                                    get_last_clock_from_user(user_id))
+
+The queries and the row to object mappings are the database_interface ones. With the MySQL backend the queries run on
+an aiomysql connection pool (one for each event loop), and with any other backend they run in the default executor.
+
+The pool of an event loop is kept until close_pool is called from that loop, so close_pool must be awaited before the
+loop is closed (run does it when the coroutine ends). e.g:
+
+    user, config, last_clock = aio.run(get_user_data(user_id))
+"""
+import asyncio
+import pymysql
+from functools import partial
+
+from clockzy.lib.db import database_interface as dbi
+from clockzy.lib.db.backends import get_backend
+from clockzy.lib.db.database import QueryResult, prepare_statement
+from clockzy.lib.db.instrumentation import measure_query
+from clockzy.lib.db.retry import get_retry_delay
+from clockzy.config.settings import DB_ROOT_USER, DB_ROOT_PASSWORD, DB_PORT, DB_HOST, DB_NAME, DB_POOL_SIZE, \
+                                    DB_POOL_RECYCLE
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+
+# aiomysql connection pool creation tasks, indexed by the event loop they belong to. The entries are removed by
+# close_pool (a weak reference would not help: the task references its loop)
+_pools = {}
+
+
+async def get_pool():
+    """Get the aiomysql connection pool of the running event loop, creating it if necessary.
+
+    Returns:
+        aiomysql.Pool: Connection pool object.
+
+    Raises:
+        ImportError: If aiomysql is not installed.
+    """
+    if aiomysql is None:
+        raise ImportError('The aiomysql package is required to run asynchronous MySQL queries')
+
+    loop = asyncio.get_running_loop()
+    pool_task = _pools.get(loop)
+
+    # Concurrent callers wait for the same pool creation
+    if pool_task is None:
+        pool_task = _pools[loop] = loop.create_task(aiomysql.create_pool(host=DB_HOST, port=DB_PORT, user=DB_ROOT_USER,
+                                                                         password=DB_ROOT_PASSWORD, db=DB_NAME,
+                                                                         minsize=1, maxsize=DB_POOL_SIZE,
+                                                                         pool_recycle=DB_POOL_RECYCLE,
+                                                                         autocommit=True))
+
+    try:
+        # A cancelled caller must not cancel the creation the other callers are waiting for
+        return await asyncio.shield(pool_task)
+    except Exception:
+        # Forget the failed creation, so that the next call tries again
+        if _pools.get(loop) is pool_task:
+            del _pools[loop]
+        raise
+
+
+async def close_pool():
+    """Close the connection pool of the running event loop, waiting for its connections to be released."""
+    pool_task = _pools.pop(asyncio.get_running_loop(), None)
+
+    if pool_task is None:
+        return
+
+    try:
+        pool = await pool_task
+    except Exception:
+        # The pool was never created
+        return
+
+    pool.close()
+    await pool.wait_closed()
+
+
+def run(coroutine):
+    """Run a coroutine in a new event loop, closing the connection pool of the loop when the coroutine ends.
+
+    Args:
+        coroutine (coroutine): Coroutine to run.
+
+    Returns:
+        object: Value returned by the coroutine.
+    """
+    async def run_and_close_pool():
+        try:
+            return await coroutine
+        finally:
+            await close_pool()
+
+    return asyncio.run(run_and_close_pool())
+
+
+async def run_query(query, parameters=None):
+    """Execute a SELECT query in the database.
+
+    Note: As Database.run_query does with the SELECT queries, the query is retried if it fails with a transient error.
+
+    Args:
+        query (String): SELECT query to execute, using %s as placeholder for each parameter.
+        parameters (tuple|list): Values for the query placeholders.
+
+    Returns:
+        QueryResult: Query results (list of rows).
+
+    Raises:
+        ValueError: If it is not a SELECT query or the number of parameters does not match the number of
+                    placeholders.
+        pymysql.MySQLError: If the query fails.
+    """
+    statement = prepare_statement(query)
+    statement.validate_parameters(parameters)
+
+    if not statement.is_select:
+        raise ValueError(f"Only SELECT queries can be run asynchronously: {query}")
+
+    if get_backend().name != 'mysql':
+        return await asyncio.get_running_loop().run_in_executor(None, partial(dbi.run_query, query, parameters))
+
+    attempt = 1
+
+    while True:
+        try:
+            return await _execute_query(query, parameters)
+        except pymysql.MySQLError as e:
+            delay = get_retry_delay(e, attempt)
+
+            if delay is None:
+                raise
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+async def _execute_query(query, parameters):
+    """Run a SELECT query once in the aiomysql connection pool, raising the database errors.
+
+    Args:
+        query (String): SELECT query to execute, using %s as placeholder for each parameter.
+        parameters (tuple|list): Values for the query placeholders.
+
+    Returns:
+        QueryResult: Query results (list of rows).
+    """
+    pool = await get_pool()
+
+    with measure_query(query) as measurement:
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, parameters)
+                rows = await cursor.fetchall()
+
+        measurement['rows'] = len(rows)
+
+    return QueryResult(rows, len(rows))
+
+
+async def get_user_object(user_id):
+    """Get the user object from the database data.
+
+    Args:
+        user_id (str): User identifier to get the data.
+
+    Returns:
+        User: User object with the DB data.
+        None: If the user_id does not exist in the DB.
+    """
+    user_data = await run_query(*dbi.get_user_object_query(user_id).build())
+
+    return dbi.build_user_object(user_data[0]) if len(user_data) > 0 else None
+
+
+async def get_config_object(user_id):
+    """Get the user config object from DB.
+
+    Args:
+        user_id (str): User identifier to get the data.
+
+    Returns:
+        Config: Config object with the DB data.
+        None: If the user does not have any configuration data in the DB.
+    """
+    config_data = await run_query(*dbi.get_config_object_query(user_id).build())
+
+    return dbi.build_config_object(user_id, config_data[0]) if len(config_data) > 0 else None
+
+
+async def get_last_clock_from_user(user_id):
+    """Get the last clock data from the specified user ID.
+
+    Args:
+        user_id (str): User identifier to get the data.
+
+    Returns:
+        Clock: Last clock object with the DB data.
+        None: If the user does not have any registration made in the DB.
+    """
+    clock_data = await run_query(*dbi.get_last_clock_query(user_id).build())
+
+    return dbi.build_clock_object(clock_data[0]) if len(clock_data) > 0 else None
+
+
+async def get_clock_data_in_time_range(user_id, datetime_from, datetime_to):
+    """Get all the records of the user, made between the two indicated dates.
+
+    Args:
+        user_id (str): User identifier to get the data.
+        datetime_from (str): Lower datetime limit.
+        datetime_to (str): Upper datetimelimit.
+
+    Returns:
+        List(Clock): Clock data list.
+    """
+    clock_data = await run_query(*dbi.get_clock_data_in_time_range_query(user_id, datetime_from, datetime_to).build())
+
+    return [dbi.build_clock_object(clock_item) for clock_item in clock_data]
@@ -0,0 +1,388 @@
+"""
+Database backends (drivers) that can be used by the Database connection pools.
+
+All the backends return connections with the pymysql connection interface used by the Database class (cursor, begin,
+commit, rollback, ping, close and open), run the queries written in MySQL syntax with %s placeholders and raise
+pymysql.MySQLError exceptions, so the rest of the application does not depend on the selected backend.
+"""
+import os
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+from functools import lru_cache
+
+import pymysql
+from pymysql.constants import CLIENT
+
+from clockzy.config.settings import DB_BACKEND, DB_SQLITE_PATH, DB_POOL_TIMEOUT, DB_STATEMENT_CACHE_SIZE
+
+
+# SQLite stores the DATETIME and DATE values as text. Read them as datetime and date objects, like pymysql does
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(date, lambda value: value.strftime('%Y-%m-%d'))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+
+# MySQL syntax to SQLite syntax translations
+SQLITE_PLACEHOLDER_REGEX = re.compile(r'%%|%s')
+SQLITE_AUTO_INCREMENT_REGEX = re.compile(r'(\w+) INT NOT NULL AUTO_INCREMENT', re.IGNORECASE)
+SQLITE_ENGINE_REGEX = re.compile(r'\)\s*Engine\s*=\s*\w+', re.IGNORECASE)
+SQLITE_LOCKING_READ_REGEX = re.compile(r'\s+(FOR\s+UPDATE|FOR\s+SHARE|LOCK\s+IN\s+SHARE\s+MODE)\b', re.IGNORECASE)
+SQLITE_INSERT_IGNORE_REGEX = re.compile(r'^(\s*)INSERT\s+IGNORE\b', re.IGNORECASE)
+SQLITE_UPSERT_REGEX = re.compile(r'\s+AS\s+(\w+)\s+ON DUPLICATE KEY UPDATE', re.IGNORECASE)
+
+# Seconds between the attempts to take the write lock of a shared cache database
+SQLITE_LOCK_POLL_INTERVAL = 0.005
+
+# MySQL error codes raised for the equivalent SQLite errors
+SQLITE_ERROR_CODES = [('already exists', 1050), ('no such table', 1146), ('no such column', 1054),
+                      ('database is locked', 1205), ('database table is locked', 1205), ('syntax error', 1064)]
+SQLITE_INTEGRITY_ERROR_CODES = [('UNIQUE', 1062), ('FOREIGN KEY', 1452), ('NOT NULL', 1048)]
+
+
+@lru_cache(maxsize=DB_STATEMENT_CACHE_SIZE)
+def translate_query_to_sqlite(query):
+    """Translate a MySQL query to the SQLite syntax.
+
+    Args:
+        query (str): MySQL query with %s placeholders.
+
+    Returns:
+        str: SQLite query with ? placeholders.
+    """
+    query = SQLITE_PLACEHOLDER_REGEX.sub(lambda match: '%' if match.group() == '%%' else '?', query)
+
+    # SQLite only allows AUTOINCREMENT in an INTEGER PRIMARY KEY column definition
+    for column in SQLITE_AUTO_INCREMENT_REGEX.findall(query):
+        query = re.sub(rf",\s*PRIMARY KEY \({column}\)", '', query)
+    query = SQLITE_AUTO_INCREMENT_REGEX.sub(r'\1 INTEGER PRIMARY KEY AUTOINCREMENT', query)
+
+    query = SQLITE_ENGINE_REGEX.sub(')', query)
+
+    # SQLite does not have row locks. A transaction locks the whole database for writing (see SQLiteConnection.begin)
+    query = SQLITE_LOCKING_READ_REGEX.sub('', query)
+
+    query = SQLITE_INSERT_IGNORE_REGEX.sub(r'\1INSERT OR IGNORE', query)
+
+    # INSERT ... AS new ON DUPLICATE KEY UPDATE col=new.col --> INSERT ... ON CONFLICT DO UPDATE SET col=excluded.col
+    upsert_match = SQLITE_UPSERT_REGEX.search(query)
+    if upsert_match:
+        update_clause = re.sub(rf"\b{upsert_match.group(1)}\.", 'excluded.', query[upsert_match.end():])
+        query = f"{query[:upsert_match.start()]} ON CONFLICT DO UPDATE SET{update_clause}"
+
+    return query
+
+
+def translate_sqlite_error(error):
+    """Convert a sqlite3 exception to the equivalent pymysql exception.
+
+    Args:
+        error (sqlite3.Error): SQLite exception.
+
+    Returns:
+        pymysql.MySQLError: pymysql exception with the MySQL error code and the SQLite error message.
+    """
+    message = str(error)
+
+    if isinstance(error, sqlite3.IntegrityError):
+        code = next((code for text, code in SQLITE_INTEGRITY_ERROR_CODES if text in message), 1062)
+        return pymysql.err.IntegrityError(code, message)
+
+    code = next((code for text, code in SQLITE_ERROR_CODES if text in message), 2000)
+
+    # An index that already exists has its own MySQL error code
+    if code == 1050 and message.startswith('index'):
+        code = 1061
+
+    if code in (1146, 1054, 1064):
+        return pymysql.err.ProgrammingError(code, message)
+
+    return pymysql.err.OperationalError(code, message)
+
+
+class SQLiteCursor:
+    """Cursor of a SQLite connection with the pymysql cursor interface.
+
+    Args:
+        cursor (sqlite3.Cursor): SQLite cursor.
+
+    Attributes:
+        rowcount (int): Number of rows returned (after fetching them) or affected by the last query.
+        lastrowid (int): Identifier of the last inserted row.
+    """
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._fetched_rows = 0
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self, method, *args):
+        """Run a sqlite3 cursor method, raising pymysql exceptions.
+
+        Args:
+            method (str): Cursor method name.
+            args (any): Method arguments.
+
+        Returns:
+            any: Method result.
+        """
+        try:
+            return getattr(self._cursor, method)(*args)
+        except sqlite3.Error as e:
+            raise translate_sqlite_error(e) from e
+
+    def execute(self, query, parameters=None):
+        self._run('execute', translate_query_to_sqlite(query), tuple(parameters or ()))
+        self._fetched_rows = 0
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+
+        return self.rowcount
+
+    def executemany(self, query, parameters_list):
+        self._run('executemany', translate_query_to_sqlite(query), [tuple(item) for item in parameters_list])
+        self.rowcount = self._cursor.rowcount
+
+        return self.rowcount
+
+    def _count_fetched_rows(self, rows):
+        # SQLite does not know the number of rows of a SELECT query until they are fetched
+        self._fetched_rows += len(rows)
+        self.rowcount = self._fetched_rows
+
+        return rows
+
+    def fetchone(self):
+        row = self._run('fetchone')
+
+        return row if row is None else self._count_fetched_rows([row])[0]
+
+    def fetchmany(self, size=None):
+        return self._count_fetched_rows(self._run('fetchmany', size or self._cursor.arraysize))
+
+    def fetchall(self):
+        return self._count_fetched_rows(self._run('fetchall'))
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """SQLite connection with the pymysql connection interface. It runs in autocommit mode, unless a transaction is
+    opened with begin.
+
+    Args:
+        connection (sqlite3.Connection): SQLite connection.
+
+    Attributes:
+        open (boolean): True if the connection has not been closed, False otherwise.
+    """
+    def __init__(self, connection):
+        self._connection = connection
+        self.open = True
+
+    def _run(self, query):
+        try:
+            self._connection.execute(query)
+        except sqlite3.Error as e:
+            raise translate_sqlite_error(e) from e
+
+    def cursor(self, cursor_class=None):
+        """Get a new cursor. SQLite cursors read the rows step by step, so all of them can stream the results.
+
+        Args:
+            cursor_class (class): Ignored, kept for pymysql compatibility.
+
+        Returns:
+            SQLiteCursor: Cursor object.
+        """
+        return SQLiteCursor(self._connection.cursor())
+
+    def begin(self):
+        # Take the write lock at the beginning, so that the transactions are serialized as with MySQL row locks. The
+        # shared cache (in-memory) databases do not wait for the lock (busy timeout), so wait for it here.
+        deadline = time.monotonic() + DB_POOL_TIMEOUT
+
+        while True:
+            try:
+                self._connection.execute('BEGIN IMMEDIATE')
+                return
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) or time.monotonic() > deadline:
+                    raise translate_sqlite_error(e) from e
+
+            time.sleep(SQLITE_LOCK_POLL_INTERVAL)
+
+    def commit(self):
+        if self._connection.in_transaction:
+            self._run('COMMIT')
+
+    def rollback(self):
+        if self._connection.in_transaction:
+            self._run('ROLLBACK')
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise pymysql.err.InterfaceError(0, 'The connection is closed')
+
+        self._run('SELECT 1')
+
+    def close(self):
+        self.open = False
+        self._connection.close()
+
+
+class MySQLBackend:
+    """MySQL backend, using pymysql."""
+    name = 'mysql'
+
+    def connect(self, host, user, password, database_name, port):
+        """Open a new connection to the database.
+
+        Args:
+            host (str): Database host DNS or IP.
+            user (str): Database user to establish the connection.
+            password (str): Database user password to establish the connection.
+            database_name (str): Database name to connect.
+            port (int): Database port to establish the connection.
+
+        Returns:
+            pymysql.connections.Connection: New database connection in autocommit mode.
+        """
+        # FOUND_ROWS: the affected rows are the matched ones, so an UPDATE or upsert that does not change any value
+        # is not reported as a failed operation (0 affected rows)
+        return pymysql.connect(host=host, user=user, password=password, database=database_name, port=port,
+                               autocommit=True, client_flag=CLIENT.FOUND_ROWS)
+
+    def create_database(self, host, user, password, port, database_name):
+        """Create the specified database if it does not exist.
+
+        Args:
+            host (str): Database host DNS or IP.
+            user (str): Database user to establish the connection.
+            password (str): Database user password to establish the connection.
+            port (int): Database port to establish the connection.
+            database_name (str): Name of the database to create.
+        """
+        connection = pymysql.connect(host=host, user=user, password=password, port=port)
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database_name};")
+            connection.commit()
+        connection.close()
+
+    def healthcheck(self, host, user, password, database_name, port):
+        """Check if the database is ready for connection.
+
+        Returns:
+            boolean: True if it is ready, False otherwise.
+        """
+        try:
+            connection = pymysql.connect(host=host, user=user, password=password, database=database_name, port=port)
+            connection.close()
+            return True
+        except pymysql.err.OperationalError:
+            return False
+
+
+class SQLiteBackend:
+    """Embedded SQLite backend, for tests, benchmarks and small deployments. The connection parameters are ignored,
+    all the connections are opened to the same database file.
+
+    Note: The ':memory:' path is an in-memory database shared by all the connections of the process. It exists while
+          any of its connections is open, so the backend keeps one of them open.
+
+    Args:
+        path (str): Database file path, or ':memory:'.
+
+    Attributes:
+        path (str): Database file path, or ':memory:'.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path=DB_SQLITE_PATH):
+        self.path = path
+        self._keep_alive_connection = None
+
+    def _open_sqlite_connection(self):
+        """Open a new sqlite3 connection to the backend database.
+
+        Returns:
+            sqlite3.Connection: SQLite connection in autocommit mode.
+        """
+        if self.path == ':memory:':
+            database, uri = f"file:clockzy_{os.getpid()}?mode=memory&cache=shared", True
+        else:
+            database, uri = self.path, False
+
+        connection = sqlite3.connect(database, uri=uri, timeout=DB_POOL_TIMEOUT, isolation_level=None,
+                                     check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+        connection.execute('PRAGMA foreign_keys = ON')
+
+        if uri:
+            # Shared cache connections lock the tables they read unless the reads are uncommitted
+            connection.execute('PRAGMA read_uncommitted = 1')
+        else:
+            connection.execute('PRAGMA journal_mode = WAL')
+
+        return connection
+
+    def connect(self, host=None, user=None, password=None, database_name=None, port=None):
+        """Open a new connection to the database.
+
+        Returns:
+            SQLiteConnection: New database connection in autocommit mode.
+        """
+        try:
+            if self.path == ':memory:' and self._keep_alive_connection is None:
+                self._keep_alive_connection = self._open_sqlite_connection()
+
+            return SQLiteConnection(self._open_sqlite_connection())
+        except sqlite3.Error as e:
+            raise translate_sqlite_error(e) from e
+
+    def create_database(self, host=None, user=None, password=None, port=None, database_name=None):
+        """The SQLite database is created when the first connection is opened."""
+        pass
+
+    def healthcheck(self, host=None, user=None, password=None, database_name=None, port=None):
+        """Check if the database is ready for connection.
+
+        Returns:
+            boolean: True if it is ready, False otherwise.
+        """
+        try:
+            self.connect().close()
+            return True
+        except pymysql.MySQLError:
+            return False
+
+
+BACKENDS = {MySQLBackend.name: MySQLBackend, SQLiteBackend.name: SQLiteBackend}
+_backend = None
+
+
+def get_backend():
+    """Get the database backend selected in the settings (DB_BACKEND).
+
+    Returns:
+        MySQLBackend|SQLiteBackend: Backend object.
+
+    Raises:
+        ValueError: If the selected backend does not exist.
+    """
+    global _backend
+
+    if _backend is None:
+        if DB_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown database backend {DB_BACKEND}. Allowed ones: {list(BACKENDS.keys())}")
+
+        _backend = BACKENDS[DB_BACKEND]()
+
+    return _backend
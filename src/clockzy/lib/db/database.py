@@ -1,10 +1,552 @@
+import itertools
+import logging
+import os
+import queue
+import re
+import threading
+import time
 import pymysql
+import pymysql.cursors
+from contextlib import contextmanager
+from functools import lru_cache
 
-from clockzy.config.settings import DB_ROOT_USER, DB_ROOT_PASSWORD, DB_PORT, DB_HOST, DB_NAME
+from clockzy.lib.db.backends import get_backend
+from clockzy.lib.db.instrumentation import measure_query
+from clockzy.lib.db.retry import CommitError, retry_after_error, is_transient_error, is_replayable_statement_error, \
+                                 is_ambiguous_commit_error
+from clockzy.lib.messages import logger_messages as lgm
+from clockzy.config.settings import DB_ROOT_USER, DB_ROOT_PASSWORD, DB_PORT, DB_HOST, DB_NAME, DB_POOL_SIZE, \
+                                    DB_POOL_RECYCLE, DB_POOL_TIMEOUT, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE, \
+                                    DB_BULK_CHUNK_SIZE, DB_STREAM_BATCH_SIZE, DB_REPLICAS
+
+
+db_logger = logging.getLogger('clockzy.db')
+
+# Connection pools of the current process, indexed by (pid, host, port, user, database_name)
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Transaction in progress in the current thread (connection and pool it belongs to)
+_transaction_data = threading.local()
+
+# Read routing of the current thread (number of nested pin_to_primary blocks), and replicas round robin counter
+_routing_data = threading.local()
+_replica_counter = itertools.count()
+
+# Query placeholders (a literal % character must be written as %%)
+PLACEHOLDER_REGEX = re.compile(r'%%|%s')
+READ_STATEMENTS = ('SELECT', 'SHOW', 'WITH', 'DESCRIBE', 'EXPLAIN')
+LOCKING_READ_REGEX = re.compile(r'\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b', re.IGNORECASE)
+# INSERT ... VALUES (%s, ...) AS alias ... (pymysql only sends multi-row statements when no row alias follows VALUES)
+ROW_ALIAS_INSERT_REGEX = re.compile(r'^(\s*INSERT\b.+?\bVALUES\s*)(\(\s*%s\s*(?:,\s*%s\s*)*\))(\s+AS\s+\w+\b.*)$',
+                                    re.IGNORECASE | re.DOTALL)
+
+
+class PreparedStatement:
+    """Parsed query string, reused every time the same SQL text is executed.
+
+    Args:
+        query (str): Query with %s placeholders.
+
+    Attributes:
+        query (str): Query with %s placeholders.
+        is_select (boolean): True if the statement returns rows, False otherwise.
+        is_locking_read (boolean): True if the statement locks the rows it reads (it must run in the primary).
+        num_parameters (int): Number of placeholders in the query.
+        multi_row_parts (tuple(str)): Text before, inside and after the VALUES row of an INSERT query with a row alias,
+                                      used to build its multi-row statements. None for the rest of queries.
+    """
+    def __init__(self, query):
+        self.query = query
+        self.is_select = query.lstrip(' (\n\t').upper().startswith(READ_STATEMENTS)
+        self.is_locking_read = self.is_select and LOCKING_READ_REGEX.search(query) is not None
+        self.num_parameters = PLACEHOLDER_REGEX.findall(query).count('%s')
+        row_alias_match = ROW_ALIAS_INSERT_REGEX.match(query)
+        self.multi_row_parts = row_alias_match.groups() if row_alias_match else None
+
+    def get_multi_row_query(self, num_rows):
+        """Get the multi-row version of an INSERT query with a row alias.
+
+        Args:
+            num_rows (int): Number of rows of the VALUES clause.
+
+        Returns:
+            str: Query with num_rows placeholder rows.
+        """
+        prefix, values, postfix = self.multi_row_parts
+
+        return f"{prefix}{', '.join([values] * num_rows)}{postfix}"
+
+    def validate_parameters(self, parameters):
+        """Check that the parameters match the query placeholders.
+
+        Args:
+            parameters (tuple|list): Query parameters.
+
+        Raises:
+            ValueError: If the number of parameters does not match the number of placeholders.
+        """
+        num_parameters = 0 if parameters is None else len(parameters)
+
+        if num_parameters != self.num_parameters:
+            raise ValueError(f"The query expects {self.num_parameters} parameters but {num_parameters} were given: "
+                             f"{self.query}")
+
+
+class QueryResult(list):
+    """Result of a query execution. It behaves as the list of returned rows.
+
+    Args:
+        rows (iterable(tuple)): Rows returned by the query.
+        rowcount (int): Number of rows returned or affected by the query.
+        lastrowid (int): AUTO_INCREMENT value generated by the query (INSERT queries).
+
+    Attributes:
+        rowcount (int): Number of rows returned or affected by the query.
+        lastrowid (int): AUTO_INCREMENT value generated by the query (INSERT queries).
+    """
+    def __init__(self, rows=(), rowcount=0, lastrowid=None):
+        super().__init__(rows)
+        self.rowcount = rowcount
+        self.lastrowid = lastrowid
+
+    def __repr__(self):
+        """Define how the class object will be displayed."""
+        return f"QueryResult(rows={list.__repr__(self)}, rowcount={self.rowcount}, lastrowid={self.lastrowid})"
+
+
+@lru_cache(maxsize=DB_STATEMENT_CACHE_SIZE)
+def prepare_statement(query):
+    """Get the prepared statement for a query string, parsing it only the first time the SQL text is seen.
+
+    Args:
+        query (str): Query with %s placeholders.
+
+    Returns:
+        PreparedStatement: Prepared statement object.
+    """
+    return PreparedStatement(query)
+
+
+class ConnectionPool:
+    """Pool of persistent database connections shared by all the Database objects of a worker process.
+
+    Args:
+        host (str): Database host DNS or IP.
+        user (str): Database user to establish the connection.
+        password (str): Database user password to establish the connection.
+        database_name (str): Database name to connect.
+        port (int): Database port to establish the connection.
+        size (int): Maximum number of connections opened at the same time.
+        recycle (int): Number of seconds after which a connection is closed and replaced by a new one.
+        timeout (int): Number of seconds to wait for a free connection when the pool is exhausted.
+        pre_ping (boolean): True for checking that the connection is alive before handing it out, False otherwise.
+        backend (MySQLBackend|SQLiteBackend): Backend used to open the connections. By default, the one defined in the
+                                              settings.
+
+    Attributes:
+        host (str): Database host DNS or IP.
+        user (str): Database user to establish the connection.
+        password (str): Database user password to establish the connection.
+        database_name (str): Database name to connect.
+        port (int): Database port to establish the connection.
+        size (int): Maximum number of connections opened at the same time.
+        recycle (int): Number of seconds after which a connection is closed and replaced by a new one.
+        timeout (int): Number of seconds to wait for a free connection when the pool is exhausted.
+        pre_ping (boolean): True for checking that the connection is alive before handing it out, False otherwise.
+        backend (MySQLBackend|SQLiteBackend): Backend used to open the connections.
+    """
+    def __init__(self, host, user, password, database_name, port, size=DB_POOL_SIZE, recycle=DB_POOL_RECYCLE,
+                 timeout=DB_POOL_TIMEOUT, pre_ping=DB_POOL_PRE_PING, backend=None):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database_name = database_name
+        self.port = port
+        self.size = size
+        self.recycle = recycle
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.backend = backend if backend else get_backend()
+        self._idle_connections = queue.LifoQueue()
+        self._creation_times = {}
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'closed': 0, 'checkouts': 0, 'recycled': 0, 'failed_pings': 0, 'timeouts': 0}
+
+    def _open_connection(self):
+        """Open a new connection to the database.
+
+        Returns:
+            pymysql.connections.Connection: New database connection.
+        """
+        try:
+            connection = self.backend.connect(self.host, self.user, self.password, self.database_name, self.port)
+        except Exception:
+            # Free the slot reserved for this connection
+            with self._lock:
+                self._stats['created'] -= 1
+            raise
+
+        self._creation_times[id(connection)] = time.monotonic()
+
+        return connection
+
+    def _discard_connection(self, connection):
+        """Close a connection and free its slot in the pool.
+
+        Args:
+            connection (pymysql.connections.Connection): Connection to discard.
+        """
+        self._creation_times.pop(id(connection), None)
+
+        with self._lock:
+            self._stats['closed'] += 1
+
+        try:
+            connection.close()
+        except pymysql.MySQLError:
+            pass  # The connection is already closed by the server
+
+    def _is_usable(self, connection):
+        """Check if an idle connection can be handed out again.
+
+        Args:
+            connection (pymysql.connections.Connection): Connection to check.
+
+        Returns:
+            boolean: True if the connection is alive and has not exceeded its recycle time, False otherwise.
+        """
+        if time.monotonic() - self._creation_times.get(id(connection), 0) > self.recycle:
+            with self._lock:
+                self._stats['recycled'] += 1
+            return False
+
+        if self.pre_ping:
+            try:
+                connection.ping(reconnect=False)
+            except pymysql.MySQLError:
+                with self._lock:
+                    self._stats['failed_pings'] += 1
+                return False
+
+        return True
+
+    def get_connection(self):
+        """Check out a connection from the pool, opening a new one if there is not any idle and the pool is not full.
+
+        Returns:
+            pymysql.connections.Connection: Database connection ready to be used.
+
+        Raises:
+            pymysql.err.OperationalError: If no connection has been released within the pool timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                connection = self._idle_connections.get_nowait()
+            except queue.Empty:
+                connection = None
+
+            # Open a new connection if there is room for it
+            if connection is None:
+                with self._lock:
+                    can_open = self._stats['created'] - self._stats['closed'] < self.size
+                    if can_open:
+                        self._stats['created'] += 1
+
+                if can_open:
+                    connection = self._open_connection()
+                    with self._lock:
+                        self._stats['checkouts'] += 1
+                    return connection
+
+                # Pool exhausted, wait for a released connection
+                try:
+                    connection = self._idle_connections.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise pymysql.err.OperationalError(f"Could not get a database connection in {self.timeout} "
+                                                       'seconds, the connection pool is exhausted')
+
+            if self._is_usable(connection):
+                with self._lock:
+                    self._stats['checkouts'] += 1
+                return connection
+
+            self._discard_connection(connection)
+
+    def release_connection(self, connection, discard=False):
+        """Return a connection to the pool so that it can be reused.
+
+        Args:
+            connection (pymysql.connections.Connection): Connection to release.
+            discard (boolean): True for closing the connection instead of reusing it (e.g. if its state is unknown after
+                               an error), False otherwise.
+        """
+        if discard or not connection.open:
+            self._discard_connection(connection)
+            return
+
+        self._idle_connections.put(connection)
+
+    def get_stats(self):
+        """Get the pool usage statistics.
+
+        Returns:
+            dict: Pool statistics (size, open, idle and in_use connections, and event counters).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats['size'] = self.size
+        stats['open'] = stats['created'] - stats['closed']
+        stats['idle'] = self._idle_connections.qsize()
+        stats['in_use'] = stats['open'] - stats['idle']
+
+        return stats
+
+
+def get_connection_pool(host, user, password, database_name, port):
+    """Get the connection pool of the current process for the specified database, creating it if necessary.
+
+    Note: The process ID is part of the pool key, so that forked workers never share the parent connections.
+          The connections are opened with the backend defined in the settings.
+
+    Args:
+        host (str): Database host DNS or IP.
+        user (str): Database user to establish the connection.
+        password (str): Database user password to establish the connection.
+        database_name (str): Database name to connect.
+        port (int): Database port to establish the connection.
+
+    Returns:
+        ConnectionPool: Connection pool object.
+    """
+    backend = get_backend()
+    pool_key = (os.getpid(), backend.name, host, port, user, database_name)
+
+    with _pools_lock:
+        if pool_key not in _pools:
+            _pools[pool_key] = ConnectionPool(host, user, password, database_name, port, backend=backend)
+
+        return _pools[pool_key]
+
+
+def get_pool_stats():
+    """Get the statistics of all the connection pools of the current process.
+
+    Returns:
+        dict: Pool statistics indexed by "user@host:port/database_name".
+    """
+    with _pools_lock:
+        pools = [pool for pool_key, pool in _pools.items() if pool_key[0] == os.getpid()]
+
+    return {f"{pool.user}@{pool.host}:{pool.port}/{pool.database_name}": pool.get_stats() for pool in pools}
+
+
+def get_transaction_connection(pool=None):
+    """Get the connection of the transaction in progress in the current thread.
+
+    Args:
+        pool (ConnectionPool): If specified, only return the connection if it belongs to that pool.
+
+    Returns:
+        pymysql.connections.Connection: Transaction connection, or None if there is no transaction in progress.
+    """
+    connection = getattr(_transaction_data, 'connection', None)
+
+    if connection is None or (pool is not None and _transaction_data.pool is not pool):
+        return None
+
+    return connection
+
+
+def in_transaction():
+    """Check if there is a transaction in progress in the current thread.
+
+    Returns:
+        boolean: True if there is a transaction in progress, False otherwise.
+    """
+    return get_transaction_connection() is not None
+
+
+@contextmanager
+def transaction(database=None):
+    """Run all the queries of the block in a single transaction, using the same database connection.
+
+    All the Database objects (and therefore the models and the database_interface functions) used inside the block
+    take part in the transaction. It is committed when the block ends, and rolled back if an exception is raised.
+
+    Note: Nested transaction blocks join the outermost transaction.
+
+    Args:
+        database (Database): Database where to open the transaction. By default, the one defined in the settings.
+
+    Yields:
+        Database: Database object holding the transaction connection.
+    """
+    database = database if database else Database()
+
+    # Join the transaction in progress
+    if in_transaction():
+        yield database
+        return
+
+    database.connect()
+    connection = database.database_connection
+
+    try:
+        connection.begin()
+    except BaseException:
+        # The connection state is unknown, so it is not returned to the pool
+        database.get_connection_pool().release_connection(connection, discard=True)
+        database.database_connection = None
+        raise
+
+    _transaction_data.connection = connection
+    _transaction_data.pool = database.get_connection_pool()
+    _transaction_data.commit_callbacks = []
+
+    try:
+        try:
+            yield database
+        except BaseException:
+            rollback_connection(connection)
+            raise
+
+        try:
+            connection.commit()
+        except pymysql.MySQLError as e:
+            rollback_connection(connection)
+            raise CommitError(*e.args) from e
+    finally:
+        commit_callbacks = _transaction_data.commit_callbacks
+        _transaction_data.connection = None
+        _transaction_data.pool = None
+        _transaction_data.commit_callbacks = []
+        database.database_connection = connection
+        database.close_connection()
+
+    for callback in commit_callbacks:
+        callback()
+
+
+def on_commit(callback):
+    """Run a function when the transaction in progress in the current thread is committed.
+
+    Note: If the transaction is rolled back, the function is not run. If there is no transaction in progress, the
+          function is run immediately.
+
+    Args:
+        callback (function): Function without arguments.
+    """
+    if in_transaction():
+        _transaction_data.commit_callbacks.append(callback)
+    else:
+        callback()
+
+
+def rollback_connection(connection):
+    """Roll back the transaction in progress in the connection.
+
+    Args:
+        connection (pymysql.connections.Connection): Database connection.
+    """
+    try:
+        connection.rollback()
+    except pymysql.MySQLError:
+        pass  # The server rolls back the transaction when the connection is lost
+
+
+def run_in_transaction(func, *args, database=None, **kwargs):
+    """Run the function in a transaction, replaying the whole transaction if it fails with a transient error.
+
+    Note: The server rolls back the transaction when the connection is lost or a deadlock happens, so the function is
+          run again from the beginning. It must not have side effects outside the database (e.g. API requests). If the
+          connection is lost during the COMMIT, the transaction is not replayed because it may have been committed. If
+          there is a transaction in progress, the function joins it and it is not replayed.
+
+    Args:
+        func (function): Function to run. Its database queries take part in the transaction.
+        args (any): Function positional arguments.
+        database (Database): Database where to open the transaction. By default, the one defined in the settings.
+        kwargs (any): Function keyword arguments.
+
+    Returns:
+        any: Function result.
+
+    Raises:
+        pymysql.MySQLError: If the transaction fails and it can not be replayed.
+    """
+    if in_transaction():
+        return func(*args, **kwargs)
+
+    attempt = 1
+
+    while True:
+        try:
+            with transaction(database):
+                return func(*args, **kwargs)
+        except pymysql.MySQLError as e:
+            if is_ambiguous_commit_error(e) or not retry_after_error(e, attempt):
+                raise
+
+        attempt += 1
+
+
+@contextmanager
+def pin_to_primary():
+    """Send all the reads of the block to the primary database instead of the read replicas.
+
+    Use it when the block needs to read its own (or very recent) writes, that might not have been replicated yet. It
+    can also be used as a function decorator: @pin_to_primary()
+    """
+    _routing_data.pinned = getattr(_routing_data, 'pinned', 0) + 1
+
+    try:
+        yield
+    finally:
+        _routing_data.pinned -= 1
+
+
+def is_pinned_to_primary():
+    """Check if the reads of the current thread must be sent to the primary database.
+
+    Returns:
+        boolean: True if there is a pin_to_primary block or a transaction in progress, False otherwise.
+    """
+    return getattr(_routing_data, 'pinned', 0) > 0 or in_transaction()
+
+
+def get_read_database(replicas=None):
+    """Get the database where to send the next read query, balancing the reads between the replicas (round robin).
+
+    Args:
+        replicas (list(tuple)): Read replicas (host, port). By default, the ones defined in the settings.
+
+    Returns:
+        Database: Database object of the selected replica, or of the primary if there are no replicas or the reads are
+                  pinned to the primary.
+    """
+    replicas = DB_REPLICAS if replicas is None else replicas
+
+    if len(replicas) == 0 or is_pinned_to_primary():
+        return Database()
+
+    host, port = replicas[next(_replica_counter) % len(replicas)]
+
+    return Database(host=host, port=port)
 
 
 class Database:
-    """Class to map the MYSQL database connection.
+    """Class to map the database connection.
+
+    Note: The connections are taken from a connection pool shared by the current process, so closing the connection
+          returns it to the pool instead of closing the socket. If there is a transaction in progress in the current
+          thread, its connection is used instead. The queries are written in MySQL syntax, whatever the backend
+          selected in the settings is (see clockzy.lib.db.backends).
 
     Args:
         host (str): Database host DNS or IP.
@@ -29,63 +571,233 @@ class Database:
         self.port = port
         self.database_connection = None
 
+    def get_connection_pool(self):
+        """Get the connection pool associated with the database connection parameters.
+
+        Returns:
+            ConnectionPool: Connection pool object.
+        """
+        return get_connection_pool(self.host, self.user, self.password, self.database_name, self.port)
+
+    def get_pool_stats(self):
+        """Get the statistics of the connection pool used by this database object.
+
+        Returns:
+            dict: Pool statistics.
+        """
+        return self.get_connection_pool().get_stats()
+
     def connect(self):
-        """Create the connection to the database."""
+        """Get a connection to the database from the connection pool (or the one of the transaction in progress)."""
         if self.database_connection is None:
-            self.database_connection = pymysql.connect(host=self.host, user=self.user, password=self.password,
-                                                       database=self.database_name, port=self.port)
+            pool = self.get_connection_pool()
+            self.database_connection = get_transaction_connection(pool) or pool.get_connection()
 
-    def run_query(self, query):
-        """Run a query string in the database
+    def _execute_query(self, query, parameters, statement):
+        """Run a query string in the database once, raising the database errors.
 
         Args:
-            query (str): Raw query to execute.
+            query (str): Query to execute, using %s as placeholder for each parameter.
+            parameters (tuple|list): Values for the query placeholders.
+            statement (PreparedStatement): Prepared statement of the query.
 
         Returns:
-            - List(tuple): If SELECT query, returns the query results.
-            - int: If non SELECT query, return the number of affected rows.
+            QueryResult: Returned rows (SELECT queries), number of returned or affected rows and the last inserted id.
         """
         try:
             self.connect()
-            with self.database_connection.cursor() as cursor:
-                # If SELECT query, then execute the query and return the results
-                if query.startswith('SELECT') or query.startswith('select'):
-                    query_results = []
+            with measure_query(query) as measurement, self.database_connection.cursor() as cursor:
+                cursor.execute(query, parameters)
 
-                    cursor.execute(query)
-                    result = cursor.fetchall()
+                # If SELECT query, then return the results. Otherwise, return the number of affected rows. It is
+                # committed by the autocommit mode, or when the transaction in progress ends.
+                if statement.is_select:
+                    result = QueryResult(cursor.fetchall(), cursor.rowcount)
+                else:
+                    result = QueryResult(rowcount=cursor.rowcount, lastrowid=cursor.lastrowid)
 
-                    for row in result:
-                        query_results.append(row)
+                measurement['rows'] = result.rowcount
 
-                    return query_results
+                return result
+        finally:
+            self.close_connection()
 
-                # If no SELECT query, then execute the query and return the number of affected rows
-                else:
-                    try:
-                        cursor.execute(query)
-                        self.database_connection.commit()
+    def run_query(self, query, parameters=None):
+        """Run a query string in the database
+
+        Note: The values must be passed as parameters and never be formatted into the query string, so that they are
+              escaped by the driver.
 
-                        return cursor.rowcount
+              If the query fails with a transient error (lost connection, deadlock...), it is retried when it can be
+              safely run again (see is_replayable_statement_error). Inside a transaction the failed statement can not
+              be retried on its own, so the transient errors are raised to abort the whole transaction (see
+              run_in_transaction).
+
+        Args:
+            query (str): Query to execute, using %s as placeholder for each parameter.
+            parameters (tuple|list): Values for the query placeholders.
 
-                    except pymysql.MySQLError as e:
-                        self.database_connection.rollback()
-                        print(f"Error when executing query: {query}. Reason {e}")
-                        return 0
+        Returns:
+            QueryResult: Returned rows (SELECT queries), number of returned or affected rows and the last inserted id.
+                         If a non SELECT query fails, the result has no rows and a rowcount of 0.
+
+        Raises:
+            ValueError: If the number of parameters does not match the number of placeholders.
+            pymysql.MySQLError: If a SELECT query fails, or a transient error happens inside a transaction.
+        """
+        statement = prepare_statement(query)
+        statement.validate_parameters(parameters)
+        attempt = 1
+
+        while True:
+            try:
+                return self._execute_query(query, parameters, statement)
+            except pymysql.MySQLError as e:
+                if in_transaction():
+                    if statement.is_select or is_transient_error(e):
+                        raise
+                elif is_replayable_statement_error(e, statement.is_select) and retry_after_error(e, attempt):
+                    attempt += 1
+                    continue
+                elif statement.is_select:
+                    raise
+
+                db_logger.error(lgm.error_executing_query(query, e))
+
+                return QueryResult()
+
+    def _stream_rows(self, query, parameters, batch_size):
+        """Run a SELECT query once and yield its rows, raising the database errors.
+
+        Args:
+            query (str): SELECT query to execute, using %s as placeholder for each parameter.
+            parameters (tuple|list): Values for the query placeholders.
+            batch_size (int): Number of rows fetched from the server at a time.
+
+        Yields:
+            tuple: Query result row.
+        """
+        try:
+            self.connect()
+            # The measured time includes the time spent by the caller processing the rows
+            with measure_query(query) as measurement, \
+                    self.database_connection.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(query, parameters)
+
+                rows = cursor.fetchmany(batch_size)
+                while rows:
+                    measurement['rows'] += len(rows)
+                    yield from rows
+                    rows = cursor.fetchmany(batch_size)
         finally:
             self.close_connection()
 
+    def stream_query(self, query, parameters=None, batch_size=DB_STREAM_BATCH_SIZE):
+        """Run a SELECT query and yield its rows one by one, without loading the whole result set in memory.
+
+        Note: The rows are read with an unbuffered server-side cursor, fetching batch_size rows at a time. The
+              connection is busy until the generator is exhausted or closed, so no other query can be run on it
+              meanwhile (nor in the transaction in progress).
+
+              If the query fails with a transient error before yielding any row, it is retried (outside transactions).
+
+        Args:
+            query (str): SELECT query to execute, using %s as placeholder for each parameter.
+            parameters (tuple|list): Values for the query placeholders.
+            batch_size (int): Number of rows fetched from the server at a time.
+
+        Yields:
+            tuple: Query result row.
+
+        Raises:
+            ValueError: If it is not a SELECT query or the number of parameters does not match the number of
+                        placeholders.
+        """
+        statement = prepare_statement(query)
+        statement.validate_parameters(parameters)
+
+        if not statement.is_select:
+            raise ValueError(f"Only SELECT queries can be streamed: {query}")
+
+        attempt = 1
+        rows_yielded = False
+
+        while True:
+            try:
+                for row in self._stream_rows(query, parameters, batch_size):
+                    rows_yielded = True
+                    yield row
+                return
+            except pymysql.MySQLError as e:
+                # The rows already yielded can not be taken back, so the query is only retried if none has been read
+                if rows_yielded or in_transaction() or not retry_after_error(e, attempt):
+                    raise
+
+            attempt += 1
+
+    def run_many(self, query, parameters_list, chunk_size=DB_BULK_CHUNK_SIZE):
+        """Run a non SELECT query once for each item of the parameters list, in a single transaction.
+
+        Note: The parameters are sent in chunks, and INSERT queries whose VALUES only contain placeholders are sent as
+              one multi-row INSERT statement per chunk. If a chunk fails, the whole operation is rolled back (unless
+              there is an outer transaction in progress, which decides what to do). If it fails with a transient error,
+              the whole transaction is replayed (see run_in_transaction).
+
+        Args:
+            query (str): Query to execute, using %s as placeholder for each parameter.
+            parameters_list (list(tuple)): Values for the query placeholders, one item for each execution.
+            chunk_size (int): Maximum number of items sent in each statement.
+
+        Returns:
+            QueryResult: Total number of affected rows. If the operation fails, the result has a rowcount of 0.
+
+        Raises:
+            ValueError: If the number of parameters of any item does not match the number of placeholders.
+            pymysql.MySQLError: If a transient error happens inside an outer transaction.
+        """
+        statement = prepare_statement(query)
+
+        for parameters in parameters_list:
+            statement.validate_parameters(parameters)
+
+        def run_chunks():
+            rowcount = 0
+            self.connect()
+
+            try:
+                with self.database_connection.cursor() as cursor:
+                    for index in range(0, len(parameters_list), chunk_size):
+                        chunk = parameters_list[index:index + chunk_size]
+                        with measure_query(query) as measurement:
+                            if statement.multi_row_parts:
+                                cursor.execute(statement.get_multi_row_query(len(chunk)),
+                                               [parameter for parameters in chunk for parameter in parameters])
+                            else:
+                                cursor.executemany(query, chunk)
+                            measurement['rows'] = cursor.rowcount
+                        rowcount += cursor.rowcount
+            finally:
+                self.close_connection()
+
+            return rowcount
+
+        try:
+            return QueryResult(rowcount=run_in_transaction(run_chunks, database=self))
+        except pymysql.MySQLError as e:
+            if in_transaction() and is_transient_error(e):
+                raise
+
+            db_logger.error(lgm.error_executing_query(query, e))
+
+            return QueryResult()
+
     def create_database(self, database_name):
         """Create the specified database
 
         args:
             database_name (str): Name of the database to create.
         """
-        connection = pymysql.connect(host=self.host, user=self.user, password=self.password, port=self.port)
-        with connection.cursor() as cursor:
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database_name};")
-            connection.commit()
-        connection.close()
+        get_backend().create_database(self.host, self.user, self.password, self.port, database_name)
 
     def healthcheck(self):
         """Check if the database is ready for connection.
@@ -93,15 +805,14 @@ class Database:
         Returns:
             boolean: True if it is ready, False otherwise.
         """
-        try:
-            pymysql.connect(host=self.host, user=self.user, password=self.password, database=self.database_name,
-                            port=self.port)
-            return True
-        except pymysql.err.OperationalError:
-            return False
+        return get_backend().healthcheck(self.host, self.user, self.password, self.database_name, self.port)
 
     def close_connection(self):
-        """Close the database connection"""
+        """Release the database connection, returning it to the connection pool.
+
+        Note: The connection of a transaction in progress is released when the transaction ends.
+        """
         if self.database_connection:
-            self.database_connection.close()
+            if self.database_connection is not get_transaction_connection():
+                self.get_connection_pool().release_connection(self.database_connection)
             self.database_connection = None
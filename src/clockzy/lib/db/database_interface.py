@@ -1,94 +1,171 @@
 """
 Module to group calls to the database.
 """
-from pymysql import MySQLError
+from pymysql import MySQLError, OperationalError
 
-from clockzy.lib.db.database import Database
-from clockzy.lib.utils.time import datetime_to_str
+from clockzy.lib.db.database import Database, QueryResult, prepare_statement, get_read_database
+from clockzy.lib.db import identity_map
+from clockzy.lib.db.query_builder import Query
+from clockzy.lib.utils.time import datetime_to_str, subtract_days_to_datetime
 from clockzy.lib.handlers.codes import SUCCESS, OPERATION_ERROR
 
 
-def run_query(query):
-    """Execute the query in the database.
+def run_read_query(query, parameters=None):
+    """Execute a SELECT query in a read replica (or in the primary if the reads are pinned to it).
+
+    Note: If the replica is not available, the query is executed in the primary.
 
     Args:
-        query (String): Raw query to execute.
+        query (String): SELECT query to execute, using %s as placeholder for each parameter.
+        parameters (tuple|list): Values for the query placeholders.
 
     Returns:
-        - List(tuple): If SELECT query, returns the query results.
-        - int: If non SELECT query, return the number of affected rows.
+        QueryResult: Query results (list of rows).
+    """
+    db = get_read_database()
+
+    try:
+        return db.run_query(query, parameters)
+    except OperationalError:
+        primary_db = Database()
+
+        if (db.host, db.port) == (primary_db.host, primary_db.port):
+            raise
+
+        return primary_db.run_query(query, parameters)
+
+
+def run_query(query, parameters=None):
+    """Execute the query in the database. SELECT queries are executed in the read replicas, unless they lock rows.
+
+    Args:
+        query (String): Query to execute, using %s as placeholder for each parameter.
+        parameters (tuple|list): Values for the query placeholders.
+
+    Returns:
+        QueryResult: Query results (list of rows) with the rowcount and lastrowid of the executed statement.
     Raises:
         MySQLError: If it is not a SELECT query and no row has been affected.
     """
+    statement = prepare_statement(query)
+
+    if statement.is_select and not statement.is_locking_read:
+        return run_read_query(query, parameters)
+
     db = Database()
-    results = db.run_query(query)
+    results = db.run_query(query, parameters)
 
-    if not query.startswith('SELECT') and not query.startswith('select') and results == 0:
+    if not statement.is_select and results.rowcount == 0:
         raise MySQLError(f"The {query} query has not affected any row")
 
     return results
 
 
-def run_query_getting_status(query):
-    """Execute a query and get the result code.
+def stream_query(query, parameters=None):
+    """Execute a SELECT query in a read replica, getting its rows one by one in constant memory.
 
-    Note: Do not use it when you need to get the results of the query (SELECT results).
+    Note: The database connection is busy until the returned generator is exhausted or closed.
 
     Args:
-        query (String): Raw query to execute.
+        query (String): SELECT query to execute, using %s as placeholder for each parameter.
+        parameters (tuple|list): Values for the query placeholders.
+
+    Returns:
+        generator(tuple): Query result rows.
+    """
+    db = get_read_database()
+
+    return db.stream_query(query, parameters)
+
+
+def run_many(query, parameters_list):
+    """Execute a non SELECT query once for each item of the parameters list, in chunks and in a single transaction.
+
+    Args:
+        query (String): Query to execute, using %s as placeholder for each parameter.
+        parameters_list (iterable(tuple)): Values for the query placeholders, one item for each execution.
+
+    Returns:
+        QueryResult: Query result with the total number of affected rows.
+    Raises:
+        MySQLError: If no row has been affected.
+    """
+    parameters_list = list(parameters_list)
+
+    if len(parameters_list) == 0:
+        return QueryResult()
+
+    db = Database()
+    results = db.run_many(query, parameters_list)
+
+    if results.rowcount == 0:
+        raise MySQLError(f"The {query} query has not affected any row")
+
+    return results
+
+
+def run_many_getting_status(query, parameters_list):
+    """Execute a query once for each item of the parameters list and get the result code.
+
+    Args:
+        query (String): Query to execute, using %s as placeholder for each parameter.
+        parameters_list (iterable(tuple)): Values for the query placeholders, one item for each execution.
 
     Returns:
         int: Code status.
     """
     try:
-        run_query(query)
+        run_many(query, parameters_list)
         return SUCCESS
     except MySQLError:
         return OPERATION_ERROR
 
 
-def get_last_insert_id(table_name, identifier='id'):
-    """Get the last
+def run_query_getting_result(query, parameters=None):
+    """Execute a query and get the result code together with the query result.
+
+    Args:
+        query (String): Query to execute, using %s as placeholder for each parameter.
+        parameters (tuple|list): Values for the query placeholders.
 
-    Precondition:
-        - Table identifier must be AUTO_INCREMENT
+    Returns:
+        tuple(int, QueryResult): Code status and query result (None if the query has failed).
+    """
+    try:
+        return SUCCESS, run_query(query, parameters)
+    except MySQLError:
+        return OPERATION_ERROR, None
 
-    Note:
-     - LAST_INSERT_ID() does not work for this case due to the mysql connections.
+
+def run_query_getting_status(query, parameters=None):
+    """Execute a query and get the result code.
+
+    Note: Do not use it when you need to get the results of the query (SELECT results).
 
     Args:
-        table_name (str): Table name to get the last inserted id.
-        identifier (str): Identifier field name (usually will be called: id)
+        query (String): Query to execute, using %s as placeholder for each parameter.
+        parameters (tuple|list): Values for the query placeholders.
 
     Returns:
-        int: Last inserted ID.
+        int: Code status.
     """
-    results = run_query(f"SELECT {identifier} from {table_name} ORDER BY id desc LIMIT 1")
-
-    return results[0][0] if len(results) > 0 else 0
+    return run_query_getting_result(query, parameters)[0]
 
 
 def build_select_query_from_object_parameters(parameters, table_name):
     """Build a SELECT query, using the item parameters as conditions (used in WHERE).
 
+    Note: Kept for compatibility, use the Query builder instead.
+
     Args:
         parameters (dict): Dictionary that contains the object parameters ({'colum_name': 'value', ...})
         table_name (str): Table where to make the search.
 
     Returns:
-        str: Query using all parameters object as condition.
+        tuple(str, tuple): Query using all parameters object as condition, and the values for its placeholders.
 
     """
-    query_string = f"SELECT * FROM {table_name} WHERE "
-
-    for parameter, value in parameters.items():
-        formatted_value = f"'{value}'" if isinstance(value, str) else value
-        query_string += f"{parameter}={formatted_value} and "
-
-    # Delete the last "," character
-    query_string = query_string[:-4]
-
-    return query_string
+    return Query(table_name).where_equal(parameters).build()
 
 
 def item_exists(object_parameters, table_name):
@@ -101,27 +178,67 @@ def item_exists(object_parameters, table_name):
     Returns:
         boolean: True if there is one or more elements, False otherwise.
     """
-    query = build_select_query_from_object_parameters(object_parameters, table_name)
-
-    return len(run_query(query)) > 0
+    return run_query(*Query(table_name).where_equal(object_parameters).build_exists())[0][0] == 1
 
 
-def get_database_data_from_objects(object_parameters, table_name):
+def get_database_data_from_objects(object_parameters, table_name, columns=None, limit=None):
     """Get the DB results from a query built with specified object parameters.
 
     Args:
         object_parameters (dict): Dictionary that contains the object parameters ({'colum_name': 'value', ...})
         table_name (str): Table where to make the search.
+        columns (list(str)): Columns to get (all of them if None).
+        limit (int): Maximum number of rows to get (all of them if None).
 
     Returns:
         list(tuple): Query results
 
     """
-    result = run_query(build_select_query_from_object_parameters(object_parameters, table_name))
+    query = Query(table_name).select(*(columns or [])).where_equal(object_parameters)
+
+    if limit is not None:
+        query.limit(limit)
+
+    result = run_query(*query.build())
 
     return result if len(result) > 0 else []
 
 
+def get_user_object_query(user_id):
+    """Build the query to get the user data used by the user object.
+
+    Args:
+        user_id (str): User identifier to get the data.
+
+    Returns:
+        Query: Query object.
+    """
+    # Avoid circular import
+    from clockzy.lib.db.db_schema import USER_TABLE
+
+    return Query(USER_TABLE).select('id', 'user_name', 'password', 'email', 'entry_data').where('id', user_id).limit(1)
+
+
+def build_user_object(user_row):
+    """Build a user object from the get_user_object_query row.
+
+    Args:
+        user_row (tuple): User data (id, user_name, password, email, entry_data).
+
+    Returns:
+        User: User object with the row data.
+    """
+    # Avoid circular import
+    from clockzy.lib.models.user import User
+
+    user_object = User(user_row[0], user_row[1])
+    user_object.password = user_row[2]
+    user_object.email = user_row[3]
+    user_object.entry_data = user_row[4]
+
+    return user_object
+
+
 def get_user_object(user_id):
     """Get the user object from the database data.
 
@@ -132,22 +249,48 @@ def get_user_object(user_id):
         User: User object with the DB data.
         None: If the user_id does not exist in the DB.
 
+    Note: The user is loaded only once in each request (see identity_map).
+    """
+    def load_user_object():
+        user_data = run_query(*get_user_object_query(user_id).build())
+
+        return build_user_object(user_data[0]) if len(user_data) > 0 else None
+
+    return identity_map.get('user', user_id, load_user_object)
+
+
+def lock_user(user_id):
+    """Lock the user row until the end of the transaction in progress.
+
+    Note: Other transactions locking the same user wait until the current one ends, so that the operations of the same
+          user are serialized. Outside a transaction, the lock is released as soon as the query ends.
+
+    Args:
+        user_id (str): User identifier to lock.
+
+    Returns:
+        boolean: True if the user exists, False otherwise.
     """
     # Avoid circular import
     from clockzy.lib.db.db_schema import USER_TABLE
-    from clockzy.lib.models.user import User
 
-    user_data = get_database_data_from_objects({'id': user_id}, USER_TABLE)
+    return len(run_query(f"SELECT id FROM {USER_TABLE} WHERE id=%s FOR UPDATE", (user_id,))) > 0
 
-    if len(user_data) == 0:
-        return None
 
-    user_object = User(user_data[0][0], user_data[0][1])
-    user_object.password = user_data[0][2]
-    user_object.email = user_data[0][3]
-    user_object.entry_data = user_data[0][4]
+def get_last_clock_query(user_id):
+    """Build the query to get the last clock of the user.
 
-    return user_object
+    Args:
+        user_id (str): User identifier to get the data.
+
+    Returns:
+        Query: Query object.
+    """
+    # Avoid circular import
+    from clockzy.lib.db.db_schema import CLOCK_TABLE
+
+    return Query(CLOCK_TABLE).select('id', 'user_id', 'action', 'date_time').where('user_id', user_id) \
+                             .order_by('id', descending=True).limit(1)
 
 
 def get_last_clock_from_user(user_id):
@@ -159,20 +302,46 @@ def get_last_clock_from_user(user_id):
     Returns:
         Clock: Last clock object with the DB data.
         None: If the user does not have any registration made in the DB.
+
+    Note: The last clock is loaded only once in each request (see identity_map).
+    """
+    def load_last_clock_object():
+        clock_data = run_query(*get_last_clock_query(user_id).build())
+
+        return build_clock_object(clock_data[0]) if len(clock_data) > 0 else None
+
+    return identity_map.get('last_clock', user_id, load_last_clock_object)
+
+
+def get_config_object_query(user_id):
+    """Build the query to get the user config data used by the config object.
+
+    Args:
+        user_id (str): User identifier to get the data.
+
+    Returns:
+        Query: Query object.
     """
     # Avoid circular import
-    from clockzy.lib.db.db_schema import CLOCK_TABLE
-    from clockzy.lib.models.clock import Clock
+    from clockzy.lib.db.db_schema import CONFIG_TABLE
 
-    clock_data = run_query(f"SELECT * FROM {CLOCK_TABLE} WHERE user_id='{user_id}' ORDER BY id desc LIMIT 1")
+    return Query(CONFIG_TABLE).select('intratime_integration', 'time_zone').where('user_id', user_id).limit(1)
 
-    if len(clock_data) == 0:
-        return None
 
-    clock_object = Clock(user_id, clock_data[0][2], clock_data[0][3])
-    clock_object.id = clock_data[0][0]
+def build_config_object(user_id, config_row):
+    """Build a config object from the get_config_object_query row.
 
-    return clock_object
+    Args:
+        user_id (str): User identifier the config belongs to.
+        config_row (tuple): Config data (intratime_integration, time_zone).
+
+    Returns:
+        Config: Config object with the row data.
+    """
+    # Avoid circular import
+    from clockzy.lib.models.config import Config
+
+    return Config(user_id, config_row[0], config_row[1])
 
 
 def get_config_object(user_id):
@@ -184,19 +353,15 @@ def get_config_object(user_id):
     Returns:
         Config: Config object with the DB data.
         None: If the user does not have any configuration data in the DB.
-    """
-    # Avoid circular import
-    from clockzy.lib.db.db_schema import CONFIG_TABLE
-    from clockzy.lib.models.config import Config
-
-    config_data = get_database_data_from_objects({'user_id': user_id}, CONFIG_TABLE)
 
-    if len(config_data) == 0:
-        return None
+    Note: The config is loaded only once in each request (see identity_map).
+    """
+    def load_config_object():
+        config_data = run_query(*get_config_object_query(user_id).build())
 
-    config_object = Config(user_id, config_data[0][1], config_data[0][2])
+        return build_config_object(user_id, config_data[0]) if len(config_data) > 0 else None
 
-    return config_object
+    return identity_map.get('config', user_id, load_config_object)
 
 
 def get_clock_object(clock_id):
@@ -213,7 +378,7 @@ def get_clock_object(clock_id):
     from clockzy.lib.db.db_schema import CLOCK_TABLE
     from clockzy.lib.models.clock import Clock
 
-    clock_data = get_database_data_from_objects({'id': clock_id}, CLOCK_TABLE)
+    clock_data = run_query(*Query(CLOCK_TABLE).where('id', clock_id).limit(1).build())
 
     if len(clock_data) == 0:
         return None
@@ -225,6 +390,40 @@ def get_clock_object(clock_id):
     return clock_object
 
 
+def build_clock_object(clock_row):
+    """Build a clock object from a clock table row.
+
+    Args:
+        clock_row (tuple): Clock table row (id, user_id, action, date_time, local_date_time).
+
+    Returns:
+        Clock: Clock object with the row data.
+    """
+    # Avoid circular import
+    from clockzy.lib.models.clock import Clock
+
+    clock = Clock(clock_row[1], clock_row[2], clock_row[3])
+    clock.id = clock_row[0]
+
+    return clock
+
+
+def get_clock_data_in_time_range_query(user_id, datetime_from, datetime_to):
+    """Build the query to get the clocks of the user made between the two indicated dates.
+
+    Args:
+        user_id (str): User identifier to get the data.
+        datetime_from (str): Lower datetime limit.
+        datetime_to (str): Upper datetimelimit.
+
+    Returns:
+        Query: Query object.
+    """
+    from clockzy.lib.db.db_schema import CLOCK_TABLE
+
+    return Query(CLOCK_TABLE).where('user_id', user_id).where_between('date_time', datetime_from, datetime_to)
+
+
 def get_clock_data_in_time_range(user_id, datetime_from, datetime_to):
     """Get all the records of the user, made between the two indicated dates.
 
@@ -237,24 +436,143 @@ def get_clock_data_in_time_range(user_id, datetime_from, datetime_to):
         List(Clock): Clock data list.
         None: If the user does not have any clocking data betweeen the specified range time.
     """
+    clock_data = run_query(*get_clock_data_in_time_range_query(user_id, datetime_from, datetime_to).build())
+
+    return [build_clock_object(clock_item) for clock_item in clock_data]
+
+
+def iter_clock_data_in_time_range(user_id, datetime_from, datetime_to):
+    """Get all the records of the user made between the two indicated dates, streaming them in constant memory.
+
+    Args:
+        user_id (str): User identifier to get the data.
+        datetime_from (str): Lower datetime limit.
+        datetime_to (str): Upper datetimelimit.
+
+    Yields:
+        Clock: Clock data ordered by date_time.
+    """
+    query = get_clock_data_in_time_range_query(user_id, datetime_from, datetime_to).order_by('date_time').order_by('id')
+
+    for clock_item in stream_query(*query.build()):
+        yield build_clock_object(clock_item)
+
+
+def iter_clock_data_with_previous_clock(user_id, datetime_from, datetime_to, look_back_days=31):
+    """Get all the records of the user made between the two indicated dates, together with the last record made before
+    the lower limit (if any in the look back days), in a single query and streaming them in constant memory.
+
+    Note: The previous record gives the state of the user when the time range starts (e.g. working since yesterday).
+
+    Args:
+        user_id (str): User identifier to get the data.
+        datetime_from (str): Lower datetime limit.
+        datetime_to (str): Upper datetime limit.
+        look_back_days (int): Maximum number of days before the lower limit where the previous record is searched.
+
+    Yields:
+        Clock: Clock data ordered by date_time.
+    """
     from clockzy.lib.db.db_schema import CLOCK_TABLE
-    from clockzy.lib.models.clock import Clock
 
-    query = f"SELECT * FROM {CLOCK_TABLE} WHERE user_id='{user_id}' AND date_time between '{datetime_from}' and " \
-            f"'{datetime_to}'"
-    clock_data = run_query(query)
+    # The range is extended down to the last clock before the lower limit, so both use the (user_id, date_time) index
+    query = f"SELECT id, user_id, action, date_time FROM {CLOCK_TABLE} WHERE user_id=%s AND date_time >= " \
+            f"COALESCE((SELECT MAX(date_time) FROM {CLOCK_TABLE} WHERE user_id=%s AND date_time >= %s AND " \
+            'date_time < %s), %s) AND date_time <= %s ORDER BY date_time, id'
+    look_back_datetime = subtract_days_to_datetime(datetime_from, look_back_days)
+    query_parameters = (user_id, user_id, look_back_datetime, datetime_from, datetime_from, datetime_to)
 
-    if len(clock_data) == 0:
-        return []
+    for clock_item in stream_query(query, query_parameters):
+        yield build_clock_object(clock_item)
+
+
+def iter_clock_data_from_users_with_previous_clock(user_ids, datetime_from, datetime_to, look_back_days=31):
+    """Get the records of several users made between the two indicated dates, together with the last record of each
+    user made before the lower limit (if any in the look back days), in a single query and streaming them in constant
+    memory.
+
+    Args:
+        user_ids (list(str)): User identifiers to get the data.
+        datetime_from (str): Lower datetime limit.
+        datetime_to (str): Upper datetime limit.
+        look_back_days (int): Maximum number of days before the lower limit where the previous record is searched.
+
+    Yields:
+        tuple: Clock rows (user_id, action, date_time) ordered by user_id and date_time.
+    """
+    from clockzy.lib.db.db_schema import CLOCK_TABLE
+
+    if len(user_ids) == 0:
+        return
+
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    query = f"SELECT user_id, action, date_time FROM {CLOCK_TABLE} AS user_clock WHERE user_id IN ({placeholders}) " \
+            f"AND date_time >= COALESCE((SELECT MAX(date_time) FROM {CLOCK_TABLE} WHERE user_id=user_clock.user_id " \
+            'AND date_time >= %s AND date_time < %s), %s) AND date_time <= %s ORDER BY user_id, date_time, id'
+    look_back_datetime = subtract_days_to_datetime(datetime_from, look_back_days)
+
+    yield from stream_query(query, (*user_ids, look_back_datetime, datetime_from, datetime_from, datetime_to))
+
+
+def get_daily_worked_time_data(user_id, day_from, day_to, look_back_days=31):
+    """Get the daily worked time rollups of the user between the two indicated days, together with the last rollup
+    before the lower limit (if any in the look back days).
+
+    Note: The previous rollup gives the state of the user when the time range starts (e.g. working since yesterday).
+          Each row also has the worked time version of the user (see get_worked_time_version), read in the same query
+          so that it matches the rollups.
+
+    Args:
+        user_id (str): User identifier to get the data.
+        day_from (str): Lower day limit in format %Y-%m-%d.
+        day_to (str): Upper day limit in format %Y-%m-%d.
+        look_back_days (int): Maximum number of days before the lower limit where the previous rollup is searched.
+
+    Returns:
+        list(tuple): Rollups (day, seconds, open_state, version) ordered by day.
+    """
+    from clockzy.lib.db.db_schema import DAILY_WORKED_TIME_TABLE, WORKED_TIME_VERSION_TABLE
+
+    query = f"SELECT day, seconds, open_state, (SELECT version FROM {WORKED_TIME_VERSION_TABLE} WHERE user_id=%s) " \
+            f"FROM {DAILY_WORKED_TIME_TABLE} WHERE user_id=%s AND day >= COALESCE((SELECT MAX(day) FROM " \
+            f"{DAILY_WORKED_TIME_TABLE} WHERE user_id=%s AND day >= %s AND day < %s), %s) AND day <= %s ORDER BY day"
+    look_back_day = subtract_days_to_datetime(f"{day_from} 00:00:00", look_back_days).split(' ')[0]
+
+    return run_query(query, (user_id, user_id, user_id, look_back_day, day_from, day_from, day_to))
+
+
+def get_worked_time_version(user_id):
+    """Get the current version of the user worked time rollups. It changes every time the rollups are updated.
+
+    Args:
+        user_id (str): User identifier to get the data.
+
+    Returns:
+        int: Worked time version, or None if the user does not have it (e.g. after a rollup rebuild).
+    """
+    from clockzy.lib.db.db_schema import WORKED_TIME_VERSION_TABLE
+
+    version_data = run_query(f"SELECT version FROM {WORKED_TIME_VERSION_TABLE} WHERE user_id=%s", (user_id,))
 
-    clock_objects = []
+    return version_data[0][0] if len(version_data) > 0 else None
 
-    for clock_item in clock_data:
-        clock = Clock(clock_item[1], clock_item[2], clock_item[3])
-        clock.id = clock_item[0]
-        clock_objects.append(clock)
 
-    return clock_objects
+def iter_clock_data_from_user(user_id, newest_first=False):
+    """Get all the clocking data of the user, streaming it in constant memory.
+
+    Args:
+        user_id (str): User identifier to get the data.
+        newest_first (boolean): True for getting the most recent records first, False otherwise.
+
+    Yields:
+        Clock: Clock data ordered by identifier.
+    """
+    from clockzy.lib.db.db_schema import CLOCK_TABLE
+
+    query = Query(CLOCK_TABLE).where('user_id', user_id).order_by('id', descending=newest_first)
+
+    for clock_item in stream_query(*query.build()):
+        yield build_clock_object(clock_item)
 
 
 def get_filtered_clock_data(user_id, search_filter=None):
@@ -265,28 +583,33 @@ def get_filtered_clock_data(user_id, search_filter=None):
         search_filter (str): Search filter for LIKE sql expression.
 
     Returns:
-        List(Clock): Clock data list.
-        None: If the user does not have any clocking data betweeen the specified range time.
+        List(Clock): Clock data list (empty if the user does not have any clocking data matching the filter).
     """
-    from clockzy.lib.db.db_schema import CLOCK_TABLE
-    from clockzy.lib.models.clock import Clock
+    return list(iter_filtered_clock_data(user_id, search_filter))
 
-    if search_filter == '%' or search_filter == '%%':
-        query = f"SELECT * FROM {CLOCK_TABLE} WHERE user_id='{user_id}'"
-    else:
-        query = f"SELECT * FROM {CLOCK_TABLE} WHERE user_id='{user_id}' AND (date_time LIKE '{search_filter}' " \
-                f"OR action LIKE'{search_filter}')"
 
-    clock_data = run_query(query)
+def iter_filtered_clock_data(user_id, search_filter=None, newest_first=False):
+    """Get the clocking data from a specific user appliying a custom filter, streaming it in constant memory.
 
-    if len(clock_data) == 0:
-        return []
+    Args:
+        user_id (str): User identifier to get the data.
+        search_filter (str): Search filter for LIKE sql expression.
+        newest_first (boolean): True for getting the most recent records first, False otherwise.
 
-    clock_objects = []
+    Yields:
+        Clock: Clock data ordered by identifier.
+    """
+    from clockzy.lib.db.db_schema import CLOCK_TABLE
 
-    for clock_item in clock_data:
-        clock = Clock(clock_item[1], clock_item[2], clock_item[3])
-        clock.id = clock_item[0]
-        clock_objects.append(clock)
+    order = 'desc' if newest_first else 'asc'
+
+    if search_filter == '%' or search_filter == '%%':
+        query = f"SELECT * FROM {CLOCK_TABLE} WHERE user_id=%s ORDER BY id {order}"
+        query_parameters = (user_id,)
+    else:
+        query = f"SELECT * FROM {CLOCK_TABLE} WHERE user_id=%s AND (date_time LIKE %s OR action LIKE %s) " \
+                f"ORDER BY id {order}"
+        query_parameters = (user_id, search_filter, search_filter)
 
-    return clock_objects
+    for clock_item in stream_query(query, query_parameters):
+        yield build_clock_object(clock_item)
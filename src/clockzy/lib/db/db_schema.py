@@ -8,6 +8,9 @@ COMMANDS_HISTORY_TABLE = 'command_history'
 CONFIG_TABLE = 'config'
 ALIAS_TABLE = 'alias'
 TEMPORARY_CREDENTIALS_TABLE = 'temporary_credentials'
+SCHEMA_VERSION_TABLE = 'schema_version'
+DAILY_WORKED_TIME_TABLE = 'daily_worked_time'
+WORKED_TIME_VERSION_TABLE = 'worked_time_version'
 
 USER_TABLE_SCHEMA = """ \
     CREATE TABLE IF NOT EXISTS user (
@@ -73,3 +76,62 @@ TEMPORARY_CREDENTIALS_TABLE_SCHEMA = """\
        FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
     )Engine=InnoDB;
 """
+
+SCHEMA_VERSION_TABLE_SCHEMA = """\
+    CREATE TABLE IF NOT EXISTS schema_version (
+       version INT NOT NULL,
+       description VARCHAR(200) NOT NULL,
+       applied_date_time DATETIME NOT NULL,
+       PRIMARY KEY (version)
+    )Engine=InnoDB;
+"""
+
+# Worked time of each user and day with clocks, kept up to date by the clock model. open_state is True if the user
+# was still working when the day ended (the following days without clocks are fully worked).
+DAILY_WORKED_TIME_TABLE_SCHEMA = """\
+    CREATE TABLE IF NOT EXISTS daily_worked_time (
+       user_id VARCHAR(50) NOT NULL,
+       day DATE NOT NULL,
+       seconds INT NOT NULL,
+       open_state BOOLEAN NOT NULL,
+       PRIMARY KEY (user_id, day),
+       FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
+    )Engine=InnoDB;
+"""
+
+# Version of the worked time rollups of each user, replaced by a random value every time they are updated, so that the
+# processes that cache them can check that they have not been changed by another process. The users without version
+# (e.g. after a rollup rebuild) are not cached.
+WORKED_TIME_VERSION_TABLE_SCHEMA = """\
+    CREATE TABLE IF NOT EXISTS worked_time_version (
+       user_id VARCHAR(50) NOT NULL,
+       version BIGINT NOT NULL,
+       PRIMARY KEY (user_id),
+       FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
+    )Engine=InnoDB;
+"""
+
+# Secondary indexes
+CLOCK_USER_DATE_TIME_INDEX = 'CREATE INDEX clock_user_id_date_time ON clock (user_id, date_time);'
+COMMANDS_HISTORY_USER_DATE_TIME_INDEX = 'CREATE INDEX command_history_user_id_date_time ON command_history ' \
+                                        '(user_id, date_time);'
+ALIAS_UNIQUE_INDEX = 'CREATE UNIQUE INDEX alias_alias ON alias (alias);'
+USER_NAME_INDEX = 'CREATE INDEX user_user_name ON user (user_name);'
+
+# Keep only the first registration of each alias (needed before adding the alias unique index)
+DELETE_DUPLICATED_ALIASES = 'DELETE FROM alias WHERE id NOT IN (SELECT id FROM (SELECT MIN(id) AS id FROM alias ' \
+                            'GROUP BY alias) AS first_alias);'
+CONFIG_USER_ID_UNIQUE_INDEX = 'CREATE UNIQUE INDEX config_user_id ON config (user_id);'
+
+# Keep only one config row per user (needed before adding the config unique index). The config table has no
+# primary key, so the duplicated rows are moved through a table. Every step can be run again if the migration is
+# interrupted: the saved rows are kept (INSERT IGNORE) and the users that have them are replaced again.
+DELETE_DUPLICATED_CONFIGS = [
+    'CREATE TABLE IF NOT EXISTS config_deduplication (user_id VARCHAR(50) NOT NULL, intratime_integration BOOLEAN '
+    'NOT NULL, time_zone VARCHAR(50), PRIMARY KEY (user_id))Engine=InnoDB;',
+    'INSERT IGNORE INTO config_deduplication SELECT user_id, MAX(intratime_integration), MAX(time_zone) FROM config '
+    'WHERE user_id IS NOT NULL GROUP BY user_id HAVING COUNT(*) > 1;',
+    'DELETE FROM config WHERE user_id IN (SELECT user_id FROM config_deduplication);',
+    'INSERT INTO config SELECT user_id, intratime_integration, time_zone FROM config_deduplication;',
+    'DROP TABLE IF EXISTS config_deduplication;'
+]
@@ -0,0 +1,83 @@
+"""
+Request-scoped identity map, so that the same entity (user, config, last clock...) is loaded from the database only once
+in each request.
+
+The map lives while the request in progress in the current thread (see start_request and end_request), and the models
+invalidate the entries of the rows they write. Outside a request, or inside a transaction (whose reads must see the
+locked and uncommitted state), the map is not used and every lookup runs its query.
+"""
+import copy
+import threading
+
+from clockzy.lib.db.database import in_transaction
+
+
+# Loaded entities of the request in progress in the current thread
+_request_data = threading.local()
+
+# Value stored for the entities that do not exist in the database
+_MISSING = object()
+
+
+def start_request():
+    """Start an empty identity map for the request in progress in the current thread."""
+    _request_data.entities = {}
+
+
+def end_request():
+    """Discard the identity map of the request in progress in the current thread."""
+    _request_data.entities = None
+
+
+def is_enabled():
+    """Check if the identity map can be used in the current thread.
+
+    Returns:
+        boolean: True if there is a request in progress and no transaction in progress, False otherwise.
+    """
+    return getattr(_request_data, 'entities', None) is not None and not in_transaction()
+
+
+def get(entity, key, loader):
+    """Get an entity from the identity map, loading it if it has not been loaded yet in the request.
+
+    Note: A copy of the entity is returned, so that the changes made by the caller are not seen by the next lookups
+          until they are saved in the database.
+
+    Args:
+        entity (str): Entity type, e.g. 'user'.
+        key (object): Entity identifier, e.g. the user id.
+        loader (function): Function without arguments that loads the entity from the database. It returns None if the
+                           entity does not exist.
+
+    Returns:
+        object: Entity object, or None if it does not exist.
+    """
+    if not is_enabled():
+        return loader()
+
+    entities = _request_data.entities
+
+    if (entity, key) not in entities:
+        loaded_object = loader()
+        entities[(entity, key)] = _MISSING if loaded_object is None else copy.copy(loaded_object)
+
+    cached_object = entities[(entity, key)]
+
+    return None if cached_object is _MISSING else copy.copy(cached_object)
+
+
+def invalidate(entity, key=None):
+    """Remove an entity from the identity map, so that the next lookup loads it again from the database.
+
+    Args:
+        entity (str): Entity type, e.g. 'user'.
+        key (object): Entity identifier. If None, all the entities of that type are removed.
+    """
+    entities = getattr(_request_data, 'entities', None)
+
+    if entities is None:
+        return
+
+    for entity_key in [item for item in entities if item[0] == entity and (key is None or item[1] == key)]:
+        del entities[entity_key]
@@ -0,0 +1,161 @@
+"""
+Database queries instrumentation: wall time, rows, normalized SQL fingerprint and calling endpoint of each query.
+
+It is enabled with settings.DB_INSTRUMENTATION. The queries slower than settings.DB_SLOW_QUERY_THRESHOLD are logged
+in the clockzy.slow_queries logger, and the query counters of the request in progress are kept so that the services
+can log them when the request ends (see start_request and end_request).
+"""
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from clockzy.config.settings import DB_INSTRUMENTATION, DB_SLOW_QUERY_THRESHOLD, DB_STATEMENT_CACHE_SIZE
+from clockzy.lib.messages import logger_messages as lgm
+
+
+slow_query_logger = logging.getLogger('clockzy.slow_queries')
+
+# Query counters of the request in progress in the current thread
+_request_data = threading.local()
+
+FINGERPRINT_REPLACEMENTS = [
+    (re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\""), '?'),  # String literals
+    (re.compile(r'\b\d+(\.\d+)?\b'), '?'),  # Numbers
+    (re.compile(r'%s'), '?'),  # Placeholders
+    (re.compile(r'\(\s*\?(\s*,\s*\?)*\s*\)'), '(?+)'),  # Lists of values, whatever their length is
+    (re.compile(r'\s+'), ' ')
+]
+
+
+@lru_cache(maxsize=DB_STATEMENT_CACHE_SIZE)
+def fingerprint_query(query):
+    """Normalize a query, so that all the executions of the same statement have the same fingerprint.
+
+    e.g: "SELECT * FROM clock WHERE id IN (%s, %s) LIMIT 1" --> "SELECT * FROM clock WHERE id IN (?+) LIMIT ?"
+
+    Args:
+        query (str): Query string.
+
+    Returns:
+        str: Query fingerprint.
+    """
+    for regex, replacement in FINGERPRINT_REPLACEMENTS:
+        query = regex.sub(replacement, query)
+
+    return query.strip()
+
+
+def start_request(endpoint):
+    """Start counting the queries of a new request in the current thread.
+
+    Args:
+        endpoint (str): Endpoint that is handling the request.
+    """
+    _request_data.endpoint = endpoint
+    _request_data.stats = {'queries': 0, 'rows': 0, 'time': 0.0, 'slow_queries': 0, 'retries': 0}
+
+
+def get_request_endpoint():
+    """Get the endpoint of the request in progress in the current thread.
+
+    Returns:
+        str: Endpoint name, or None if there is no request in progress.
+    """
+    return getattr(_request_data, 'endpoint', None)
+
+
+def get_request_stats():
+    """Get the query counters of the request in progress in the current thread.
+
+    Returns:
+        dict: Number of queries, rows, total time (seconds), number of slow queries and number of retries. None if
+              there is no request in progress.
+    """
+    stats = getattr(_request_data, 'stats', None)
+
+    return dict(stats) if stats is not None else None
+
+
+def end_request():
+    """Stop counting the queries of the request in progress in the current thread.
+
+    Returns:
+        dict: Final query counters of the request (see get_request_stats).
+    """
+    stats = get_request_stats()
+    _request_data.endpoint = None
+    _request_data.stats = None
+
+    return stats
+
+
+def record_query(query, elapsed_time, rows):
+    """Add an executed query to the counters of the request in progress, and log it if it is slow.
+
+    Args:
+        query (str): Query string.
+        elapsed_time (float): Query wall time in seconds.
+        rows (int): Number of rows returned or affected by the query.
+    """
+    stats = getattr(_request_data, 'stats', None)
+    is_slow = elapsed_time >= DB_SLOW_QUERY_THRESHOLD
+
+    if stats is not None:
+        stats['queries'] += 1
+        stats['rows'] += max(rows, 0)
+        stats['time'] += elapsed_time
+        stats['slow_queries'] += int(is_slow)
+
+    if is_slow:
+        slow_query_logger.warning(lgm.slow_query(get_request_endpoint(), elapsed_time, rows, fingerprint_query(query)))
+
+
+def consume_retry(budget):
+    """Count a query retry in the request in progress, if the request has not spent its retry budget.
+
+    Note: The retries made outside a request are not limited by any budget.
+
+    Args:
+        budget (int): Maximum number of retries of the request.
+
+    Returns:
+        boolean: True if the retry can be made, False if the retry budget has been spent.
+    """
+    stats = getattr(_request_data, 'stats', None)
+
+    if stats is None:
+        return True
+
+    if stats['retries'] >= budget:
+        return False
+
+    stats['retries'] += 1
+
+    return True
+
+
+@contextmanager
+def measure_query(query):
+    """Measure the query executed in the block, if the instrumentation is enabled.
+
+    Args:
+        query (str): Query string.
+
+    Yields:
+        dict: Measurement data. The block must set its 'rows' key with the number of rows returned or affected.
+    """
+    measurement = {'rows': 0}
+
+    if not DB_INSTRUMENTATION:
+        yield measurement
+        return
+
+    start_time = time.perf_counter()
+
+    try:
+        yield measurement
+    finally:
+        record_query(query, time.perf_counter() - start_time, measurement['rows'])
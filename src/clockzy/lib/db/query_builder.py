@@ -0,0 +1,228 @@
+"""
+Module to build parameterized SELECT queries.
+"""
+import re
+
+
+# Table and column names are written in the query, so only plain identifiers are allowed
+IDENTIFIER_REGEX = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+COMPARISON_OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'LIKE')
+
+
+def validate_identifier(identifier):
+    """Check that the table or column name can be safely written in a query.
+
+    Args:
+        identifier (str): Table or column name.
+
+    Returns:
+        str: The same identifier.
+
+    Raises:
+        ValueError: If the identifier is not a plain table or column name.
+    """
+    if not isinstance(identifier, str) or not IDENTIFIER_REGEX.match(identifier):
+        raise ValueError(f"{identifier} is not a valid table or column name")
+
+    return identifier
+
+
+class Query:
+    """Parameterized SELECT query builder. All the methods, except the build ones, return the query object itself so
+    that they can be chained.
+
+    e.g: Query('clock').select('id', 'action').where('user_id', user_id).order_by('id', descending=True).limit(1)
+
+    Args:
+        table_name (str): Table where to make the search.
+
+    Attributes:
+        table_name (str): Table where to make the search.
+        columns (list(str)): Columns to get (all of them if empty).
+        conditions (list(str)): WHERE conditions, joined with AND.
+        parameters (list): Values for the conditions placeholders.
+        order (list(str)): ORDER BY expressions.
+        max_rows (int): Maximum number of rows to get (all of them if None).
+        lock_rows (boolean): True for locking the read rows until the end of the transaction, False otherwise.
+    """
+    def __init__(self, table_name):
+        self.table_name = validate_identifier(table_name)
+        self.columns = []
+        self.conditions = []
+        self.parameters = []
+        self.order = []
+        self.max_rows = None
+        self.lock_rows = False
+
+    def __str__(self):
+        """Define how the class object will be displayed."""
+        query, parameters = self.build()
+
+        return f"{query} {parameters}"
+
+    def select(self, *columns):
+        """Get only the specified columns.
+
+        Args:
+            columns (str): Column names.
+
+        Returns:
+            Query: Query object.
+        """
+        self.columns.extend(validate_identifier(column) for column in columns)
+
+        return self
+
+    def where(self, column, value, operator='='):
+        """Add a column comparison condition.
+
+        Args:
+            column (str): Column name.
+            value (any): Value to compare with.
+            operator (str): Comparison operator (=, !=, <, <=, >, >=, LIKE).
+
+        Returns:
+            Query: Query object.
+
+        Raises:
+            ValueError: If the operator is not allowed.
+        """
+        if operator.upper() not in COMPARISON_OPERATORS:
+            raise ValueError(f"{operator} is not an allowed operator. Allowed ones: {COMPARISON_OPERATORS}")
+
+        self.conditions.append(f"{validate_identifier(column)} {operator.upper()} %s")
+        self.parameters.append(value)
+
+        return self
+
+    def where_equal(self, parameters):
+        """Add an equality condition for each column.
+
+        Args:
+            parameters (dict): Dictionary that contains the columns values ({'colum_name': 'value', ...})
+
+        Returns:
+            Query: Query object.
+        """
+        for column, value in parameters.items():
+            self.where(column, value)
+
+        return self
+
+    def where_in(self, column, values):
+        """Add a condition to match the column with any of the values.
+
+        Args:
+            column (str): Column name.
+            values (iterable): Values to match with.
+
+        Returns:
+            Query: Query object.
+        """
+        values = list(values)
+
+        if len(values) == 0:
+            # An empty IN list is not valid SQL, and it can not match any row
+            self.conditions.append('1=0')
+        else:
+            self.conditions.append(f"{validate_identifier(column)} IN ({', '.join(['%s'] * len(values))})")
+            self.parameters.extend(values)
+
+        return self
+
+    def where_between(self, column, lower_value, upper_value):
+        """Add a condition to match the column values between the limits (both included).
+
+        Args:
+            column (str): Column name.
+            lower_value (any): Lower limit.
+            upper_value (any): Upper limit.
+
+        Returns:
+            Query: Query object.
+        """
+        self.conditions.append(f"{validate_identifier(column)} BETWEEN %s AND %s")
+        self.parameters.extend([lower_value, upper_value])
+
+        return self
+
+    def order_by(self, column, descending=False):
+        """Sort the results by the column. It can be called several times to sort by several columns.
+
+        Args:
+            column (str): Column name.
+            descending (boolean): True for descending order, False for ascending order.
+
+        Returns:
+            Query: Query object.
+        """
+        self.order.append(f"{validate_identifier(column)} {'DESC' if descending else 'ASC'}")
+
+        return self
+
+    def limit(self, max_rows):
+        """Get only the first rows.
+
+        Args:
+            max_rows (int): Maximum number of rows to get.
+
+        Returns:
+            Query: Query object.
+        """
+        self.max_rows = int(max_rows)
+
+        return self
+
+    def for_update(self):
+        """Lock the read rows until the end of the transaction in progress (locking read), reading their last committed
+        version.
+
+        Returns:
+            Query: Query object.
+        """
+        self.lock_rows = True
+
+        return self
+
+    def _build_from_clause(self):
+        """Build the query part from the FROM clause onwards.
+
+        Returns:
+            str: FROM, WHERE, ORDER BY and LIMIT clauses.
+        """
+        clause = f"FROM {self.table_name}"
+
+        if len(self.conditions) > 0:
+            clause += f" WHERE {' AND '.join(self.conditions)}"
+
+        if len(self.order) > 0:
+            clause += f" ORDER BY {', '.join(self.order)}"
+
+        if self.max_rows is not None:
+            clause += f" LIMIT {self.max_rows}"
+
+        return clause
+
+    def build(self):
+        """Build the SELECT query.
+
+        Returns:
+            tuple(str, tuple): Query string, and the values for its placeholders.
+        """
+        columns = ', '.join(self.columns) if len(self.columns) > 0 else '*'
+        locking_clause = ' FOR UPDATE' if self.lock_rows else ''
+
+        return f"SELECT {columns} {self._build_from_clause()}{locking_clause}", tuple(self.parameters)
+
+    def build_exists(self):
+        """Build a query to check if any row matches, getting a single row with 1 or 0. The database stops at the first
+        matching row.
+
+        Returns:
+            tuple(str, tuple): Query string, and the values for its placeholders.
+        """
+        subquery = Query(self.table_name)
+        subquery.conditions = self.conditions
+        subquery.max_rows = 1
+
+        return f"SELECT EXISTS(SELECT 1 {subquery._build_from_clause()})", tuple(self.parameters)
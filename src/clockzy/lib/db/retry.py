@@ -0,0 +1,158 @@
+"""
+Retry policy for the transient database errors (lost connections, deadlocks and lock wait timeouts).
+
+A query is retried with a jittered exponential backoff, up to DB_RETRY_MAX_ATTEMPTS times, and only while the request
+in progress has not spent its retry budget (DB_RETRY_BUDGET), so that a database failover does not multiply the load
+with retry storms.
+"""
+import logging
+import random
+import time
+
+import pymysql
+
+from clockzy.config.settings import DB_RETRY_MAX_ATTEMPTS, DB_RETRY_BASE_DELAY, DB_RETRY_MAX_DELAY, DB_RETRY_BUDGET
+from clockzy.lib.db import instrumentation
+from clockzy.lib.messages import logger_messages as lgm
+
+
+db_logger = logging.getLogger('clockzy.db')
+
+CONNECTION_ERROR_CODES = (2003,)  # Can't connect to the server, nothing has been sent
+CONNECTION_LOST_ERROR_CODES = (2006, 2013)  # Server has gone away, lost connection during query
+STATEMENT_ROLLBACK_ERROR_CODES = (1205, 1213)  # Lock wait timeout, deadlock: the server rolls back the statement
+TRANSIENT_ERROR_CODES = CONNECTION_ERROR_CODES + CONNECTION_LOST_ERROR_CODES + STATEMENT_ROLLBACK_ERROR_CODES
+
+
+class CommitError(pymysql.err.OperationalError):
+    """The COMMIT of a transaction has failed. If the connection was lost, the transaction may have been committed."""
+    pass
+
+
+def get_error_code(error):
+    """Get the MySQL error code of a database exception.
+
+    Args:
+        error (Exception): Database exception.
+
+    Returns:
+        int: MySQL error code, or None if the exception does not have one.
+    """
+    if isinstance(error, pymysql.MySQLError) and len(error.args) > 0 and isinstance(error.args[0], int):
+        return error.args[0]
+
+    return None
+
+
+def is_transient_error(error):
+    """Check if the error is transient, so the operation may succeed if it is run again.
+
+    Args:
+        error (Exception): Database exception.
+
+    Returns:
+        boolean: True if it is a transient error, False otherwise.
+    """
+    return get_error_code(error) in TRANSIENT_ERROR_CODES
+
+
+def is_statement_rollback_error(error):
+    """Check if the server has rolled back the failed statement, so it can be run again without side effects.
+
+    Args:
+        error (Exception): Database exception.
+
+    Returns:
+        boolean: True if the statement has been rolled back, False otherwise.
+    """
+    return get_error_code(error) in STATEMENT_ROLLBACK_ERROR_CODES
+
+
+def is_replayable_statement_error(error, is_select):
+    """Check if a single statement that has failed can be run again without side effects.
+
+    Note: Reads can always be run again. Writes only if they have not been applied: the connection could not be
+          established, or the server has rolled back the statement. If the connection is lost while running a write,
+          it is unknown whether it has been applied or not.
+
+    Args:
+        error (Exception): Database exception.
+        is_select (boolean): True if the statement is a read, False otherwise.
+
+    Returns:
+        boolean: True if the statement can be run again, False otherwise.
+    """
+    return is_select or get_error_code(error) in CONNECTION_ERROR_CODES + STATEMENT_ROLLBACK_ERROR_CODES
+
+
+def is_ambiguous_commit_error(error):
+    """Check if it is unknown whether the failed transaction has been committed or not.
+
+    Args:
+        error (Exception): Database exception.
+
+    Returns:
+        boolean: True if the connection was lost during the COMMIT, False otherwise.
+    """
+    return isinstance(error, CommitError) and get_error_code(error) in CONNECTION_LOST_ERROR_CODES
+
+
+def get_backoff_delay(attempt):
+    """Get the time to wait before a retry (exponential backoff with full jitter).
+
+    Args:
+        attempt (int): Retry number, starting at 1.
+
+    Returns:
+        float: Seconds to wait.
+    """
+    return random.uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def get_retry_delay(error, attempt):
+    """Check if the failed operation can be retried and, if so, get the backoff time to wait before the retry.
+
+    Note: Call it only when the operation can be safely run again (e.g. reads, or statements that have not been
+          applied).
+
+    Args:
+        error (Exception): Database exception raised by the operation.
+        attempt (int): Number of the retry to make, starting at 1.
+
+    Returns:
+        float: Seconds to wait before the retry, or None if the error must be raised.
+    """
+    if not is_transient_error(error) or attempt > DB_RETRY_MAX_ATTEMPTS:
+        return None
+
+    if not instrumentation.consume_retry(DB_RETRY_BUDGET):
+        db_logger.warning(lgm.retry_budget_exhausted(instrumentation.get_request_endpoint(), error))
+        return None
+
+    delay = get_backoff_delay(attempt)
+    db_logger.warning(lgm.retrying_query(attempt, delay, error))
+
+    return delay
+
+
+def retry_after_error(error, attempt):
+    """Check if the failed operation can be retried and, if so, wait the backoff time before the retry.
+
+    Note: Call it only when the operation can be safely run again (e.g. reads, or statements that have not been
+          applied).
+
+    Args:
+        error (Exception): Database exception raised by the operation.
+        attempt (int): Number of the retry to make, starting at 1.
+
+    Returns:
+        boolean: True if the operation must be retried, False if the error must be raised.
+    """
+    delay = get_retry_delay(error, attempt)
+
+    if delay is None:
+        return False
+
+    time.sleep(delay)
+
+    return True
@@ -47,6 +47,10 @@ def error_clockzy_clocking(user, id, action):
     return f"Error when the user {user}({id}) is trying to clock the {action}' action in the clockzy local DB"
 
 
+def error_clocking_transaction(user, id, action, error):
+    return f"The clocking transaction of the {action} action from the user {user}({id}) has failed. Reason {error}"
+
+
 def success_clockzy_clocking(user, id, action):
     return f"The user {user}({id}) has successfully clocked the {action} action"
 
@@ -90,6 +94,29 @@ def success_updating_user(user, id):
 def error_getting_user_profile_info(user, id):
     return f"Error when getting the user profile info for the user {user}({id})"
 
+
+# DATABASE
+
+def error_executing_query(query, error):
+    return f"Error when executing query: {query}. Reason {error}"
+
+
+def slow_query(endpoint, elapsed_time, rows, fingerprint):
+    return f"Slow query in {endpoint}: {elapsed_time:.3f}s, {rows} rows --> {fingerprint}"
+
+
+def request_database_stats(endpoint, stats):
+    return f"Database usage in {endpoint}: {stats['queries']} queries, {stats['rows']} rows, {stats['time']:.3f}s " \
+           f"({stats['slow_queries']} slow queries, {stats['retries']} retries)"
+
+
+def retrying_query(attempt, delay, error):
+    return f"Transient database error ({error}). Retry {attempt} in {delay:.3f}s"
+
+
+def retry_budget_exhausted(endpoint, error):
+    return f"Transient database error ({error}) not retried, {endpoint} has spent its retry budget"
+
 # CLOCKZY WEB APP
 
 
@@ -1,13 +1,14 @@
 import logging
 from clockzy.lib.slack import slack_block_builder as bb
 from clockzy.lib.slack import slack_core as slack
-from clockzy.lib.db.database_interface import run_query, get_config_object, get_clock_data_in_time_range, \
-                                              get_last_clock_from_user
+from clockzy.lib.db.database_interface import run_query, get_config_object
 from clockzy.lib.utils import time
 from clockzy.config.settings import WEB_APP_URL
-from clockzy.lib.clocking import calculate_worked_time
+from clockzy.lib.clocking import calculate_worked_time_per_day, get_worked_seconds_per_day, \
+                                 get_worked_seconds_per_month, get_num_average_days
 from clockzy.lib.db.db_schema import ALIAS_TABLE, USER_TABLE
 from clockzy.lib.clocking import IN_ACTION, PAUSE_ACTION, RETURN_ACTION, OUT_ACTION
+from clockzy.lib.clocking.user_state import get_user_state
 
 
 ERROR_IMAGE = 'https://raw.githubusercontent.com/jmv74211/tools/master/images/repository/clockzy/x.png'
@@ -20,6 +21,8 @@ TIMER_CLOCK = ':timer_clock:'
 MEGA = ':mega:'
 FLAG = ':triangular_flag_on_post:'
 CALENDAR = ':calendar:'
+MAX_DAILY_HISTORY_DAYS = 31  # Longer time histories show the worked time of each month instead of each day
+HISTORY_PERIODS_PER_BLOCK = 10  # Worked time periods of each history block, to avoid the character text block limit
 
 
 def build_success_message(message):
@@ -100,13 +103,16 @@ def build_worked_time_message(time_range, worked_time):
     """Build the slack message when a user request to know the worked time.
 
     Args:
-        time_range (str): Enum [today, week, month]
+        time_range (str): Enum [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
         worked_time (str): Worked time string.
 
     Returns:
         str: Slack message.
     """
-    time_string = 'this week' if time_range == time.WEEK else ('this month' if time_range == time.MONTH else time_range)
+    if time.DATE_RANGE_SEPARATOR in time_range:
+        time_string = f"from {time_range.replace(time.DATE_RANGE_SEPARATOR, ' to ')}"
+    else:
+        time_string = time_range if time_range == time.TODAY else f"this {time_range}"
 
     if time_range == time.TODAY:
         num_hours = int(worked_time.split('h')[0])
@@ -117,43 +123,38 @@ def build_worked_time_message(time_range, worked_time):
     return f"{HOURGLASS} Your working time {time_string} is *{worked_time}*"
 
 
-def build_time_history_message(user_id, time_range, timezone):
+def build_time_history_message(user_id, time_range, time_context):
     """Build the slack message when a user request to know the worked time history.
 
     Args:
         user_id (str): User identifier to calculate the worked time.
-        time_range (str): Enum [today, week, month]
-        timezone (str): User timezone.
+        time_range (str): Enum [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
+        time_context (TimeContext): Request time snapshot in the user timezone.
 
     Returns:
         str: Slack message.
     """
-    from_time = f"{time.get_current_date(timezone)} 00:00:00" if time_range == time.TODAY else \
-                (time.get_first_week_day() if time_range == time.WEEK else time.get_first_month_day())
+    lower_datetime = time_context.get_lower_time(time_range)
+    upper_datetime = time_context.get_upper_time(time_range)
     header = f"{time_range.upper()} HISTORY"
-    summary = f"{CALENDAR} From _*{from_time}*_ to _*{time.get_current_date_time(timezone)}*_\n"
+    summary = f"{CALENDAR} From _*{lower_datetime}*_ to _*{upper_datetime}*_\n"
 
-    lower_datetime = time.get_lower_time_from_time_range(time_range)
-    upper_datetime = time.get_current_date_time(timezone)
-    working_days = time.get_working_days(lower_datetime, upper_datetime, excluded=())
-    worked_time_output = ''
-    num_worked_days = 0
+    # Calculate the time worked for each day of the selected range
+    worked_days, total_worked_seconds = get_worked_seconds_per_day(user_id, lower_datetime, upper_datetime,
+                                                                   time_context=time_context)
+    num_worked_days = len([worked_seconds for worked_seconds in worked_days.values() if worked_seconds >= 60])
 
-    # Calculate the time worked for each day of the selected range and add it to the output
-    for worked_day in reversed(working_days):
-        init_datetime = worked_day
-        end_datetime = f"{worked_day.split(' ')[0]} 23:59:59"
-        worked_time = calculate_worked_time(user_id, lower_limit=init_datetime, upper_limit=end_datetime,
-                                            timezone=timezone)
-        if worked_time != '0h 0m':
-            num_worked_days += 1
-        worked_time_output += f"*• {worked_day.split(' ')[0]}*: {worked_time}\n"
+    # Add the time worked for each day (or each month in the long time ranges) to the output
+    worked_periods = worked_days if len(worked_days) <= MAX_DAILY_HISTORY_DAYS else \
+        get_worked_seconds_per_month(worked_days)
+    worked_time_output_list = [f"*• {worked_period}*: {time.get_time_hh_mm_from_seconds(worked_seconds)}\n"
+                               for worked_period, worked_seconds in reversed(worked_periods.items())]
 
-    # Calculate the average time
+    # Calculate the average time per working day (the holidays do not count, unless they have been worked)
     if num_worked_days > 0:
-        total_worked_time = calculate_worked_time(user_id, lower_limit=lower_datetime, upper_limit=upper_datetime,
-                                                  timezone=timezone)
-        average_seconds = int(time.get_num_seconds_from_hh_mm_time(total_worked_time) / num_worked_days)
+        total_worked_time = time.get_time_hh_mm_from_seconds(total_worked_seconds)
+        num_average_days, num_working_days = get_num_average_days(worked_days, lower_datetime, upper_datetime)
+        average_seconds = int(total_worked_seconds / max(num_average_days, 1))
         average_time = time.get_time_hh_mm_from_seconds(average_seconds)
         average_hours = int(average_time.split('h')[0])
         average_icon = GREEN_CIRCLE if average_hours >= 8 else \
@@ -165,60 +166,59 @@ def build_time_history_message(user_id, time_range, timezone):
             summary += f" {average_icon}\n"
 
         if time_range != time.TODAY:
-            summary += f"\n{FLAG} Worked days: *{num_worked_days}*\n"
+            summary += f"\n{FLAG} Worked days: *{num_worked_days}* of *{num_working_days}* working days\n"
             summary += f"{TIMER_CLOCK} Average time: *{average_time}* {average_icon}\n"
 
-    # Build the block messages
+    # Build the block messages. Create a new block message every few periods to avoid the character text block limit
     blocks = [
         bb.write_slack_header(header),
         bb.write_slack_divider(),
         bb.write_slack_markdown(summary),
-        bb.write_slack_divider(),
-        bb.write_slack_markdown(worked_time_output)
+        bb.write_slack_divider()
     ]
 
+    for index in range(0, len(worked_time_output_list), HISTORY_PERIODS_PER_BLOCK):
+        worked_time_output = ''.join(worked_time_output_list[index:index + HISTORY_PERIODS_PER_BLOCK])
+        blocks.append(bb.write_slack_markdown(worked_time_output))
+
     return blocks
 
 
-def build_clock_history_message(user_id, time_range, timezone):
+def build_clock_history_message(user_id, time_range, time_context):
     """Build the slack message when a user request to know its clock history.
 
     Args:
         user_id (str): User identifier to calculate the worked time.
         time_range (str): Enum [today, week, month]
-        timezone (str): Timezone.
+        time_context (TimeContext): Request time snapshot in the user timezone.
 
     Returns:
         str: Slack message.
     """
-    from_time = f"{time.get_current_date(timezone)} 00:00:00" if time_range == time.TODAY else \
-                (time.get_first_week_day() if time_range == time.WEEK else time.get_first_month_day())
+    lower_datetime = time_context.get_lower_time(time_range)
+    upper_datetime = time_context.get_upper_time(time_range)
     header = f"{time_range.upper()} HISTORY"
-    summary = f"{CALENDAR} From _*{from_time}*_ to _*{time.get_current_date_time(timezone)}*_\n"
+    summary = f"{CALENDAR} From _*{lower_datetime}*_ to _*{upper_datetime}*_\n"
 
-    lower_datetime = time.get_lower_time_from_time_range(time_range)
-    upper_datetime = time.get_current_date_time(timezone)
-    worked_time = calculate_worked_time(user_id, lower_limit=lower_datetime, upper_limit=upper_datetime,
-                                        timezone=timezone)
-    working_days = time.get_working_days(lower_datetime, upper_datetime, excluded=())
+    worked_days, total_worked_seconds = calculate_worked_time_per_day(user_id, lower_datetime, upper_datetime,
+                                                                      time_context=time_context)
+    worked_time = time.get_time_hh_mm_from_seconds(total_worked_seconds)
     num_worked_days = 0
     clock_history_output_list = []
     output_list_elements = 0
 
     # Build the block messages content. Create a new block message every 10 days to avoid the character text block limit
-    for index, worked_day in enumerate(reversed(working_days)):
-        init_datetime = worked_day
-        end_datetime = f"{worked_day.split(' ')[0]} 23:59:59"
-        clocking_data = get_clock_data_in_time_range(user_id, init_datetime, end_datetime)
+    for index, (worked_day, worked_day_data) in enumerate(reversed(worked_days.items())):
+        clocking_data = worked_day_data['clocks']
         clock_history_output = ''
         if len(clocking_data) > 0:
             num_worked_days += 1
-            clock_history_output += f"• *{worked_day.split(' ')[0]}*:\n"
+            clock_history_output += f"• *{worked_day}*:\n"
             for clock_item in clocking_data:
                 clock_time = clock_item.date_time.strftime('%H:%M:%S')
                 clock_history_output += f"{' ' * 6}• `{clock_item.action.upper()}`: _{clock_time}_\n"
         else:
-            clock_history_output += f"• *{worked_day.split(' ')[0]}*: {MEGA} No clocking data for this day\n"
+            clock_history_output += f"• *{worked_day}*: {MEGA} No clocking data for this day\n"
 
         # Add the message to the block item
         if len(clock_history_output_list) == 0:
@@ -229,9 +229,12 @@ def build_clock_history_message(user_id, time_range, timezone):
         else:
             clock_history_output_list[output_list_elements] += clock_history_output
 
-    # Calculate the average time
+    # Calculate the average time per working day (the holidays do not count, unless they have been worked)
     if num_worked_days > 0:
-        average_seconds = int(time.get_num_seconds_from_hh_mm_time(worked_time) / num_worked_days)
+        worked_seconds_per_day = {day: day_data['worked_seconds'] for day, day_data in worked_days.items()}
+        num_average_days, num_working_days = get_num_average_days(worked_seconds_per_day, lower_datetime,
+                                                                  upper_datetime)
+        average_seconds = int(total_worked_seconds / max(num_average_days, 1))
         average_time = time.get_time_hh_mm_from_seconds(average_seconds)
         average_hours = int(average_time.split('h')[0])
         average_icon = GREEN_CIRCLE if average_hours >= 8 else \
@@ -241,7 +244,7 @@ def build_clock_history_message(user_id, time_range, timezone):
         summary += f"{HOURGLASS} Total worked: *{worked_time}* {average_icon}\n"
 
         if time_range != time.TODAY:
-            summary += f"{FLAG} Worked days: *{num_worked_days}*\n"
+            summary += f"{FLAG} Worked days: *{num_worked_days}* of *{num_working_days}* working days\n"
             summary += f"{TIMER_CLOCK} Average time: *{average_time}* {average_icon}\n"
 
     # Build the block messages
@@ -303,9 +306,9 @@ def build_get_aliases_message():
 
     # Iterate over all users in alias data
     for user_id in data_ids:
-        user_name = run_query(f"SELECT user_name FROM {USER_TABLE} WHERE id='{user_id[0]}'")[0][0]
+        user_name = run_query(f"SELECT user_name FROM {USER_TABLE} WHERE id=%s", (user_id[0],))[0][0]
         message += f"• *{user_name}*: "
-        aliases = run_query(f"SELECT alias FROM {ALIAS_TABLE} WHERE user_id='{user_id[0]}'")
+        aliases = run_query(f"SELECT alias FROM {ALIAS_TABLE} WHERE user_id=%s", (user_id[0],))
         # Get all aliases from that user
         for alias in aliases:
             message += f"`{ alias[0]}`, "
@@ -329,14 +332,14 @@ def build_user_status_message(user_id, user_name):
     Returns:
         str: Slack message.
     """
-    last_clock = get_last_clock_from_user(user_id)
+    user_state = get_user_state(user_id)
 
-    if last_clock is None:
+    if user_state is None:
         return f"{MEGA} The user `{user_name}` does not have any clock data"
 
-    if last_clock.action.lower() == IN_ACTION or last_clock.action.lower() == RETURN_ACTION:
+    if user_state[0] == IN_ACTION or user_state[0] == RETURN_ACTION:
         return f"The user `{user_name}` is available {GREEN_CIRCLE}"
-    elif last_clock.action.lower() == PAUSE_ACTION:
+    elif user_state[0] == PAUSE_ACTION:
         return f" The user `{user_name}` is absent, but will return later {YELLOW_CIRCLE}"
     else:
         return f"The user `{user_name}` is not available {RED_CIRCLE}"
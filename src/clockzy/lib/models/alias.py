@@ -1,6 +1,8 @@
 from clockzy.lib.db.db_schema import ALIAS_TABLE
-from clockzy.lib.handlers.codes import ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
-from clockzy.lib.db.database_interface import run_query_getting_status, item_exists, get_last_insert_id
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.db.database import pin_to_primary
+from clockzy.lib.db.database_interface import run_query_getting_status, item_exists, run_query_getting_result, \
+                                              run_many_getting_status
 
 
 class Alias:
@@ -24,46 +26,64 @@ class Alias:
         """Define how the class object will be displayed."""
         return f"id: {self.id}, user_id: {self.user_id}, alias: {self.alias}"
 
+    @pin_to_primary()
     def save(self):
         """Save the alias information in the database.
 
         Returns:
             int: Operation status code.
         """
-        add_alias_query = f"INSERT INTO {ALIAS_TABLE} VALUES (null, '{self.user_id}', '{self.alias}');"
+        add_alias_query = f"INSERT INTO {ALIAS_TABLE} VALUES (null, %s, %s);"
 
         if self.id and item_exists({'id': self.id}, ALIAS_TABLE):
             return ITEM_ALREADY_EXISTS
 
-        query_status_code = run_query_getting_status(add_alias_query)
+        query_status_code, result = run_query_getting_result(add_alias_query, (self.user_id, self.alias))
 
-        self.id = get_last_insert_id(ALIAS_TABLE)
+        self.id = result.lastrowid if query_status_code == SUCCESS else None
 
         return query_status_code
 
+    @classmethod
+    def bulk_save(cls, aliases):
+        """Save several aliases in the database, using multi-row INSERT statements in a single transaction.
+
+        Note: Unlike save, the alias identifiers are not loaded into the objects.
+
+        Args:
+            aliases (iterable(Alias)): Alias objects to save.
+
+        Returns:
+            int: Operation status code.
+        """
+        add_aliases_query = f"INSERT INTO {ALIAS_TABLE} (user_id, alias) VALUES (%s, %s)"
+
+        return run_many_getting_status(add_aliases_query, ((alias.user_id, alias.alias) for alias in aliases))
+
+    @pin_to_primary()
     def delete(self):
         """Delete the alias data from the database.
 
         Returns:
             int: Operation status code.
         """
-        delete_alias_query = f"DELETE FROM {ALIAS_TABLE} WHERE id='{self.id}'"
+        delete_alias_query = f"DELETE FROM {ALIAS_TABLE} WHERE id=%s"
 
         if not item_exists({'id': self.id}, ALIAS_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(delete_alias_query)
+        return run_query_getting_status(delete_alias_query, (self.id,))
 
+    @pin_to_primary()
     def update(self):
         """Update the alias information from the database.
 
         Returns:
             int: Operation status code.
         """
-        update_alias_query = f"UPDATE {ALIAS_TABLE} SET user_id='{self.user_id}', " \
-                             f"alias='{self.alias}' WHERE id='{self.id}'"
+        update_alias_query = f"UPDATE {ALIAS_TABLE} SET user_id=%s, alias=%s WHERE id=%s"
 
         if not item_exists({'id': self.id}, ALIAS_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(update_alias_query)
+        return run_query_getting_status(update_alias_query, (self.user_id, self.alias, self.id))
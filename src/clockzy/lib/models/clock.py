@@ -1,7 +1,15 @@
+from functools import partial
+from pymysql import MySQLError
+
 from clockzy.lib.db.db_schema import CLOCK_TABLE
-from clockzy.lib.handlers.codes import ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
-from clockzy.lib.db.database_interface import run_query_getting_status, get_last_insert_id, item_exists
-from clockzy.lib.utils.time import get_current_date_time
+from clockzy.lib.handlers.codes import SUCCESS, OPERATION_ERROR, ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.db.database import pin_to_primary, transaction, in_transaction, on_commit
+from clockzy.lib.db import identity_map
+from clockzy.lib.db.database_interface import run_query_getting_status, run_query_getting_result, item_exists, \
+                                              run_many_getting_status, get_clock_object, lock_user
+from clockzy.lib.clocking import refresh_daily_worked_time, refresh_users_daily_worked_time
+from clockzy.lib.clocking.user_state import load_user_state, set_user_state, invalidate_user_state
+from clockzy.lib.utils.time import get_current_date_time, parse_date_time
 
 
 class Clock:
@@ -31,47 +39,187 @@ class Clock:
         return f"id: {self.id}, user_id: {self.user_id}, action: {self.action}, date_time: {self.date_time} " \
                f"local_date_time: {self.local_date_time}"
 
+    @pin_to_primary()
     def save(self):
-        """Save the clock information in the database.
+        """Save the clock information in the database, updating the worked time of its day.
 
         Returns:
             int: Operation status code..
         """
-        add_clock_query = f"INSERT INTO {CLOCK_TABLE} VALUES (null, '{self.user_id}', '{self.action}', " \
-                          f"'{self.date_time}', '{self.local_date_time}');"
+        add_clock_query = f"INSERT INTO {CLOCK_TABLE} VALUES (null, %s, %s, %s, %s);"
 
         if self.id and item_exists({'id': self.id}, CLOCK_TABLE):
             return ITEM_ALREADY_EXISTS
 
-        query_status_code = run_query_getting_status(add_clock_query)
-        self.id = get_last_insert_id(CLOCK_TABLE)
+        identity_map.invalidate('last_clock', self.user_id)
+
+        def add_clock():
+            query_status_code, result = run_query_getting_result(add_clock_query, (self.user_id, self.action,
+                                                                                   self.date_time,
+                                                                                   self.local_date_time))
+            self.id = result.lastrowid if query_status_code == SUCCESS else None
+
+            return query_status_code, [(self.user_id, self.date_time)]
+
+        return write_clocks(add_clock, [self.user_id], new_clock=self)
+
+    @classmethod
+    def bulk_save(cls, clocks):
+        """Save several clocks in the database, using multi-row INSERT statements in a single transaction, updating the
+        worked time of their days.
 
-        return query_status_code
+        Note: Unlike save, the clock identifiers are not loaded into the objects.
+
+        Args:
+            clocks (iterable(Clock)): Clock objects to save.
+
+        Returns:
+            int: Operation status code.
+        """
+        add_clocks_query = f"INSERT INTO {CLOCK_TABLE} (user_id, action, date_time, local_date_time) " \
+                           'VALUES (%s, %s, %s, %s)'
+        clocks = list(clocks)
+        clocks_data = ((clock.user_id, clock.action, clock.date_time, clock.local_date_time) for clock in clocks)
+        user_ids = {clock.user_id for clock in clocks}
 
+        for user_id in user_ids:
+            identity_map.invalidate('last_clock', user_id)
+
+        def add_clocks():
+            query_status_code = run_many_getting_status(add_clocks_query, clocks_data)
+
+            return query_status_code, [(clock.user_id, clock.date_time) for clock in clocks]
+
+        return write_clocks(add_clocks, user_ids)
+
+    @pin_to_primary()
     def delete(self):
-        """Delete the clock data from the database.
+        """Delete the clock data from the database, updating the worked time of its day.
 
         Returns:
             int: Operation status code..
         """
-        delete_clock_query = f"DELETE FROM {CLOCK_TABLE} WHERE id='{self.id}'"
+        delete_clock_query = f"DELETE FROM {CLOCK_TABLE} WHERE id=%s"
 
-        if not item_exists({'id': self.id}, CLOCK_TABLE):
+        # The clock could belong to any user (its user_id may have been changed)
+        identity_map.invalidate('last_clock')
+        stored_clock = get_clock_object(self.id)
+
+        if stored_clock is None:
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(delete_clock_query)
+        user_ids = {stored_clock.user_id, self.user_id}
+
+        def delete_clock():
+            # Read it again with the users locked, in case it has been changed meanwhile
+            stored_clock = get_clock_object(self.id)
+
+            if stored_clock is None:
+                return ITEM_NOT_EXISTS, []
+
+            if stored_clock.user_id not in user_ids:
+                lock_user(stored_clock.user_id)
 
+            query_status_code = run_query_getting_status(delete_clock_query, (self.id,))
+
+            return query_status_code, [(stored_clock.user_id, stored_clock.date_time)]
+
+        return write_clocks(delete_clock, user_ids)
+
+    @pin_to_primary()
     def update(self):
-        """Update the clock information from the database.
+        """Update the clock information from the database, updating the worked time of its previous and new days.
 
         Returns:
             int: Operation status code..
         """
-        update_clock_query = f"UPDATE {CLOCK_TABLE} SET id='{self.id}', user_id='{self.user_id}', " \
-                             f"action='{self.action}', date_time='{self.date_time}', " \
-                             f"local_date_time='{self.local_date_time}' WHERE id='{self.id}'"
+        update_clock_query = f"UPDATE {CLOCK_TABLE} SET id=%s, user_id=%s, action=%s, date_time=%s, " \
+                             'local_date_time=%s WHERE id=%s'
+
+        # The clock could belong to any user (its user_id may have been changed)
+        identity_map.invalidate('last_clock')
+        stored_clock = get_clock_object(self.id)
 
-        if not item_exists({'id': self.id}, CLOCK_TABLE):
+        if stored_clock is None:
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(update_clock_query)
+        # The rollups of the previous and the new user are updated, so both users are locked
+        user_ids = {stored_clock.user_id, self.user_id}
+
+        def update_clock():
+            # Read it again with the users locked, in case it has been changed meanwhile
+            stored_clock = get_clock_object(self.id)
+
+            if stored_clock is None:
+                return ITEM_NOT_EXISTS, []
+
+            if stored_clock.user_id not in user_ids:
+                lock_user(stored_clock.user_id)
+
+            query_status_code = run_query_getting_status(update_clock_query, (self.id, self.user_id, self.action,
+                                                                              self.date_time, self.local_date_time,
+                                                                              self.id))
+
+            return query_status_code, [(stored_clock.user_id, stored_clock.date_time), (self.user_id, self.date_time)]
+
+        return write_clocks(update_clock, user_ids)
+
+
+def write_clocks(write_function, user_ids, new_clock=None):
+    """Write clocks and update the worked time rollups of the days they belong to, in a single transaction.
+
+    Note: The users are locked first, so that the writes of the same user are serialized and each rollup is calculated
+          from the last version of its clocks. If the write fails, the transaction is rolled back (if there is an outer
+          transaction in progress, the error is raised so that the whole transaction is rolled back). The cached state
+          of the users is replaced when the transaction is committed (see clockzy.lib.clocking.user_state).
+
+    Args:
+        write_function (function): Function without arguments that writes the clocks. It returns the operation status
+                                   code and the list of (user_id, date_time) of the written clocks.
+        user_ids (iterable(str)): Users whose clocks are written.
+        new_clock (Clock): Clock added by the write function, if it only adds one. It is the last clock of its user,
+                           so the new user state is taken from it instead of loading it from the database.
+
+    Returns:
+        int: Operation status code.
+    """
+    joined_transaction = in_transaction()
+
+    try:
+        with transaction():
+            for user_id in sorted(user_ids):
+                lock_user(user_id)
+
+            query_status_code, written_clocks = write_function()
+
+            # Roll back the clocks written before the error (e.g. the first chunks of a bulk save)
+            if query_status_code == OPERATION_ERROR:
+                raise MySQLError('The clocks could not be written')
+
+            if query_status_code == SUCCESS:
+                written_days = sorted({(user_id, str(date_time).split(' ')[0])
+                                       for user_id, date_time in written_clocks})
+                # The bulk writes calculate all their rollups set-wise
+                if len(written_days) == 1:
+                    refresh_daily_worked_time(*written_days[0])
+                else:
+                    refresh_users_daily_worked_time(written_days)
+
+                # Drop the cached states until the commit, so that the states loaded meanwhile are not cached
+                for user_id in sorted({user_id for user_id, _ in written_clocks}):
+                    if new_clock is None:
+                        new_state = load_user_state(user_id)
+                    else:
+                        date_time = new_clock.date_time
+                        new_state = (new_clock.action.lower(),
+                                     parse_date_time(date_time) if isinstance(date_time, str) else date_time)
+
+                    invalidate_user_state(user_id)
+                    on_commit(partial(set_user_state, user_id, new_state))
+
+            return query_status_code
+    except MySQLError:
+        if joined_transaction:
+            raise
+
+        return OPERATION_ERROR
@@ -1,7 +1,9 @@
 from clockzy.lib.db.db_schema import COMMANDS_HISTORY_TABLE
-from clockzy.lib.handlers.codes import ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
 from clockzy.lib.utils.time import get_current_date_time
-from clockzy.lib.db.database_interface import run_query_getting_status, get_last_insert_id, item_exists
+from clockzy.lib.db.database import pin_to_primary
+from clockzy.lib.db.database_interface import run_query_getting_status, run_query_getting_result, item_exists, \
+                                              run_many_getting_status
 
 
 class CommandHistory:
@@ -32,47 +34,70 @@ class CommandHistory:
         return f"id: {self.id}, user_id: {self.user_id}, command: {self.command}, parameters: {self.parameters}, " \
                f"date_time: {self.date_time}"
 
+    @pin_to_primary()
     def save(self):
         """Save the command history information in the database.
 
         Returns:
             int: Operation status code.
         """
-        add_command_query = f"INSERT INTO {COMMANDS_HISTORY_TABLE} VALUES (null, '{self.user_id}', '{self.command}', " \
-                            f"'{self.parameters}', '{self.date_time}');"
+        add_command_query = f"INSERT INTO {COMMANDS_HISTORY_TABLE} VALUES (null, %s, %s, %s, %s);"
 
         if self.id and item_exists({'id': self.id}, COMMANDS_HISTORY_TABLE):
             return ITEM_ALREADY_EXISTS
 
-        query_status_code = run_query_getting_status(add_command_query)
-        self.id = get_last_insert_id(COMMANDS_HISTORY_TABLE)
+        query_status_code, result = run_query_getting_result(add_command_query, (self.user_id, self.command,
+                                                                                 self.parameters, self.date_time))
+        self.id = result.lastrowid if query_status_code == SUCCESS else None
 
         return query_status_code
 
+    @classmethod
+    def bulk_save(cls, commands):
+        """Save several command history items in the database, using multi-row INSERT statements in a single
+        transaction.
+
+        Note: Unlike save, the command history identifiers are not loaded into the objects.
+
+        Args:
+            commands (iterable(CommandHistory)): CommandHistory objects to save.
+
+        Returns:
+            int: Operation status code.
+        """
+        add_commands_query = f"INSERT INTO {COMMANDS_HISTORY_TABLE} (user_id, command, parameters, date_time) " \
+                             'VALUES (%s, %s, %s, %s)'
+        commands_data = ((command.user_id, command.command, command.parameters, command.date_time)
+                         for command in commands)
+
+        return run_many_getting_status(add_commands_query, commands_data)
+
+    @pin_to_primary()
     def delete(self):
         """Delete the command history data from the database.
 
         Returns:
             int: Operation status code.
         """
-        delete_command_query = f"DELETE FROM {COMMANDS_HISTORY_TABLE} WHERE id='{self.id}'"
+        delete_command_query = f"DELETE FROM {COMMANDS_HISTORY_TABLE} WHERE id=%s"
 
         if not item_exists({'id': self.id}, COMMANDS_HISTORY_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(delete_command_query)
+        return run_query_getting_status(delete_command_query, (self.id,))
 
+    @pin_to_primary()
     def update(self):
         """Update the command history information from the database.
 
         Returns:
             int: Operation status code.
         """
-        update_command_query = f"UPDATE {COMMANDS_HISTORY_TABLE} SET id='{self.id}', user_id='{self.user_id}', " \
-                               f"command='{self.command}', parameters='{self.parameters}', " \
-                               f"date_time='{self.date_time}' WHERE id='{self.id}'"
+        update_command_query = f"UPDATE {COMMANDS_HISTORY_TABLE} SET id=%s, user_id=%s, command=%s, parameters=%s, " \
+                               'date_time=%s WHERE id=%s'
 
         if not item_exists({'id': self.id}, COMMANDS_HISTORY_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(update_command_query)
+        return run_query_getting_status(update_command_query, (self.id, self.user_id, self.command, self.parameters,
+                                                               self.date_time, self.id))
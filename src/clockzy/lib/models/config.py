@@ -1,5 +1,7 @@
 from clockzy.lib.db.db_schema import CONFIG_TABLE
-from clockzy.lib.handlers.codes import ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.db.database import pin_to_primary
+from clockzy.lib.db import identity_map
 from clockzy.lib.db.database_interface import run_query_getting_status, item_exists
 
 
@@ -30,44 +32,70 @@ class Config:
         return f"user_id: {self.user_id}, intratime_integration: {self.intratime_integration}, " \
                f"time_zone: {self.time_zone}"
 
+    @pin_to_primary()
     def save(self):
         """Save the config information in the database.
 
         Returns:
             int: Operation status code.
         """
-        add_config_query = f"INSERT INTO {CONFIG_TABLE} VALUES ('{self.user_id}', {self.intratime_integration}, " \
-                           f"'{self.time_zone}');"
+        add_config_query = f"INSERT INTO {CONFIG_TABLE} VALUES (%s, %s, %s);"
 
         if item_exists({'user_id': self.user_id}, CONFIG_TABLE):
             return ITEM_ALREADY_EXISTS
 
-        return run_query_getting_status(add_config_query)
+        identity_map.invalidate('config', self.user_id)
 
+        return run_query_getting_status(add_config_query, (self.user_id, self.intratime_integration, self.time_zone))
+
+    @pin_to_primary()
     def delete(self):
         """Delete the config data from the database.
 
         Returns:
             int: Operation status code.
         """
-        delete_config_query = f"DELETE FROM {CONFIG_TABLE} WHERE user_id='{self.user_id}'"
+        delete_config_query = f"DELETE FROM {CONFIG_TABLE} WHERE user_id=%s"
 
         if not item_exists({'user_id': self.user_id}, CONFIG_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(delete_config_query)
+        identity_map.invalidate('config', self.user_id)
+
+        return run_query_getting_status(delete_config_query, (self.user_id,))
 
+    @pin_to_primary()
     def update(self):
         """Update the config information from the database.
 
         Returns:
             int: Operation status code.
         """
-        update_config_query = f"UPDATE {CONFIG_TABLE} SET user_id='{self.user_id}', " \
-                              f"intratime_integration={self.intratime_integration}, time_zone='{self.time_zone}' " \
-                              f"WHERE user_id='{self.user_id}'"
+        update_config_query = f"UPDATE {CONFIG_TABLE} SET user_id=%s, intratime_integration=%s, time_zone=%s " \
+                              'WHERE user_id=%s'
 
-        if not item_exists({'user_id': self.user_id}, CONFIG_TABLE):
+        identity_map.invalidate('config', self.user_id)
+        status_code = run_query_getting_status(update_config_query, (self.user_id, self.intratime_integration,
+                                                                     self.time_zone, self.user_id))
+
+        # The connections report the matched rows (CLIENT.FOUND_ROWS), so no row is affected only if the config does
+        # not exist or the query has failed
+        if status_code != SUCCESS and not item_exists({'user_id': self.user_id}, CONFIG_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(update_config_query)
+        return status_code
+
+    def upsert(self):
+        """Save the config information in the database, replacing the current user config if it exists.
+        Use update when the config must already exist, so that a concurrently deleted one is not created again.
+
+        Returns:
+            int: Operation status code.
+        """
+        upsert_config_query = f"INSERT INTO {CONFIG_TABLE} VALUES (%s, %s, %s) AS new ON DUPLICATE KEY UPDATE " \
+                              'intratime_integration=new.intratime_integration, time_zone=new.time_zone'
+
+        identity_map.invalidate('config', self.user_id)
+
+        return run_query_getting_status(upsert_config_query, (self.user_id, self.intratime_integration,
+                                                              self.time_zone))
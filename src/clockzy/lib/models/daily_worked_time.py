@@ -0,0 +1,69 @@
+from clockzy.lib.db.db_schema import DAILY_WORKED_TIME_TABLE
+from clockzy.lib.handlers.codes import ITEM_NOT_EXISTS
+from clockzy.lib.db.database import pin_to_primary
+from clockzy.lib.db.database_interface import run_query_getting_status, item_exists, run_many_getting_status
+
+
+class DailyWorkedTime:
+    """DailyWorkedTime ORM (Object–relational mapping). Worked time rollup of a user day with clocks.
+
+    Args:
+        user_id (str): User id the worked time belongs to.
+        day (str): Day in format %Y-%m-%d.
+        seconds (int): Worked seconds in the day, counting the periods not closed until the end of the day.
+        open_state (boolean): True if the user was still working when the day ended, False otherwise.
+
+    Attributes:
+        user_id (str): User id the worked time belongs to.
+        day (str): Day in format %Y-%m-%d.
+        seconds (int): Worked seconds in the day, counting the periods not closed until the end of the day.
+        open_state (boolean): True if the user was still working when the day ended, False otherwise.
+    """
+    def __init__(self, user_id, day, seconds, open_state):
+        self.user_id = user_id
+        self.day = day
+        self.seconds = seconds
+        self.open_state = open_state
+
+    def __str__(self):
+        """Define how the class object will be displayed."""
+        return f"user_id: {self.user_id}, day: {self.day}, seconds: {self.seconds}, open_state: {self.open_state}"
+
+    @pin_to_primary()
+    def delete(self):
+        """Delete the day worked time from the database.
+
+        Returns:
+            int: Operation status code.
+        """
+        delete_daily_worked_time_query = f"DELETE FROM {DAILY_WORKED_TIME_TABLE} WHERE user_id=%s AND day=%s"
+
+        if not item_exists({'user_id': self.user_id, 'day': self.day}, DAILY_WORKED_TIME_TABLE):
+            return ITEM_NOT_EXISTS
+
+        return run_query_getting_status(delete_daily_worked_time_query, (self.user_id, self.day))
+
+    def upsert(self):
+        """Save the day worked time in the database, replacing the current one if it exists.
+
+        Returns:
+            int: Operation status code.
+        """
+        return DailyWorkedTime.bulk_upsert([self])
+
+    @classmethod
+    def bulk_upsert(cls, daily_worked_times):
+        """Save several days worked time in the database, replacing the current ones, in a single transaction.
+
+        Args:
+            daily_worked_times (iterable(DailyWorkedTime)): Days worked time to save.
+
+        Returns:
+            int: Operation status code.
+        """
+        upsert_daily_worked_time_query = f"INSERT INTO {DAILY_WORKED_TIME_TABLE} VALUES (%s, %s, %s, %s) " \
+                                         'AS new ON DUPLICATE KEY UPDATE seconds=new.seconds, open_state=new.open_state'
+        daily_worked_time_data = ((daily_worked_time.user_id, daily_worked_time.day, daily_worked_time.seconds,
+                                   daily_worked_time.open_state) for daily_worked_time in daily_worked_times)
+
+        return run_many_getting_status(upsert_daily_worked_time_query, daily_worked_time_data)
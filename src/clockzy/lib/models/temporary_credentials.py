@@ -2,6 +2,7 @@ from clockzy.lib.db.db_schema import TEMPORARY_CREDENTIALS_TABLE
 from clockzy.lib.utils.time import get_current_date_time, get_expiration_date_time
 from clockzy.config.settings import CREDENTIALS_EXPIRATION_TIME
 from clockzy.lib.handlers.codes import ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.db.database import pin_to_primary
 from clockzy.lib.db.database_interface import run_query_getting_status, item_exists
 
 
@@ -19,44 +20,60 @@ class TemporaryCredentials:
         """
         return f"user_id: {self.user_id}, password: {self.password}, expiration_date_time: {self.expiration_date_time}"
 
+    @pin_to_primary()
     def save(self):
         """Save the config information in the database.
 
         Returns:
             int: Operation status code.
         """
-        add_temporary_credetials_query = f"INSERT INTO {TEMPORARY_CREDENTIALS_TABLE} VALUES ('{self.user_id}', " \
-                                         f"'{self.password}', '{self.expiration_date_time}');"
+        add_temporary_credetials_query = f"INSERT INTO {TEMPORARY_CREDENTIALS_TABLE} VALUES (%s, %s, %s);"
 
         if item_exists({'user_id': self.user_id}, TEMPORARY_CREDENTIALS_TABLE):
             return ITEM_ALREADY_EXISTS
 
-        return run_query_getting_status(add_temporary_credetials_query)
+        return run_query_getting_status(add_temporary_credetials_query, (self.user_id, self.password,
+                                                                         self.expiration_date_time))
 
+    @pin_to_primary()
     def delete(self):
         """Delete the config data from the database.
 
         Returns:
             int: Operation status code.
         """
-        delete_temporary_credetials_query = f"DELETE FROM {TEMPORARY_CREDENTIALS_TABLE} WHERE user_id='{self.user_id}'"
+        delete_temporary_credetials_query = f"DELETE FROM {TEMPORARY_CREDENTIALS_TABLE} WHERE user_id=%s"
 
         if not item_exists({'user_id': self.user_id}, TEMPORARY_CREDENTIALS_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(delete_temporary_credetials_query)
+        return run_query_getting_status(delete_temporary_credetials_query, (self.user_id,))
 
+    @pin_to_primary()
     def update(self):
         """Update the config information from the database.
 
         Returns:
             int: Operation status code.
         """
-        update_config_query = f"UPDATE {TEMPORARY_CREDENTIALS_TABLE} SET user_id='{self.user_id}', " \
-                              f"password='{self.password}', expiration_date_time='{self.expiration_date_time}' " \
-                              f"WHERE user_id='{self.user_id}'"
+        update_config_query = f"UPDATE {TEMPORARY_CREDENTIALS_TABLE} SET user_id=%s, password=%s, " \
+                              'expiration_date_time=%s WHERE user_id=%s'
 
         if not item_exists({'user_id': self.user_id}, TEMPORARY_CREDENTIALS_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(update_config_query)
+        return run_query_getting_status(update_config_query, (self.user_id, self.password, self.expiration_date_time,
+                                                              self.user_id))
+
+    def upsert(self):
+        """Save the credentials information in the database, replacing the current user credentials if they exist.
+
+        Returns:
+            int: Operation status code.
+        """
+        upsert_temporary_credentials_query = f"INSERT INTO {TEMPORARY_CREDENTIALS_TABLE} VALUES (%s, %s, %s) " \
+                                             'AS new ON DUPLICATE KEY UPDATE password=new.password, ' \
+                                             'expiration_date_time=new.expiration_date_time'
+
+        return run_query_getting_status(upsert_temporary_credentials_query, (self.user_id, self.password,
+                                                                             self.expiration_date_time))
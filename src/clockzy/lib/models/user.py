@@ -1,7 +1,10 @@
 from clockzy.lib.utils.time import get_current_date_time
 from clockzy.lib.db.db_schema import USER_TABLE
-from clockzy.lib.handlers.codes import ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
+from clockzy.lib.db.database import pin_to_primary
+from clockzy.lib.db import identity_map
 from clockzy.lib.db.database_interface import run_query_getting_status, item_exists
+from clockzy.lib.clocking.user_state import invalidate_user_state
 
 
 class User:
@@ -37,44 +40,79 @@ class User:
         return f"id: {self.id}, user_name: {self.user_name}, password: {self.password}, email: {self.email}, " \
                f"entry_data: {self.entry_data}, last_registration_date: {self.last_registration_date}"
 
+    @pin_to_primary()
     def save(self):
         """Save the user information in the database.
 
         Returns:
             int: Operation status code..
         """
-        add_user_query = f"INSERT INTO {USER_TABLE} VALUES ('{self.id}', '{self.user_name}', '{self.password}', " \
-                         f"'{self.email}', '{self.entry_data}', '{self.last_registration_date}');"
+        add_user_query = f"INSERT INTO {USER_TABLE} VALUES (%s, %s, %s, %s, %s, %s);"
 
         if item_exists({'id': self.id}, USER_TABLE):
             return ITEM_ALREADY_EXISTS
 
-        return run_query_getting_status(add_user_query)
+        identity_map.invalidate('user', self.id)
 
+        return run_query_getting_status(add_user_query, (self.id, self.user_name, self.password, self.email,
+                                                         self.entry_data, self.last_registration_date))
+
+    @pin_to_primary()
     def delete(self):
         """Delete the user from the database.
 
         Returns:
             int: Operation status code..
         """
-        delete_user_query = f"DELETE FROM {USER_TABLE} WHERE id='{self.id}'"
+        delete_user_query = f"DELETE FROM {USER_TABLE} WHERE id=%s"
 
         if not item_exists({'id': self.id}, USER_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(delete_user_query)
+        # The user config and clocks are deleted in cascade
+        identity_map.invalidate('user', self.id)
+        identity_map.invalidate('config', self.id)
+        identity_map.invalidate('last_clock', self.id)
+        status_code = run_query_getting_status(delete_user_query, (self.id,))
+        invalidate_user_state(self.id)
+
+        return status_code
 
+    @pin_to_primary()
     def update(self):
         """Update the current user information from the database.
 
         Returns:
             int: Operation status code..
         """
-        update_user_query = f"UPDATE {USER_TABLE} SET id='{self.id}', user_name='{self.user_name}', " \
-                            f"password='{self.password}', email='{self.email}', entry_data='{self.entry_data}', " \
-                            f"last_registration_date='{self.last_registration_date}' WHERE id='{self.id}'"
+        update_user_query = f"UPDATE {USER_TABLE} SET id=%s, user_name=%s, password=%s, email=%s, entry_data=%s, " \
+                            'last_registration_date=%s WHERE id=%s'
 
-        if not item_exists({'id': self.id}, USER_TABLE):
+        identity_map.invalidate('user', self.id)
+        status_code = run_query_getting_status(update_user_query, (self.id, self.user_name, self.password, self.email,
+                                                                   self.entry_data, self.last_registration_date,
+                                                                   self.id))
+
+        # The connections report the matched rows (CLIENT.FOUND_ROWS), so no row is affected only if the user does
+        # not exist or the query has failed
+        if status_code != SUCCESS and not item_exists({'id': self.id}, USER_TABLE):
             return ITEM_NOT_EXISTS
 
-        return run_query_getting_status(update_user_query)
+        return status_code
+
+    def upsert(self):
+        """Save the user information in the database, replacing the current user data if it exists. The entry_data
+        is only set when the user is inserted. Use update when the user must already exist, so that a concurrently
+        deleted user is not created again.
+
+        Returns:
+            int: Operation status code.
+        """
+        upsert_user_query = f"INSERT INTO {USER_TABLE} VALUES (%s, %s, %s, %s, %s, %s) AS new " \
+                            'ON DUPLICATE KEY UPDATE user_name=new.user_name, password=new.password, ' \
+                            'email=new.email, last_registration_date=new.last_registration_date'
+
+        identity_map.invalidate('user', self.id)
+
+        return run_query_getting_status(upsert_user_query, (self.id, self.user_name, self.password, self.email,
+                                                            self.entry_data, self.last_registration_date))
@@ -1,5 +1,9 @@
 import pytz
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from clockzy.config.settings import WORKING_CALENDAR_REGION
+from clockzy.lib.utils.working_calendar import get_working_calendar
 
 
 DAYS = 'day'
@@ -9,6 +13,65 @@ SECONDS = 'second'
 TODAY = 'today'
 WEEK = 'week'
 MONTH = 'month'
+QUARTER = 'quarter'
+YEAR = 'year'
+TIME_RANGES = [TODAY, WEEK, MONTH, QUARTER, YEAR]
+DATE_RANGE_SEPARATOR = '..'  # Separator of the explicit date ranges, e.g. 2022-01-01..2022-03-31
+MIN_DATE_RANGE_DAY = '2000-01-01'  # First day allowed in the explicit date ranges
+MAX_DATE_RANGE_DAYS = 731  # Maximum number of days of the explicit date ranges (2 years)
+LATEST_TIMEZONE = 'Pacific/Kiritimati'  # Timezone where each day starts first (UTC+14)
+SECONDS_PER_DAY = 86400
+DATE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # Canonical datetime format, parsed and formatted with the fast helpers
+DATE_FORMAT = '%Y-%m-%d'
+# Ordinal of the epoch day (1970-01-01), to get the epoch seconds from the datetime ordinals without formatting them
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=None)
+def get_timezone(timezone):
+    """Get the tz object of a timezone, loading it only once.
+
+    Args:
+        timezone (str): Timezone.
+
+    Returns:
+        pytz.tzinfo.BaseTzInfo: Timezone object.
+    """
+    return pytz.timezone(timezone)
+
+
+@lru_cache(maxsize=4096)
+def _parse_canonical_date_time(date_time):
+    return datetime.fromisoformat(date_time)
+
+
+def parse_date_time(date_time, date_time_format=DATE_TIME_FORMAT):
+    """Parse a datetime string, with a fast path for the canonical formats (%Y-%m-%d %H:%M:%S and %Y-%m-%d).
+
+    Note: The canonical datetimes are parsed by datetime.fromisoformat after checking their fixed layout, and the last
+          parsed ones are cached (datetime objects are immutable). Any other format, or a string that the fast path
+          rejects, is parsed with datetime.strptime, so the accepted strings and the errors are the same.
+
+    Args:
+        date_time (str): Datetime string.
+        date_time_format (str): Datetime format.
+
+    Returns:
+        datetime: Datetime object.
+
+    Raises:
+        ValueError: If the string does not match the format.
+    """
+    if (date_time_format == DATE_TIME_FORMAT and len(date_time) == 19 and date_time[10] == ' ' and
+       date_time[13] == ':' and date_time[16] == ':') or \
+       (date_time_format == DATE_FORMAT and len(date_time) == 10):
+        if date_time[4] == '-' and date_time[7] == '-':
+            try:
+                return _parse_canonical_date_time(date_time)
+            except ValueError:
+                pass
+
+    return datetime.strptime(date_time, date_time_format)
 
 
 def get_current_date_time(timezone='Europe/Berlin'):
@@ -20,7 +83,7 @@ def get_current_date_time(timezone='Europe/Berlin'):
     Returns:
         str: Datetime in format %Y-%m-%d %H:%M:%S
     """
-    date_time = datetime.now(pytz.timezone(timezone)).strftime("%Y-%m-%d %H:%M:%S")
+    date_time = datetime_to_str(datetime.now(get_timezone(timezone)).replace(tzinfo=None))
 
     return date_time
 
@@ -32,7 +95,80 @@ def get_current_date(timezone='Europe/Berlin'):
         str: Date in format in format %Y-%m-%d
     """
 
-    return f"{datetime.now(pytz.timezone(timezone)).strftime('%Y-%m-%d')}"
+    return datetime.now(get_timezone(timezone)).date().isoformat()
+
+
+class TimeContext:
+    """Snapshot of the current time in a timezone, so that all the calculations of a request use the same "now" and
+    time range boundaries.
+
+    Args:
+        timezone (str): Timezone.
+
+    Attributes:
+        timezone (str): Timezone.
+        tz (pytz.tzinfo.BaseTzInfo): Timezone object.
+        current_date_time (str): Current datetime in format %Y-%m-%d %H:%M:%S
+        current_date (str): Current date in format %Y-%m-%d
+        current_epoch (int): Current datetime epoch seconds (see get_epoch_seconds).
+        today_start (str): First datetime of the current day in format %Y-%m-%d %H:%M:%S
+        week_start (str): First datetime of the current week in format %Y-%m-%d %H:%M:%S
+        month_start (str): First datetime of the current month in format %Y-%m-%d %H:%M:%S
+        quarter_start (str): First datetime of the current quarter in format %Y-%m-%d %H:%M:%S
+        year_start (str): First datetime of the current year in format %Y-%m-%d %H:%M:%S
+    """
+    def __init__(self, timezone='Europe/Berlin'):
+        self.timezone = timezone
+        self.tz = get_timezone(timezone)
+
+        now = datetime.now(self.tz).replace(tzinfo=None, microsecond=0)
+        today = now.date()
+
+        self.current_date_time = datetime_to_str(now)
+        self.current_date = today.isoformat()
+        self.current_epoch = get_epoch_seconds(now)
+        self.today_start = f"{today} 00:00:00"
+        self.week_start = f"{today - timedelta(days=today.weekday())} 00:00:00"
+        self.month_start = f"{today.replace(day=1)} 00:00:00"
+        self.quarter_start = f"{today.replace(month=3 * ((today.month - 1) // 3) + 1, day=1)} 00:00:00"
+        self.year_start = f"{today.replace(month=1, day=1)} 00:00:00"
+
+    def __str__(self):
+        """Define how the class object will be displayed."""
+        return f"timezone: {self.timezone}, current_date_time: {self.current_date_time}"
+
+    def get_lower_time(self, time_range):
+        """Get the start date of the specified time range.
+
+        Args:
+            time_range (str): Enum [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
+
+        Returns:
+            str: Date string in format %Y-%m-%d 00:00:00
+        """
+        if DATE_RANGE_SEPARATOR in time_range:
+            return get_date_range_limits(time_range)[0]
+
+        return {TODAY: self.today_start, WEEK: self.week_start, QUARTER: self.quarter_start,
+                YEAR: self.year_start}.get(time_range, self.month_start)
+
+    def get_upper_time(self, time_range):
+        """Get the end date of the specified time range, which is the current datetime unless the range ends before (or
+        the range start, if it has not started yet).
+
+        Args:
+            time_range (str): Enum [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
+
+        Returns:
+            str: Date string in format %Y-%m-%d %H:%M:%S
+        """
+        if DATE_RANGE_SEPARATOR in time_range:
+            lower_limit, upper_limit = get_date_range_limits(time_range)
+
+            # The range may not have started yet in the user timezone
+            return max(min(upper_limit, self.current_date_time), lower_limit)
+
+        return self.current_date_time
 
 
 def subtract_days_to_datetime(date_time, days):
@@ -45,8 +181,8 @@ def subtract_days_to_datetime(date_time, days):
     Returns:
         str: Datetime in format %Y-%m-%d %H:%M:%S
     """
-    date_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
-    return datetime.strftime(date_object - timedelta(days=days), '%Y-%m-%d %H:%M:%S')
+    date_object = parse_date_time(date_time)
+    return datetime_to_str(date_object - timedelta(days=days))
 
 
 def get_week_day(date_time):
@@ -58,7 +194,7 @@ def get_week_day(date_time):
     Returns:
         int: [0-6] where Monday is 0 and Sunday is 6
     """
-    date_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
+    date_object = parse_date_time(date_time)
     return date_object.weekday()
 
 
@@ -71,12 +207,7 @@ def get_first_week_day(timezone='Europe/Berlin'):
     Returns
         str: First day of week in %Y-%m-%d %H:%M:%S format. e.g 2020-11-02 00:00:00
     """
-    date_time = f"{get_current_date(timezone)} 00:00:00"
-    week_init_date = datetime.strptime(subtract_days_to_datetime(date_time, get_week_day(date_time)),
-                                       '%Y-%m-%d %H:%M:%S').date()
-    week_init_datetime = f"{datetime.strftime(week_init_date, '%Y-%m-%d')} 00:00:00"
-
-    return week_init_datetime
+    return TimeContext(timezone).week_start
 
 
 def get_first_month_day(timezone='Europe/Berlin'):
@@ -88,35 +219,54 @@ def get_first_month_day(timezone='Europe/Berlin'):
     Returns:
         str: %Y-%m-%d %H:%M:%S: First day of month e.g 2020-11-01 00:00:00
     """
-    date_time = f"{get_current_date(timezone)} 00:00:00"
-    date_time_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S').replace(day=1, hour=0, minute=0, second=0)
-    month_init_datetime = datetime.strftime(date_time_object, '%Y-%m-%d %H:%M:%S')
+    return TimeContext(timezone).month_start
+
+
+def get_first_quarter_day(timezone='Europe/Berlin'):
+    """Get the first datetime of current quarter.
+
+    Args:
+        timezone (str): User timezone.
+
+    Returns:
+        str: %Y-%m-%d %H:%M:%S: First day of quarter e.g 2020-10-01 00:00:00
+    """
+    return TimeContext(timezone).quarter_start
+
+
+def get_first_year_day(timezone='Europe/Berlin'):
+    """Get the first datetime of current year.
+
+    Args:
+        timezone (str): User timezone.
 
-    return month_init_datetime
+    Returns:
+        str: %Y-%m-%d %H:%M:%S: First day of year e.g 2020-01-01 00:00:00
+    """
+    return TimeContext(timezone).year_start
 
 
 def get_time_difference(datetime_from, datetime_to, unit=SECONDS):
     """Get the time difference between two datetimes (time subtraction).
 
     Args:
-        datetime_from (str): Lower limit datetime in format %Y-%m-%d %H:%M:%S
-        datetime_to (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
+        datetime_from (str|datetime|int): Lower limit datetime in format %Y-%m-%d %H:%M:%S (or epoch seconds).
+        datetime_to (str|datetime|int): Upper limit datetime in format %Y-%m-%d %H:%M:%S (or epoch seconds).
         unit (str): Unit of time to express the result. enum: ['day', 'hour', 'minute', 'second']
 
     Returns:
         int: Time elapsed between the two datetimes.
     """
-    datetime_from_object = datetime.strptime(datetime_from, '%Y-%m-%d %H:%M:%S')
-    datetime_to_object = datetime.strptime(datetime_to, '%Y-%m-%d %H:%M:%S')
+    difference = get_epoch_seconds(datetime_to) - get_epoch_seconds(datetime_from)
 
     if unit == DAYS:
-        return int((datetime_to_object - datetime_from_object).total_seconds() / (60*60*24))
+        return int(difference / (60*60*24))
     elif unit == HOURS:
-        return int((datetime_to_object - datetime_from_object).total_seconds() / (60*60))
+        return int(difference / (60*60))
     elif unit == MINUTES:
-        return int((datetime_to_object - datetime_from_object).total_seconds() / 60)
+        return int(difference / 60)
     else:
-        return int((datetime_to_object - datetime_from_object).total_seconds())
+        return difference
 
 
 def get_time_hh_mm_from_seconds(num_seconds):
@@ -143,50 +293,89 @@ def datetime_to_str(datetime):
     Returns:
         str: Date string in format %Y-%m-%d %H:%M:%S
     """
-    return datetime.strftime("%Y-%m-%d %H:%M:%S")
+    # isoformat is several times faster than strftime, and gives the same string for the naive datetimes
+    if datetime.tzinfo is None:
+        return datetime.isoformat(' ', 'seconds')
+
+    return datetime.strftime(DATE_TIME_FORMAT)
+
+
+def get_date_range_limits(date_range):
+    """Get the limits of an explicit date range.
+
+    Args:
+        date_range (str): Date range in format %Y-%m-%d..%Y-%m-%d, e.g. 2022-01-01..2022-03-31
+
+    Returns:
+        tuple(str, str): First and last datetimes of the range, in format %Y-%m-%d %H:%M:%S, or None if the date range
+                         is not valid (wrong format, the first day is after the last one, before MIN_DATE_RANGE_DAY
+                         or in the future, or the range is longer than MAX_DATE_RANGE_DAYS).
+    """
+    days = date_range.split(DATE_RANGE_SEPARATOR)
+
+    if len(days) != 2 or not all(validate_date_time_format(day, DATE_FORMAT) for day in days) or days[0] > days[1]:
+        return None
+
+    # The first day can not be in the future in any timezone, so that the range has already started for the user
+    if days[0] < MIN_DATE_RANGE_DAY or days[0] > get_current_date(LATEST_TIMEZONE) or \
+       (date.fromisoformat(days[1]) - date.fromisoformat(days[0])).days >= MAX_DATE_RANGE_DAYS:
+        return None
+
+    return f"{days[0]} 00:00:00", f"{days[1]} 23:59:59"
+
+
+def is_valid_time_range(time_range):
+    """Check if a time range is one of the predefined ones or a valid explicit date range.
+
+    Args:
+        time_range (str): Enum [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
+
+    Returns:
+        boolean: True if the time range is valid, False otherwise.
+    """
+    return time_range in TIME_RANGES or get_date_range_limits(time_range) is not None
 
 
 def get_lower_time_from_time_range(time_range, timezone='Europe/Berlin'):
     """Get the start date of the specified time range.
 
     Args:
-        time_range (str): Enum [today, week, month].
+        time_range (str): Enum [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
         timezone (str): User timezone.
 
     Returns:
         str: Date string in format %Y-%m-%d 00:00:00
     """
-    if time_range == 'today':
-        lower_limit_datetime = f"{get_current_date(timezone)} 00:00:00"
-    elif time_range == 'week':
-        lower_limit_datetime = get_first_week_day(timezone)
-    else:  # Month
-        lower_limit_datetime = get_first_month_day(timezone)
+    return TimeContext(timezone).get_lower_time(time_range)
 
-    return lower_limit_datetime
 
+def get_upper_time_from_time_range(time_range, timezone='Europe/Berlin'):
+    """Get the end date of the specified time range, which is the current datetime unless the range ends before.
 
-def get_working_days(datetime_from, datetime_to, excluded=(6, 7)):
-    """Get all dates between Monday and Friday for the specified time range.
+    Args:
+        time_range (str): Enum [today, week, month, quarter, year] or date range in format %Y-%m-%d..%Y-%m-%d.
+        timezone (str): User timezone.
+
+    Returns:
+        str: Date string in format %Y-%m-%d %H:%M:%S
+    """
+    return TimeContext(timezone).get_upper_time(time_range)
+
+
+def get_working_days(datetime_from, datetime_to, region=WORKING_CALENDAR_REGION):
+    """Get the working days (without the weekend days and holidays of the region calendar) of a time range.
 
      Args:
-        datetime_from (str): Upper limit datetime in format %Y-%m-%d %H:%M:%S
+        datetime_from (str): Lower limit datetime in format %Y-%m-%d %H:%M:%S
         datetime_to (str): Upper limit datetime  in format %Y-%m-%d %H:%M:%S
-        excluded (tuple): Excluded days.
+        region (str): Working calendar region (see clockzy.lib.utils.working_calendar).
 
     Returns:
         list(str): List of dates in format %Y-%m-%d 00:00:00
     """
-    initial_datetime = datetime.strptime(datetime_from, '%Y-%m-%d %H:%M:%S')
-    end_datetime = datetime.strptime(datetime_to, '%Y-%m-%d %H:%M:%S')
-    days = []
-
-    while initial_datetime.date() <= end_datetime.date():
-        if initial_datetime.isoweekday() not in excluded:
-            days.append(datetime.strftime(initial_datetime, '%Y-%m-%d %H:%M:%S'))
-        initial_datetime += timedelta(days=1)
+    working_days = get_working_calendar(region).get_working_days(datetime_from, datetime_to)
 
-    return days
+    return [f"{date.fromordinal(ordinal).isoformat()} 00:00:00" for ordinal in working_days]
 
 
 def get_num_seconds_from_hh_mm_time(string_time):
@@ -229,10 +418,10 @@ def get_expiration_date_time(time_expiration=60, timezone='Europe/Berlin'):
     Returns:
         str: Expiration date time.
     """
-    current_date_time = datetime.strptime(get_current_date_time(timezone), "%Y-%m-%d %H:%M:%S")
+    current_date_time = parse_date_time(get_current_date_time(timezone))
     expiration_date_time = current_date_time + timedelta(seconds=time_expiration)
 
-    return datetime.strftime(expiration_date_time, "%Y-%m-%d %H:%M:%S")
+    return datetime_to_str(expiration_date_time)
 
 
 def date_time_has_expired(expiration_date_time, timezone='Europe/Berlin'):
@@ -246,7 +435,7 @@ def date_time_has_expired(expiration_date_time, timezone='Europe/Berlin'):
         boolean: True if the date_time has expired, False otherwise.
 
     """
-    current_date_time = datetime.strptime(get_current_date_time(timezone), '%Y-%m-%d %H:%M:%S')
+    current_date_time = parse_date_time(get_current_date_time(timezone))
 
     return current_date_time > expiration_date_time
 
@@ -261,14 +450,14 @@ def add_seconds_to_datetime(date_time, seconds):
     Returns:
         str: Result datetime with the added seconds.
     """
-    date_time_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
+    date_time_object = parse_date_time(date_time)
     result_date_time_object = date_time_object + timedelta(seconds=seconds)
-    result_date_time = datetime.strftime(result_date_time_object, '%Y-%m-%d %H:%M:%S')
+    result_date_time = datetime_to_str(result_date_time_object)
 
     return result_date_time
 
 
-def validate_date_time_format(date_time, date_time_format='%Y-%m-%d %H:%M:%S'):
+def validate_date_time_format(date_time, date_time_format=DATE_TIME_FORMAT):
     """Validate the date_time expected format.
 
     Args:
@@ -279,7 +468,7 @@ def validate_date_time_format(date_time, date_time_format='%Y-%m-%d %H:%M:%S'):
 
     """
     try:
-        datetime.strptime(date_time, date_time_format)
+        parse_date_time(date_time, date_time_format)
         return True
     except ValueError as e:
         return False
@@ -294,7 +483,7 @@ def check_if_date_time_belongs_to_current_year(date_time):
     Returns:
         boolean: True if the date_time belongs to the current year, False otherwise.
     """
-    date_time_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
+    date_time_object = parse_date_time(date_time)
 
     return date_time_object.year == datetime.now().year
 
@@ -307,6 +496,104 @@ def check_if_future_date_time(date_time):
     Returns:
         boolean: True if the specified date_time belongs to the future, False otherwise.
     """
-    date_time_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
+    date_time_object = parse_date_time(date_time)
 
     return date_time_object > datetime.now()
+
+
+def get_epoch_seconds(date_time):
+    """Get the epoch seconds of a datetime, taking its wall clock time (without timezone) as UTC.
+
+    Note: The datetime objects and the epoch seconds are not formatted nor parsed, so use them instead of the datetime
+          strings when doing calculations with many datetimes.
+
+    Args:
+        date_time (str|datetime|date|int): Datetime in format %Y-%m-%d %H:%M:%S, datetime or date object, or epoch
+                                           seconds (returned as is).
+
+    Returns:
+        int: Seconds since 1970-01-01 00:00:00.
+    """
+    if isinstance(date_time, int):
+        return date_time
+
+    if isinstance(date_time, str):
+        date_time = parse_date_time(date_time)
+    elif not isinstance(date_time, datetime):
+        return (date_time.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY
+
+    return (date_time.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY + date_time.hour * 3600 + date_time.minute * 60 + \
+        date_time.second
+
+
+def epoch_to_datetime(epoch_seconds):
+    """Convert epoch seconds into a datetime object (without timezone).
+
+    Args:
+        epoch_seconds (int): Seconds since 1970-01-01 00:00:00.
+
+    Returns:
+        datetime: Datetime object.
+    """
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch_seconds)
+
+
+def epoch_to_str(epoch_seconds):
+    """Convert epoch seconds into string.
+
+    Args:
+        epoch_seconds (int): Seconds since 1970-01-01 00:00:00.
+
+    Returns:
+        str: Date string in format %Y-%m-%d %H:%M:%S
+    """
+    return datetime_to_str(epoch_to_datetime(epoch_seconds))
+
+
+def get_day_index(epoch_seconds):
+    """Get the day index (number of days since 1970-01-01) of a datetime.
+
+    Args:
+        epoch_seconds (int): Seconds since 1970-01-01 00:00:00.
+
+    Returns:
+        int: Day index.
+    """
+    return epoch_seconds // SECONDS_PER_DAY
+
+
+def get_day_start(day_index):
+    """Get the start of a day.
+
+    Args:
+        day_index (int): Day index (number of days since 1970-01-01).
+
+    Returns:
+        int: Epoch seconds of the day at 00:00:00.
+    """
+    return day_index * SECONDS_PER_DAY
+
+
+def get_day_starts(datetime_from, datetime_to):
+    """Get the start of each day between two datetimes.
+
+    Args:
+        datetime_from (int): Lower limit epoch seconds.
+        datetime_to (int): Upper limit epoch seconds.
+
+    Returns:
+        range(int): Epoch seconds of each day at 00:00:00, from the datetime_from day to the datetime_to day.
+    """
+    return range(get_day_start(get_day_index(datetime_from)), datetime_to + 1, SECONDS_PER_DAY)
+
+
+def day_index_to_str(day_index):
+    """Convert a day index into string.
+
+    Args:
+        day_index (int): Day index (number of days since 1970-01-01).
+
+    Returns:
+        str: Date string in format %Y-%m-%d
+    """
+    return date.fromordinal(day_index + EPOCH_ORDINAL).isoformat()
@@ -0,0 +1,239 @@
+"""
+Working days calendars of each region, with their weekend days and holidays.
+
+The calendars are read from the <region>.yaml files of the WORKING_CALENDARS_PATH directory, e.g.
+
+    weekend: [6, 7]  # ISO week days (1 Monday ... 7 Sunday)
+    holidays:
+      - '01-01'  # Every year, in format %m-%d
+      - '2022-04-15'  # Only that date, in format %Y-%m-%d
+    easter_holidays: [-2]  # Every year, in days from Easter Sunday (e.g. -2 is Good Friday)
+
+The working days of each year are precomputed the first time it is used, as the array of their date ordinals and the
+cumulative number of working days before each day of the year, so that counting the working days of a date range takes
+two lookups per year and listing them is an array slice.
+"""
+import os
+import threading
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+
+from clockzy.config.settings import WORKING_CALENDARS_PATH, WORKING_CALENDAR_REGION
+from clockzy.lib.utils.file import read_yaml
+
+
+def get_day_ordinal(day):
+    """Get the proleptic Gregorian ordinal of a day (see date.toordinal).
+
+    Args:
+        day (str|date|datetime|int): Day in format %Y-%m-%d (or a datetime string), date or datetime object, or day
+                                     ordinal.
+
+    Returns:
+        int: Day ordinal.
+    """
+    if isinstance(day, int):
+        return day
+
+    if isinstance(day, str):
+        return date.fromisoformat(day[:10]).toordinal()
+
+    return day.toordinal()
+
+
+def get_easter_sunday(year):
+    """Get the Easter Sunday date of a year, in the Gregorian calendar (anonymous Gregorian algorithm).
+
+    Args:
+        year (int): Year.
+
+    Returns:
+        date: Easter Sunday date.
+    """
+    golden_number = year % 19
+    century, year_of_century = divmod(year, 100)
+    leap_centuries, century_remainder = divmod(century, 4)
+    moon_correction = (century + 8) // 25
+    moon_orbit_correction = (century - moon_correction + 1) // 3
+    epact = (19 * golden_number + century - leap_centuries - moon_orbit_correction + 15) % 30
+    leap_years, year_remainder = divmod(year_of_century, 4)
+    week_day = (32 + 2 * century_remainder + 2 * leap_years - epact - year_remainder) % 7
+    month_correction = (golden_number + 11 * epact + 22 * week_day) // 451
+    month, day = divmod(epact + week_day - 7 * month_correction + 114, 31)
+
+    return date(year, month, day + 1)
+
+
+class WorkingCalendar:
+    """Working days calendar of a region.
+
+    Args:
+        region (str): Region name.
+        weekend_days (iterable(int)): ISO week days (1 Monday ... 7 Sunday) that are not working days.
+        holidays (iterable(str|date)): Holidays, in format %m-%d (every year) or %Y-%m-%d (only that date).
+        easter_holidays (iterable(int)): Holidays of every year, in days from Easter Sunday (e.g. -2 for Good Friday).
+
+    Attributes:
+        region (str): Region name.
+        weekend_days (frozenset(int)): ISO week days that are not working days.
+        yearly_holidays (frozenset(tuple(int, int))): (month, day) of the holidays of every year.
+        date_holidays (frozenset(int)): Day ordinals of the holidays of a specific date.
+        easter_holidays (frozenset(int)): Days from Easter Sunday of the holidays of every year.
+    """
+    def __init__(self, region, weekend_days=(6, 7), holidays=(), easter_holidays=()):
+        self.region = region
+        self.weekend_days = frozenset(weekend_days)
+        self.easter_holidays = frozenset(easter_holidays)
+        yearly_holidays = set()
+        date_holidays = set()
+
+        for holiday in holidays:
+            # YAML loads the unquoted %Y-%m-%d values as date objects
+            if isinstance(holiday, date):
+                date_holidays.add(holiday.toordinal())
+            elif len(holiday) == 5:
+                yearly_holidays.add((int(holiday[:2]), int(holiday[3:])))
+            else:
+                date_holidays.add(get_day_ordinal(holiday))
+
+        self.yearly_holidays = frozenset(yearly_holidays)
+        self.date_holidays = frozenset(date_holidays)
+        self._years = {}
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        """Define how the class object will be displayed."""
+        return f"region: {self.region}, weekend_days: {sorted(self.weekend_days)}, " \
+               f"yearly_holidays: {len(self.yearly_holidays)}, date_holidays: {len(self.date_holidays)}, " \
+               f"easter_holidays: {sorted(self.easter_holidays)}"
+
+    def _get_year(self, year):
+        """Get the precomputed working days of a year, computing them if it is the first time.
+
+        Args:
+            year (int): Year.
+
+        Returns:
+            tuple(int, array, array): Ordinal of the first day of the year, ordinals of its working days, and number of
+                                      working days before each day of the year (with an extra item for the year end).
+        """
+        year_data = self._years.get(year)
+
+        if year_data is not None:
+            return year_data
+
+        first_ordinal = date(year, 1, 1).toordinal()
+        easter_sunday = get_easter_sunday(year)
+        holidays = self.date_holidays | {(easter_sunday + timedelta(days=offset)).toordinal()
+                                         for offset in self.easter_holidays}
+        working_days = array('l')
+        cumulative_working_days = array('H', [0])
+
+        for ordinal in range(first_ordinal, date(year + 1, 1, 1).toordinal()):
+            day = date.fromordinal(ordinal)
+
+            if day.isoweekday() not in self.weekend_days and (day.month, day.day) not in self.yearly_holidays and \
+               ordinal not in holidays:
+                working_days.append(ordinal)
+
+            cumulative_working_days.append(len(working_days))
+
+        with self._lock:
+            return self._years.setdefault(year, (first_ordinal, working_days, cumulative_working_days))
+
+    def is_working_day(self, day):
+        """Check if a day is a working day.
+
+        Args:
+            day (str|date|datetime|int): Day (see get_day_ordinal).
+
+        Returns:
+            boolean: True if it is a working day, False otherwise.
+        """
+        ordinal = get_day_ordinal(day)
+        first_ordinal, _, cumulative_working_days = self._get_year(date.fromordinal(ordinal).year)
+        day_index = ordinal - first_ordinal
+
+        return cumulative_working_days[day_index + 1] > cumulative_working_days[day_index]
+
+    def _get_year_slices(self, day_from, day_to):
+        """Get the working days indexes of each year of a date range.
+
+        Args:
+            day_from (str|date|datetime|int): First day of the range (see get_day_ordinal).
+            day_to (str|date|datetime|int): Last day of the range, included.
+
+        Returns:
+            list(tuple(array, int, int)): Working days ordinals of each year of the range, and the start and end indexes
+                                          of the range working days in them.
+        """
+        ordinal_from = get_day_ordinal(day_from)
+        ordinal_to = get_day_ordinal(day_to)
+        year_slices = []
+
+        if ordinal_from > ordinal_to:
+            return year_slices
+
+        for year in range(date.fromordinal(ordinal_from).year, date.fromordinal(ordinal_to).year + 1):
+            first_ordinal, working_days, cumulative_working_days = self._get_year(year)
+            start_index = max(ordinal_from - first_ordinal, 0)
+            end_index = min(ordinal_to - first_ordinal + 1, len(cumulative_working_days) - 1)
+            year_slices.append((working_days, cumulative_working_days[start_index],
+                                cumulative_working_days[end_index]))
+
+        return year_slices
+
+    def count_working_days(self, day_from, day_to):
+        """Count the working days of a date range.
+
+        Args:
+            day_from (str|date|datetime|int): First day of the range (see get_day_ordinal).
+            day_to (str|date|datetime|int): Last day of the range, included.
+
+        Returns:
+            int: Number of working days.
+        """
+        return sum(end_index - start_index for _, start_index, end_index in self._get_year_slices(day_from, day_to))
+
+    def get_working_days(self, day_from, day_to):
+        """Get the working days of a date range.
+
+        Args:
+            day_from (str|date|datetime|int): First day of the range (see get_day_ordinal).
+            day_to (str|date|datetime|int): Last day of the range, included.
+
+        Returns:
+            array: Ordinals of the working days, in ascending order.
+        """
+        year_slices = self._get_year_slices(day_from, day_to)
+
+        if len(year_slices) == 1:
+            working_days, start_index, end_index = year_slices[0]
+            return working_days[start_index:end_index]
+
+        range_working_days = array('l')
+
+        for working_days, start_index, end_index in year_slices:
+            range_working_days.extend(working_days[start_index:end_index])
+
+        return range_working_days
+
+
+@lru_cache(maxsize=None)
+def get_working_calendar(region=WORKING_CALENDAR_REGION):
+    """Get the working calendar of a region, reading it from its file the first time.
+
+    Args:
+        region (str): Region name, whose calendar is read from WORKING_CALENDARS_PATH/<region>.yaml.
+
+    Returns:
+        WorkingCalendar: Region working calendar.
+
+    Raises:
+        FileNotFoundError: If the region does not have a calendar file.
+    """
+    calendar_data = read_yaml(os.path.join(WORKING_CALENDARS_PATH, f"{region}.yaml")) or {}
+
+    return WorkingCalendar(region, calendar_data.get('weekend', (6, 7)), calendar_data.get('holidays') or (),
+                           calendar_data.get('easter_holidays') or ())
@@ -1,13 +1,156 @@
 """
-Script to initialize the Clockzy database and tables environment
+Script to initialize the Clockzy database and tables environment, applying the pending schema migrations
 """
 
+import pymysql
+from datetime import datetime, timedelta
+from itertools import groupby
+
 from clockzy.lib.db.database import Database
-from clockzy.config.settings import DB_NAME
+from clockzy.config.settings import DB_NAME, DB_STREAM_BATCH_SIZE
 from clockzy.lib.db import db_schema as dbs
+from clockzy.lib.utils.time import get_current_date_time
+
+
+def populate_daily_worked_time(cursor):
+    """Calculate the worked time rollups of all the users and days with clocks (migration 5).
+
+    Note: It is a frozen copy of the worked time calculation of the migration version (see
+          clockzy.lib.clocking.build_daily_worked_time), so that the migration result does not change with the
+          application code. The current rollups are replaced, so it can be run again if the migration is interrupted.
+
+    Args:
+        cursor (pymysql.cursors.Cursor): Cursor of the migration connection.
+    """
+    cursor.execute('DELETE FROM daily_worked_time')
+    cursor.execute('SELECT user_id, action, date_time FROM clock ORDER BY user_id, date_time, id')
+    daily_worked_times = []
+
+    def iter_clock_rows():
+        rows = cursor.fetchmany(DB_STREAM_BATCH_SIZE)
+        while rows:
+            yield from rows
+            rows = cursor.fetchmany(DB_STREAM_BATCH_SIZE)
+
+    for (user_id, day), day_rows in groupby(iter_clock_rows(), key=lambda row: (row[0], row[2].date())):
+        day_start = datetime.combine(day, datetime.min.time())
+        day_states = [(date_time, action.lower() in ('in', 'return')) for _, action, date_time in day_rows]
+        worked_time = timedelta()
+
+        # Time worked since the day start, between the IN/RETURN and the next PAUSE/OUT actions, and until the day end
+        if not day_states[0][1]:
+            worked_time += day_states[0][0] - day_start
+
+        for (previous_date_time, previous_open), (date_time, is_open) in zip(day_states, day_states[1:]):
+            if previous_open and not is_open:
+                worked_time += date_time - previous_date_time
+
+        if day_states[-1][1]:
+            worked_time += day_start + timedelta(days=1) - day_states[-1][0]
+
+        daily_worked_times.append((user_id, day.isoformat(), int(worked_time.total_seconds()), day_states[-1][1]))
+
+    if len(daily_worked_times) > 0:
+        cursor.executemany('INSERT INTO daily_worked_time VALUES (%s, %s, %s, %s)', daily_worked_times)
+
+
+# Ordered schema migrations: (version, description, statements). A statement can also be a function that migrates the
+# data, receiving the migration cursor. Never modify an already released migration, add a new one instead. Every
+# statement must be safe to run again, because a failed migration is applied again from its first statement.
+MIGRATIONS = [
+    (1, 'Create the clockzy tables', [dbs.USER_TABLE_SCHEMA, dbs.CLOCK_TABLE_SCHEMA, dbs.COMMANDS_HISTORY_TABLE_SCHEMA,
+                                      dbs.CONFIG_TABLE_SCHEMA, dbs.ALIAS_TABLE_SCHEMA,
+                                      dbs.TEMPORARY_CREDENTIALS_TABLE_SCHEMA]),
+    (2, 'Add the clock and command history (user_id, date_time) indexes', [dbs.CLOCK_USER_DATE_TIME_INDEX,
+                                                                           dbs.COMMANDS_HISTORY_USER_DATE_TIME_INDEX]),
+    (3, 'Add the alias unique index and the user name index', [dbs.DELETE_DUPLICATED_ALIASES, dbs.ALIAS_UNIQUE_INDEX,
+                                                               dbs.USER_NAME_INDEX]),
+    (4, 'Add the config user_id unique index (needed by the config upsert)', [*dbs.DELETE_DUPLICATED_CONFIGS,
+                                                                              dbs.CONFIG_USER_ID_UNIQUE_INDEX]),
+    (5, 'Add the daily worked time rollup table', [dbs.DAILY_WORKED_TIME_TABLE_SCHEMA,
+                                                   populate_daily_worked_time]),
+    (6, 'Add the worked time version table', [dbs.WORKED_TIME_VERSION_TABLE_SCHEMA])
+]
+
+# MySQL errors meaning that the statement was already applied (table or index already exists)
+ALREADY_APPLIED_ERRORS = (1050, 1061)
+
+
+def get_schema_version(database):
+    """Get the current schema version of the database, creating the schema version table if necessary.
+
+    Args:
+        database (Database): Database object.
+
+    Returns:
+        int: Last applied migration version (0 if no migration has been applied yet).
+    """
+    database.run_query(dbs.SCHEMA_VERSION_TABLE_SCHEMA)
+    result = database.run_query(f"SELECT MAX(version) FROM {dbs.SCHEMA_VERSION_TABLE}")
+
+    return result[0][0] or 0
+
+
+def apply_migration(database, version, description, statements):
+    """Run the migration statements and register the new schema version.
+
+    Note: MySQL commits the DDL statements implicitly, so a failed migration is not rolled back and it is applied again
+          from its first statement on the next run. Statements that fail because they were already applied (e.g. an
+          index that already exists) are skipped.
+
+    Args:
+        database (Database): Database object.
+        version (int): Migration version.
+        description (str): Migration description.
+        statements (list(str|function)): Migration SQL statements, or functions that migrate the data (called with the
+                                         migration cursor).
+
+    Raises:
+        pymysql.MySQLError: If any statement fails.
+    """
+    database.connect()
+
+    try:
+        with database.database_connection.cursor() as cursor:
+            for statement in statements:
+                if callable(statement):
+                    statement(cursor)
+                    continue
+
+                try:
+                    cursor.execute(statement)
+                except pymysql.MySQLError as e:
+                    if e.args[0] not in ALREADY_APPLIED_ERRORS:
+                        raise
+
+            cursor.execute(f"INSERT INTO {dbs.SCHEMA_VERSION_TABLE} VALUES (%s, %s, %s)",
+                           (version, description, get_current_date_time()))
+    finally:
+        database.close_connection()
+
+
+def run_migrations(database, migrations=MIGRATIONS):
+    """Apply, in order, the migrations that have not been applied yet.
+
+    Args:
+        database (Database): Database object.
+        migrations (list(tuple)): Ordered migrations (version, description, statements).
+
+    Returns:
+        int: Schema version after applying the migrations.
+    """
+    schema_version = get_schema_version(database)
+
+    for version, description, statements in migrations:
+        if version <= schema_version:
+            continue
+
+        apply_migration(database, version, description, statements)
+        schema_version = version
+
+        print(f"\033[92mApplied migration {version}: {description}\033[0m")
 
-SCHEMAS = [dbs.USER_TABLE_SCHEMA, dbs.CLOCK_TABLE_SCHEMA, dbs.COMMANDS_HISTORY_TABLE_SCHEMA, dbs.CONFIG_TABLE_SCHEMA,
-           dbs.ALIAS_TABLE_SCHEMA, dbs.TEMPORARY_CREDENTIALS_TABLE_SCHEMA]
+    return schema_version
 
 
 def main():
@@ -16,9 +159,8 @@ def main():
     # Create database if not exist
     database.create_database(DB_NAME)
 
-    # Create the tables if not exist
-    for table_schema in SCHEMAS:
-        database.run_query(table_schema)
+    # Create the tables and indexes if not exist
+    run_migrations(database)
 
 
 if __name__ == '__main__':
@@ -2,10 +2,11 @@ import logging
 from flask import Flask, jsonify, request, make_response
 from http import HTTPStatus
 from functools import wraps
+from pymysql import MySQLError
 from os import environ
 from os.path import join
 
-from clockzy.lib.db.db_schema import USER_TABLE, ALIAS_TABLE, TEMPORARY_CREDENTIALS_TABLE
+from clockzy.lib.db.db_schema import USER_TABLE, ALIAS_TABLE
 from clockzy.lib import global_vars as var
 from clockzy.lib.messages import api_responses as ar
 from clockzy.lib.models.slack_request import SlackRequest
@@ -20,9 +21,11 @@ from clockzy.lib.slack import slack_core as slack
 from clockzy.config import settings
 from clockzy.lib.messages.slack_messages import send_slack_message
 from clockzy.lib.db import db_schema as dbs
-from clockzy.lib.utils.time import get_current_date_time
+from clockzy.lib.utils.time import get_current_date_time, is_valid_time_range, TimeContext
+from clockzy.lib.db.database import transaction
+from clockzy.lib.db import instrumentation, identity_map
 from clockzy.lib.db.database_interface import item_exists, get_user_object, get_database_data_from_objects, \
-                                              get_config_object
+                                              get_config_object, lock_user
 from clockzy.lib.clocking import user_can_clock_this_action, calculate_worked_time
 from clockzy.lib import intratime
 from clockzy.lib.utils import crypt, time
@@ -62,14 +65,16 @@ ALLOWED_COMMANDS = {
     },
     var.TIME_REQUEST: {
         'description': 'Get the time worked for the specified time period.',
-        'allowed_parameters': ['today', 'week', 'month'],
+        'allowed_parameters': ['today', 'week', 'month', 'quarter', 'year', 'YYYY-MM-DD..YYYY-MM-DD'],
         'free_parameters': False,
+        'parameters_validator': is_valid_time_range,
         'num_parameters': 1
     },
     var.TIME_HISTORY_REQUEST: {
         'description': 'Get the time worked history for the specified time period.',
-        'allowed_parameters': ['today', 'week', 'month'],
+        'allowed_parameters': ['today', 'week', 'month', 'quarter', 'year', 'YYYY-MM-DD..YYYY-MM-DD'],
         'free_parameters': False,
+        'parameters_validator': is_valid_time_range,
         'num_parameters': 1
     },
     var.CLOCK_HISTORY_REQUEST: {
@@ -143,6 +148,28 @@ def set_logging():
     app_file_handler.setFormatter(formatter)
     app_logger.addHandler(app_file_handler)
 
+    # Set slow queries logs (see DB_INSTRUMENTATION setting)
+    slow_query_file_handler = logging.FileHandler(join(settings.LOGS_PATH, 'clockzy_slow_queries.log'))
+    slow_query_file_handler.setFormatter(formatter)
+    instrumentation.slow_query_logger.addHandler(slow_query_file_handler)
+
+
+@clockzy_service.before_request
+def start_request_instrumentation():
+    """Start counting the database queries of the request, with an empty identity map"""
+    instrumentation.start_request(request.path)
+    identity_map.start_request()
+
+
+@clockzy_service.teardown_request
+def end_request_instrumentation(exception):
+    """Log the database usage of the request (see DB_INSTRUMENTATION setting)"""
+    identity_map.end_request()
+    stats = instrumentation.end_request()
+
+    if settings.DB_INSTRUMENTATION and stats is not None:
+        app_logger.info(lgm.request_database_stats(request.path, stats))
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 #                                                API DECORATORS                                                        #
@@ -190,12 +217,14 @@ def validate_user(func):
         user_id = kwargs['slack_request_object'].user_id
         response_url = kwargs['slack_request_object'].response_url
 
-        if not item_exists({'id': user_id}, USER_TABLE):
+        user_data = get_user_object(user_id)
+
+        if user_data is None:
             send_slack_message('USER_NOT_REGISTERED', response_url)
             return empty_response()
 
-        # Get the user data and return it
-        kwargs['user_data'] = get_user_object(user_id)
+        # Return the user data
+        kwargs['user_data'] = user_data
 
         return func(*args, **kwargs)
 
@@ -231,8 +260,13 @@ def validate_command_parameters(func):
                                                                                   parameters])
                 return empty_response()
 
-            # Check if the parameter value is correct when it is an enumerated one.
-            if not command_data['free_parameters'] and command_parameters[0] not in command_data['allowed_parameters']:
+            # Check if the parameter value is correct when it is an enumerated (or validated) one.
+            if 'parameters_validator' in command_data:
+                valid_parameter = command_data['parameters_validator'](command_parameters[0])
+            else:
+                valid_parameter = command_parameters[0] in command_data['allowed_parameters']
+
+            if not command_data['free_parameters'] and not valid_parameter:
                 send_slack_message('WRONG_COMMAND_PARAMETER', response_url, [command,
                                                                              command_data['allowed_parameters']])
                 return empty_response()
@@ -340,7 +374,7 @@ def update_user(slack_request_object, user_data):
         # Update the user time zone if necessary
         if user_config.time_zone != user_profile_data[1]['tz']:
             user_config.time_zone = user_profile_data[1]['tz']
-            if user_config.update() != cd.SUCCESS:
+            if user_config.upsert() != cd.SUCCESS:
                 app_logger.error(lgm.error_updating_user(user_data.user_name, user_data.id, 'time_zone'))
                 update_ok = False
 
@@ -387,9 +421,11 @@ def clock(slack_request_object, user_data):
     """
     action = slack_request_object.command_parameters[0]
     response_url = slack_request_object.response_url
-    user_timezone = get_config_object(user_data.id).time_zone
+    user_config = get_config_object(user_data.id)
+    user_timezone = user_config.time_zone
+    intratime_enabled = user_config.intratime_integration
 
-    # Check if the user can clock that action (it makes sense)
+    # Check if the user can clock that action (it makes sense), with the state stored in the database
     clock_check = user_can_clock_this_action(user_data.id, action)
 
     # If the clocking is wrong, then indicate it to the user
@@ -397,27 +433,56 @@ def clock(slack_request_object, user_data):
         send_slack_message('BAD_CLOCKING_TYPE', response_url, [clock_check[1]])
         return empty_response()
 
-    # If the user has intratime app linked, then register the action in the intratime API.
-    intratime_enabled = get_config_object(user_data.id).intratime_integration
+    # If the user has intratime app linked, then register the action in the intratime API. It is done before the
+    # clockzy transaction, so that a slow intratime response neither keeps the user locked nor holds a database
+    # connection.
     if intratime_enabled:
         user_email = user_data.email
         user_password = crypt.decrypt(user_data.password)
         clocking_status = intratime.clocking(action, user_email, user_password, user_timezone)
 
-        # If the intratime clocking has failed, then display an error message and exit so as not to clock it in clockzy.
+        # If the intratime clocking has failed, then display an error message and exit so as not to clock it in
+        # clockzy.
         if clocking_status != cd.SUCCESS:
             if clocking_status == cd.INTRATIME_AUTH_ERROR:
                 app_logger.info(lgm.error_intratime_auth(user_data.user_name, user_data.id))
-                send_slack_message('BAD_CLOCKING_CREDENTIALS', response_url, [var.ENABLE_INTRATIME_INTEGRATION_REQUEST])
+                send_slack_message('BAD_CLOCKING_CREDENTIALS', response_url,
+                                   [var.ENABLE_INTRATIME_INTEGRATION_REQUEST])
             else:
                 app_logger.error(lgm.error_intratime_clocking(user_data.user_name, user_data.id, action.upper()))
                 send_slack_message('ERROR_CLOCKING_INTRATIME', response_url)
 
             return empty_response()
 
-    # Save the clock in the DB
-    clock = Clock(user_data.id, action, get_current_date_time(user_timezone))
-    result = clock.save()
+    # Check the user state again and register the clock in a single transaction, so that concurrent clockings from the
+    # same user can not be registered based on the same previous state. It is not replayed after a transient database
+    # error (deadlock, lost connection...), because the intratime clocking could not be undone. Only database queries
+    # are run inside it, the slack messages are sent after it ends.
+    result = cd.OPERATION_ERROR
+
+    try:
+        with transaction():
+            lock_user(user_data.id)
+            clock_check = user_can_clock_this_action(user_data.id, action)
+
+            if clock_check[0]:
+                # Save the clock in the DB
+                clock = Clock(user_data.id, action, get_current_date_time(user_timezone))
+                result = clock.save()
+
+                # Update the last registration data from that user
+                if result == cd.SUCCESS:
+                    user_data.last_registration_date = get_current_date_time()
+                    user_data.update()
+    except MySQLError as e:
+        app_logger.error(lgm.error_clocking_transaction(user_data.user_name, user_data.id, action.upper(), e))
+        result = cd.OPERATION_ERROR
+
+    # Another clocking of the user has been registered since the first check. If the action has already been clocked in
+    # intratime, it is reported as a clockzy clocking error
+    if not clock_check[0] and not intratime_enabled:
+        send_slack_message('BAD_CLOCKING_TYPE', response_url, [clock_check[1]])
+        return empty_response()
 
     # Communicate the result of the clocking operation
     if result == cd.SUCCESS:
@@ -433,10 +498,6 @@ def clock(slack_request_object, user_data):
 
         return empty_response()
 
-    # Update the last registration data from that user
-    user_data.last_registration_date = get_current_date_time()
-    user_data.update()
-
     app_logger.info(lgm.success_clockzy_clocking(user_data.user_name, user_data.id, action.upper()))
 
     return empty_response()
@@ -454,7 +515,7 @@ def time(slack_request_object, user_data):
     user_timezone = get_config_object(user_data.id).time_zone
 
     # Calculate the worked time
-    worked_time = calculate_worked_time(user_data.id, time_range=time_range, timezone=user_timezone)
+    worked_time = calculate_worked_time(user_data.id, time_range=time_range, time_context=TimeContext(user_timezone))
 
     # Communicate the result
     send_slack_message('WORKED_TIME', response_url, [time_range, worked_time])
@@ -474,7 +535,7 @@ def time_history(slack_request_object, user_data):
     user_timezone = get_config_object(user_data.id).time_zone
 
     # Calculate and send the report
-    send_slack_message('TIME_HISTORY', response_url, [user_data.id, time_range, user_timezone])
+    send_slack_message('TIME_HISTORY', response_url, [user_data.id, time_range, TimeContext(user_timezone)])
 
     return empty_response()
 
@@ -491,7 +552,7 @@ def clock_history(slack_request_object, user_data):
     user_timezone = get_config_object(user_data.id).time_zone
 
     # Calculate and send the report
-    send_slack_message('CLOCK_HISTORY', response_url, [user_data.id, time_range, user_timezone])
+    send_slack_message('CLOCK_HISTORY', response_url, [user_data.id, time_range, TimeContext(user_timezone)])
 
     return empty_response()
 
@@ -506,7 +567,7 @@ def today_info(slack_request_object, user_data):
     user_timezone = get_config_object(user_data.id).time_zone
 
     # Calculate and send the report
-    send_slack_message('TODAY_INFO', response_url, [user_data.id, 'today', user_timezone])
+    send_slack_message('TODAY_INFO', response_url, [user_data.id, 'today', TimeContext(user_timezone)])
 
     return empty_response()
 
@@ -532,7 +593,8 @@ def add_alias(slack_request_object, user_data):
     response_url = slack_request_object.response_url
     user_name = slack_request_object.command_parameters[0]
     alias_name = slack_request_object.command_parameters[1]
-    referenced_user_data = get_database_data_from_objects({'user_name': user_name}, USER_TABLE)
+    referenced_user_data = get_database_data_from_objects({'user_name': user_name}, USER_TABLE, columns=['id'],
+                                                          limit=1)
 
     # Check if the specified username exists
     if len(referenced_user_data) == 0:
@@ -579,21 +641,25 @@ def get_aliases(slack_request_object, user_data):
 @validate_command_parameters
 @command_monitoring
 def get_user_status(slack_request_object, user_data):
-    """Endpoint to query the user status given an username or alias name"""
+    """Endpoint to query the user status given an username or alias name.
+
+    Note: The status is read from the user state cache of this process, so a clock made through another process can
+          take up to USER_STATE_CACHE_TTL seconds to be shown.
+    """
     response_url = slack_request_object.response_url
     user_name = slack_request_object.command_parameters[0]
 
+    # Get the user id from the user name or alias
+    user_data = get_database_data_from_objects({'user_name': user_name}, USER_TABLE, columns=['id'], limit=1)
+    if len(user_data) == 0:
+        user_data = get_database_data_from_objects({'alias': user_name}, ALIAS_TABLE, columns=['user_id'], limit=1)
+
     # Check if the user name or alias exist
-    if not item_exists({'user_name': user_name}, USER_TABLE) and not item_exists({'alias': user_name}, ALIAS_TABLE):
+    if len(user_data) == 0:
         send_slack_message('BAD_USERNAME_OR_ALIAS', response_url, [user_name])
         return empty_response()
 
-    # Get the user id
-    user_data = get_database_data_from_objects({'user_name': user_name}, USER_TABLE)
-    if len(user_data) == 0:
-        user_id = get_database_data_from_objects({'alias': user_name}, ALIAS_TABLE)[0][1]
-    else:
-        user_id = user_data[0][0]
+    user_id = user_data[0][0]
 
     send_slack_message('USER_STATUS', response_url, [user_id, user_name])
 
@@ -626,7 +692,7 @@ def enable_intratime_integration(slack_request_object, user_data):
     # Update the user configuration and set the intratime integration to True
     user_config = get_config_object(user_data.id)
     user_config.intratime_integration = True
-    user_config.update()
+    user_config.upsert()
 
     if not get_config_object(user_data.id).intratime_integration:
         app_logger.error(lgm.error_updating_user_configuration(user_data.user_name, user_data.id))
@@ -656,7 +722,7 @@ def disable_intratime_integration(slack_request_object, user_data):
     user_config = get_config_object(user_data.id)
     user_config.intratime_integration = False
 
-    if user_config.update() != cd.SUCCESS:
+    if user_config.upsert() != cd.SUCCESS:
         app_logger.error(lgm.error_disabling_intratime_sync(user_data.user_name, user_data.id))
         send_slack_message('ERROR_DISABLING_INTRATIME', response_url)
         return empty_response()
@@ -685,11 +751,8 @@ def get_management_credentials(slack_request_object, user_data):
     # Generate new temporary credentials
     new_temporary_credentials = TemporaryCredentials(user_data.id, crypt.generate_random_temporary_password())
 
-    # Save or update the new credentials in the DB
-    if item_exists({'user_id': user_data.id}, TEMPORARY_CREDENTIALS_TABLE):
-        new_temporary_credentials.update()
-    else:
-        new_temporary_credentials.save()
+    # Save or replace the new credentials in the DB
+    new_temporary_credentials.upsert()
 
     # Send the slack message
     send_slack_message('TEMPORARY_CREDENTIALS', response_url, [new_temporary_credentials.user_id,
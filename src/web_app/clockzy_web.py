@@ -10,6 +10,7 @@ import views
 from clockzy.lib.handlers.codes import SUCCESS
 from clockzy.config import settings
 from clockzy.lib.db.database_interface import get_user_object
+from clockzy.lib.db import instrumentation, identity_map
 from clockzy.lib.messages import logger_messages as lgm
 
 
@@ -34,6 +35,28 @@ def set_logging():
     web_app_file_handler.setFormatter(formatter)
     web_app_logger.addHandler(web_app_file_handler)
 
+    # Set slow queries logs (see DB_INSTRUMENTATION setting)
+    slow_query_file_handler = logging.FileHandler(join(settings.LOGS_PATH, 'clockzy_web_slow_queries.log'))
+    slow_query_file_handler.setFormatter(formatter)
+    instrumentation.slow_query_logger.addHandler(slow_query_file_handler)
+
+
+@web_app.before_request
+def start_request_instrumentation():
+    """Start counting the database queries of the request, with an empty identity map"""
+    instrumentation.start_request(request.path)
+    identity_map.start_request()
+
+
+@web_app.teardown_request
+def end_request_instrumentation(exception):
+    """Log the database usage of the request (see DB_INSTRUMENTATION setting)"""
+    identity_map.end_request()
+    stats = instrumentation.end_request()
+
+    if settings.DB_INSTRUMENTATION and stats is not None:
+        web_app_logger.info(lgm.request_database_stats(request.path, stats))
+
 
 def user_logged(func):
     """Wrapper to check if the user is logged"""
@@ -86,8 +109,7 @@ def check_credentials():
 @user_logged
 def index():
     """Index view"""
-    clocking_data = controller.get_clocking_data(session['user_id'])
-    clocking_data.reverse()  # Reverse the data to order them from most recent to least recent
+    clocking_data = controller.get_clocking_data(session['user_id'])  # Ordered from most recent to least recent
 
     notification = session['notification'] if 'notification' in session else None
 
@@ -165,8 +187,8 @@ def get_query_data():
     if 'search' not in request_data:
         make_response('Error: Need search data parameter', HTTPStatus.BAD_REQUEST)
 
+    # Ordered from most recent to least recent
     clock_data = controller.get_filtered_clock_user_data(session['user_id'], request_data['search'])
-    clock_data.reverse()  # Reverse the data to order them from most recent to least recent
 
     table_view = views.get_clocking_table(clock_data).replace('&#39;', "'")
 
@@ -1,9 +1,11 @@
 from datetime import datetime
 
-from clockzy.lib.db.database_interface import get_database_data_from_objects, get_clock_object, get_filtered_clock_data
+from clockzy.lib.db.database import pin_to_primary
+from clockzy.lib.db.database_interface import get_database_data_from_objects, get_clock_object, \
+                                              iter_clock_data_from_user, iter_filtered_clock_data
 from clockzy.lib.utils.time import get_time_difference, add_seconds_to_datetime
 from clockzy.lib.models.clock import Clock
-from clockzy.lib.db.db_schema import TEMPORARY_CREDENTIALS_TABLE, CLOCK_TABLE
+from clockzy.lib.db.db_schema import TEMPORARY_CREDENTIALS_TABLE
 from clockzy.lib.global_vars import MANAGEMENT_REQUEST
 from clockzy.lib.handlers.codes import SUCCESS, GENERIC_ERROR
 from clockzy.lib.utils import time
@@ -31,6 +33,7 @@ def _raw_list(_list, upper=False):
     return output.strip()
 
 
+@pin_to_primary()
 def validate_credentials(user_id, password):
     """Check if the user credentials are valid.
 
@@ -41,7 +44,8 @@ def validate_credentials(user_id, password):
     Returns:
         (dict): Dictionary with the validation result and metadata.
     """
-    user_data = get_database_data_from_objects({'user_id': user_id}, TEMPORARY_CREDENTIALS_TABLE)
+    user_data = get_database_data_from_objects({'user_id': user_id}, TEMPORARY_CREDENTIALS_TABLE,
+                                               columns=['password', 'expiration_date_time'], limit=1)
 
     # Check user ID
     if len(user_data) == 0:
@@ -50,8 +54,8 @@ def validate_credentials(user_id, password):
                                  f"the clockzy web app. Please run {MANAGEMENT_REQUEST} in the clockzy slack "
                                  'application to create them.'}
 
-    user_password = user_data[0][1]
-    password_expiration_time = user_data[0][2]
+    user_password = user_data[0][0]
+    password_expiration_time = user_data[0][1]
 
     # Check password
     if user_password != password:
@@ -73,12 +77,14 @@ def get_clocking_data(user_id):
         user_id (str): User ID.
 
     Returns:
-        list(list(str)): Matrix with clocking data. [[clocking_id, date_time, action], ...]
+        list(list(str)): Matrix with clocking data, from most recent to least recent. [[clocking_id, date_time, action],
+                         ...]
     """
-    return [[str(item[0]), datetime.strftime(item[3], '%Y-%m-%d %H:%M:%S'), item[2].upper()] for item in
-            get_database_data_from_objects({'user_id': user_id}, CLOCK_TABLE)]
+    return [[str(item.id), datetime.strftime(item.date_time, '%Y-%m-%d %H:%M:%S'), item.action.upper()] for item in
+            iter_clock_data_from_user(user_id, newest_first=True)]
 
 
+@pin_to_primary()
 def update_clocking_data(clocking_data):
     """Update a clocking data in the DB. Required fields: 'user_id', 'clock_id', 'action', 'date_time'.
 
@@ -171,6 +177,7 @@ def add_clocking_data(clocking_data):
     return {'result': SUCCESS, 'message': 'The clocking data has been added successfully.', 'data': clocking_data}
 
 
+@pin_to_primary()
 def delete_clocking_data(clocking_data):
     """Delete clocking data from the DB.
 
@@ -210,14 +217,10 @@ def get_filtered_clock_user_data(user_id, search=''):
         search (str): String to filter the clocking data.
 
     Returns:
-        list(list(str)): Clocking data filtered.
+        list(list(str)): Clocking data filtered, from most recent to least recent.
     """
-    clock_data = get_filtered_clock_data(user_id, f"%{search}%")
-
-    if clock_data is None:
-        return []
-
     clock_data_filtered = [[str(item.id), datetime.strftime(item.date_time, '%Y-%m-%d %H:%M:%S'),
-                           item.action.upper()] for item in clock_data]
+                           item.action.upper()] for item in iter_filtered_clock_data(user_id, f"%{search}%",
+                                                                                     newest_first=True)]
 
     return clock_data_filtered
@@ -9,11 +9,19 @@ from clockzy.lib.models.alias import Alias
 from clockzy.lib.models.temporary_credentials import TemporaryCredentials
 from clockzy.lib.utils.file import read_json
 from clockzy.lib.test_framework.database import no_intratime_user_parameters
+from clockzy.config.settings import DB_BACKEND
+from clockzy.scripts import initialize_database
 
 
 CLOCK_TEST_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'clock_data.json')
 
 
+def pytest_sessionstart(session):
+    # The embedded database starts empty (CLOCKZY_DB_BACKEND=sqlite), so create the tables before running the tests
+    if DB_BACKEND == 'sqlite':
+        initialize_database.main()
+
+
 @pytest.fixture
 def delete_post_user(user_parameters):
     yield
@@ -0,0 +1,74 @@
+import pytest
+import freezegun
+import os
+from datetime import datetime
+
+from clockzy.lib.clocking import get_worked_time_per_day
+from clockzy.lib.clocking.batch import calculate_worked_time_per_user_day, build_clock_arrays, \
+                                       get_worked_seconds_matrix
+from clockzy.lib.models.clock import Clock
+from clockzy.lib.test_framework.database import no_intratime_user_parameters, intratime_user_parameters
+from clockzy.lib.utils.file import read_yaml
+from clockzy.lib.utils import time
+
+
+test_data = read_yaml(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'data',
+                                   'test_calculate_worked_time.yaml'))
+test_ids = [item['name'] for item in test_data]
+test_parameters = [(item['clocks'], item['time_range'], item['expected_worked_time'], item['fake_current_date'])
+                   for item in test_data]
+
+
+@pytest.mark.parametrize('clocking_data, time_range, expected_worked_time, fake_current_date',
+                         test_parameters, ids=test_ids)
+def test_calculate_worked_time_per_user_day(clocking_data, time_range, expected_worked_time, fake_current_date, clock):
+    """Test that the batch calculation matches the calculate_worked_time scenarios"""
+    # The second user does not have any clock, so its row must be empty
+    user_ids = [intratime_user_parameters['id'], no_intratime_user_parameters['id']]
+
+    with freezegun.freeze_time(fake_current_date, tz_offset=-1):
+        lower_limit = time.get_lower_time_from_time_range(time_range)
+        upper_limit = time.get_current_date_time()
+        days, worked_seconds = calculate_worked_time_per_user_day(user_ids, lower_limit, upper_limit)
+
+    assert days[0] == lower_limit.split(' ')[0] and days[-1] == upper_limit.split(' ')[0]
+    assert worked_seconds.shape == (2, len(days)) and worked_seconds[0].sum() == 0
+    assert time.get_time_hh_mm_from_seconds(int(worked_seconds[1].sum())) == expected_worked_time
+
+
+def test_get_worked_seconds_matrix():
+    """Test that each user row matches the single user calculation"""
+    user_clocks = {
+        'user_a': [('IN', '2022-01-02 20:00:00')],
+        'user_b': [('IN', '2022-01-03 08:00:00'), ('PAUSE', '2022-01-03 14:00:00'), ('RETURN', '2022-01-03 15:00:00'),
+                   ('OUT', '2022-01-03 17:30:00'), ('IN', '2022-01-05 22:00:00'), ('OUT', '2022-01-06 02:00:00')],
+        'user_c': [('OUT', '2022-01-02 20:00:00'), ('IN', '2022-01-04 08:00:00'), ('OUT', '2022-01-04 10:00:00'),
+                   ('RETURN', '2022-01-06 09:00:00')],
+        'user_d': []
+    }
+    lower_limit, upper_limit = '2022-01-03 00:00:00', '2022-01-06 12:00:00'
+    clock_rows = [(user_id, action, datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S'))
+                  for user_id, clocks in user_clocks.items() for action, date_time in reversed(clocks)]
+
+    users, epochs, actions = build_clock_arrays(clock_rows, list(user_clocks))
+    days, worked_seconds = get_worked_seconds_matrix(users, epochs, actions, len(user_clocks), lower_limit,
+                                                     upper_limit, upper_limit)
+
+    assert days == ['2022-01-03', '2022-01-04', '2022-01-05', '2022-01-06']
+
+    for index, (user_id, clocks) in enumerate(user_clocks.items()):
+        user_clock_objects = [Clock(user_id, action, datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S'))
+                              for action, date_time in clocks]
+        expected_days, _ = get_worked_time_per_day(user_clock_objects, lower_limit, upper_limit, upper_limit)
+
+        assert worked_seconds[index].tolist() == [expected_days[day]['worked_seconds'] for day in days]
+
+
+def test_get_worked_seconds_matrix_inverted_range():
+    """Test that an inverted time range gives an empty matrix"""
+    clock_rows = [('user_a', 'IN', datetime(2022, 1, 3, 8)), ('user_a', 'OUT', datetime(2022, 1, 3, 17))]
+    users, epochs, actions = build_clock_arrays(clock_rows, ['user_a', 'user_b'])
+    days, worked_seconds = get_worked_seconds_matrix(users, epochs, actions, 2, '2022-01-06 00:00:00',
+                                                     '2022-01-03 12:00:00', '2022-01-06 12:00:00')
+
+    assert days == [] and worked_seconds.shape == (2, 0)
@@ -0,0 +1,99 @@
+import pytest
+import freezegun
+
+from clockzy.lib.clocking import rebuild_daily_worked_time, get_worked_seconds_per_day, calculate_worked_time_per_day
+from clockzy.lib.db import instrumentation
+from clockzy.lib.db.database_interface import get_daily_worked_time_data, get_last_clock_from_user
+from clockzy.lib.models.clock import Clock
+from clockzy.lib.test_framework.database import no_intratime_user_parameters, intratime_user_parameters
+
+
+USER_ID = no_intratime_user_parameters['id']
+OTHER_USER_ID = intratime_user_parameters['id']
+CLOCKING_DATA = [
+    {'user_id': USER_ID, 'action': 'IN', 'date_time': '2022-01-03 08:00:00'},
+    {'user_id': USER_ID, 'action': 'OUT', 'date_time': '2022-01-03 16:00:00'},
+    {'user_id': USER_ID, 'action': 'IN', 'date_time': '2022-01-04 22:00:00'},
+    {'user_id': USER_ID, 'action': 'OUT', 'date_time': '2022-01-06 02:00:00'},
+    {'user_id': USER_ID, 'action': 'IN', 'date_time': '2022-01-07 08:00:00'}
+]
+
+
+def get_rollups(user_id=USER_ID):
+    return [(str(day), seconds, bool(open_state))
+            for day, seconds, open_state, _ in get_daily_worked_time_data(user_id, '2022-01-01', '2022-01-31')]
+
+
+def bulk_save_counting_queries(days, monkeypatch):
+    clocks = [Clock(user_id, action, f"2022-01-{day:02d} {hour}") for user_id in (USER_ID, OTHER_USER_ID)
+              for day in days for action, hour in (('in', '08:00:00'), ('out', '15:00:00'))]
+    monkeypatch.setattr(instrumentation, 'DB_INSTRUMENTATION', True)
+    instrumentation.start_request('bulk_save')
+
+    try:
+        Clock.bulk_save(clocks)
+    finally:
+        stats = instrumentation.end_request()
+
+    return stats['queries']
+
+
+@pytest.mark.parametrize('clocking_data', [CLOCKING_DATA])
+def test_incremental_rollups(clocking_data, clock):
+    expected_rollups = [('2022-01-03', 8 * 3600, False), ('2022-01-04', 2 * 3600, True),
+                        ('2022-01-06', 2 * 3600, False), ('2022-01-07', 16 * 3600, True)]
+
+    assert get_rollups() == expected_rollups
+
+    rebuild_daily_worked_time()
+    assert get_rollups() == expected_rollups
+
+    # Move the last clock to another day, and then delete it
+    last_clock = get_last_clock_from_user(USER_ID)
+    last_clock.date_time = '2022-01-10 08:00:00'
+    last_clock.update()
+    assert get_rollups()[-1] == ('2022-01-10', 16 * 3600, True)
+
+    last_clock.delete()
+    assert get_rollups() == expected_rollups[:-1]
+
+
+@pytest.mark.parametrize('clocking_data', [CLOCKING_DATA])
+def test_worked_seconds_per_day(clocking_data, clock):
+    with freezegun.freeze_time('2022-01-07 12:00:00'):
+        worked_seconds_per_day, total_worked_seconds = get_worked_seconds_per_day(USER_ID, '2022-01-01 00:00:00',
+                                                                                  '2022-01-07 12:00:00', 'UTC')
+        days, expected_total_worked_seconds = calculate_worked_time_per_day(USER_ID, '2022-01-01 00:00:00',
+                                                                            '2022-01-07 12:00:00', 'UTC')
+
+    assert worked_seconds_per_day == {day: day_data['worked_seconds'] for day, day_data in days.items()}
+    assert worked_seconds_per_day['2022-01-05'] == 24 * 3600 and worked_seconds_per_day['2022-01-07'] == 4 * 3600
+    assert total_worked_seconds == expected_total_worked_seconds
+
+
+@pytest.mark.parametrize('clocking_data, user_parameters', [([], intratime_user_parameters)])
+def test_bulk_save_rollups(clocking_data, clock, user_parameters, add_pre_user, delete_post_user, monkeypatch):
+    num_queries = bulk_save_counting_queries(range(1, 3), monkeypatch)
+
+    # The rollups of all the days are calculated set-wise, so the number of queries does not depend on the days
+    assert bulk_save_counting_queries(range(3, 21), monkeypatch) == num_queries
+
+    expected_rollups = [(f"2022-01-{day:02d}", 7 * 3600, False) for day in range(1, 21)]
+    assert get_rollups(USER_ID) == get_rollups(OTHER_USER_ID) == expected_rollups
+
+    rebuild_daily_worked_time()
+    assert get_rollups(USER_ID) == get_rollups(OTHER_USER_ID) == expected_rollups
+
+
+@pytest.mark.parametrize('clocking_data, user_parameters', [(CLOCKING_DATA, intratime_user_parameters)])
+def test_move_clock_to_another_user(clocking_data, clock, user_parameters, add_pre_user, delete_post_user):
+    last_clock = get_last_clock_from_user(USER_ID)
+    last_clock.user_id = OTHER_USER_ID
+    last_clock.update()
+
+    # The rollups of the previous and the new user are updated
+    assert get_rollups(USER_ID)[-1] == ('2022-01-06', 2 * 3600, False)
+    assert get_rollups(OTHER_USER_ID) == [('2022-01-07', 16 * 3600, True)]
+
+    last_clock.delete()
+    assert get_rollups(OTHER_USER_ID) == []
@@ -0,0 +1,104 @@
+import pytest
+from datetime import datetime
+
+from clockzy.lib import clocking
+from clockzy.lib.clocking import user_state, user_can_clock_this_action
+from clockzy.lib.db.database import transaction
+from clockzy.lib.models import clock as clock_model
+from clockzy.lib.models.clock import Clock
+from clockzy.lib.test_framework.database import intratime_user_parameters
+
+
+USER_ID = intratime_user_parameters['id']
+
+
+@pytest.fixture
+def state_loads(monkeypatch):
+    loads = []
+    load_user_state = user_state.load_user_state
+
+    def counted_load_user_state(user_id):
+        loads.append(user_id)
+        return load_user_state(user_id)
+
+    # The modules that import it by name are patched too, so that every load is counted
+    for module in (user_state, clocking, clock_model):
+        monkeypatch.setattr(module, 'load_user_state', counted_load_user_state)
+
+    user_state.invalidate_user_state()
+
+    yield loads
+
+    user_state.invalidate_user_state()
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_cached_state(add_pre_user, delete_post_user, state_loads):
+    assert user_state.get_user_state(USER_ID) is None
+    assert user_state.get_user_state(USER_ID) is None
+    assert len(state_loads) == 1
+
+    # Write-through: the saved clock is the new state, without loading it
+    clock = Clock(USER_ID, 'in', '2022-01-03 08:00:00')
+    clock.save()
+
+    assert user_state.get_user_state(USER_ID) == ('in', datetime(2022, 1, 3, 8))
+    assert len(state_loads) == 1
+
+    clock.action = 'pause'
+    clock.update()
+    assert user_state.get_user_state(USER_ID) == ('pause', datetime(2022, 1, 3, 8))
+
+    clock.delete()
+    assert user_state.get_user_state(USER_ID) is None
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_rolled_back_write(add_pre_user, delete_post_user, state_loads):
+    user_state.get_user_state(USER_ID)
+
+    with pytest.raises(RuntimeError):
+        with transaction():
+            Clock(USER_ID, 'in', '2022-01-03 08:00:00').save()
+            # Inside the transaction, the state is read from the database
+            assert user_state.get_user_state(USER_ID)[0] == 'in'
+            raise RuntimeError('rollback')
+
+    assert user_state.get_user_state(USER_ID) is None
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_expired_state(add_pre_user, delete_post_user, state_loads, monkeypatch):
+    monkeypatch.setattr(user_state, 'USER_STATE_CACHE_TTL', 0)
+
+    user_state.get_user_state(USER_ID)
+    user_state.get_user_state(USER_ID)
+
+    assert len(state_loads) == 2
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_stale_state(add_pre_user, delete_post_user, state_loads):
+    user_state.get_user_state(USER_ID)
+
+    # A clock made by another process (e.g. the web app) does not update the cache of this one
+    Clock(USER_ID, 'in', '2022-01-03 08:00:00').save()
+    user_state.set_user_state(USER_ID, None)
+
+    assert user_state.get_user_state(USER_ID) is None
+
+    # The clock validation reads the state from the database, not from the cache
+    assert user_can_clock_this_action(USER_ID, 'out') == (True, None)
+    assert not user_can_clock_this_action(USER_ID, 'in')[0]
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_past_clock_state(add_pre_user, delete_post_user, state_loads):
+    Clock(USER_ID, 'in', '2022-01-03 08:00:00').save()
+
+    # The last saved clock is the state, even if it has an older datetime
+    Clock(USER_ID, 'out', '2022-01-02 17:00:00').save()
+
+    assert user_state.get_user_state(USER_ID) == ('out', datetime(2022, 1, 2, 17))
+    assert len(state_loads) == 0
+    assert user_state.load_user_state(USER_ID) == ('out', datetime(2022, 1, 2, 17))
@@ -0,0 +1,94 @@
+import pytest
+import freezegun
+
+import clockzy.lib.clocking as clocking
+from clockzy.lib.clocking import worked_time_cache, get_worked_seconds_per_day, calculate_worked_time_per_day, \
+                                 rebuild_daily_worked_time
+from clockzy.lib.db.database_interface import get_clock_data_in_time_range
+from clockzy.lib.test_framework.database import no_intratime_user_parameters
+
+
+USER_ID = no_intratime_user_parameters['id']
+CLOCKING_DATA = [
+    {'user_id': USER_ID, 'action': 'IN', 'date_time': '2022-01-03 08:00:00'},
+    {'user_id': USER_ID, 'action': 'OUT', 'date_time': '2022-01-03 16:00:00'},
+    {'user_id': USER_ID, 'action': 'IN', 'date_time': '2022-01-04 22:00:00'},
+    {'user_id': USER_ID, 'action': 'OUT', 'date_time': '2022-01-06 02:00:00'},
+    {'user_id': USER_ID, 'action': 'IN', 'date_time': '2022-01-07 08:00:00'}
+]
+
+
+@pytest.fixture
+def rollup_reads(monkeypatch):
+    reads = []
+    get_daily_worked_time_data = clocking.get_daily_worked_time_data
+
+    def counted_get_daily_worked_time_data(*args, **kwargs):
+        reads.append(args)
+        return get_daily_worked_time_data(*args, **kwargs)
+
+    monkeypatch.setattr(clocking, 'get_daily_worked_time_data', counted_get_daily_worked_time_data)
+    worked_time_cache.clear_worked_seconds()
+
+    yield reads
+
+    worked_time_cache.clear_worked_seconds()
+
+
+def get_week_worked_seconds():
+    with freezegun.freeze_time('2022-01-07 12:00:00'):
+        worked_seconds_per_day, _ = get_worked_seconds_per_day(USER_ID, '2022-01-03 00:00:00', '2022-01-07 12:00:00',
+                                                               'UTC')
+        days, _ = calculate_worked_time_per_day(USER_ID, '2022-01-03 00:00:00', '2022-01-07 12:00:00', 'UTC')
+
+    assert worked_seconds_per_day == {day: day_data['worked_seconds'] for day, day_data in days.items()}
+
+    return worked_seconds_per_day
+
+
+@pytest.mark.parametrize('clocking_data', [CLOCKING_DATA])
+def test_cached_ended_days(clocking_data, clock, rollup_reads):
+    get_week_worked_seconds()
+    get_week_worked_seconds()
+
+    assert len(rollup_reads) == 1
+
+    # Edit a past day: the worked time version changes, as it would for a write made by any other process
+    clock_item = get_clock_data_in_time_range(USER_ID, '2022-01-04 00:00:00', '2022-01-04 23:59:59')[0]
+    clock_item.date_time = '2022-01-04 20:00:00'
+    clock_item.update()
+
+    assert get_week_worked_seconds()['2022-01-04'] == 4 * 3600
+    assert len(rollup_reads) == 2
+
+
+@pytest.mark.parametrize('clocking_data', [CLOCKING_DATA])
+def test_rebuilt_rollups(clocking_data, clock, rollup_reads):
+    get_week_worked_seconds()
+    rebuild_daily_worked_time()
+
+    # The user does not have a worked time version until the next clock write, so the rollups are read every time
+    get_week_worked_seconds()
+    get_week_worked_seconds()
+
+    assert len(rollup_reads) == 3
+
+
+def test_least_recently_used_eviction(monkeypatch):
+    monkeypatch.setattr(worked_time_cache, 'WORKED_TIME_CACHE_SIZE', 2)
+    worked_time_cache.clear_worked_seconds()
+
+    worked_time_cache.set_worked_seconds(USER_ID, {'2022-01-03': 1, '2022-01-04': 2}, 'UTC', 10)
+    worked_time_cache.get_worked_seconds(USER_ID, ['2022-01-03'], 'UTC')
+    worked_time_cache.set_worked_seconds(USER_ID, {'2022-01-05': 3}, 'UTC', 10)
+
+    assert worked_time_cache.get_worked_seconds(USER_ID, ['2022-01-03', '2022-01-05'], 'UTC') == \
+        ({'2022-01-03': 1, '2022-01-05': 3}, 10)
+    assert worked_time_cache.get_worked_seconds(USER_ID, ['2022-01-04'], 'UTC') == (None, None)
+
+    # The days are cached by timezone, and the days cached with different versions are not used together
+    assert worked_time_cache.get_worked_seconds(USER_ID, ['2022-01-03'], 'Europe/Madrid') == (None, None)
+    worked_time_cache.set_worked_seconds(USER_ID, {'2022-01-05': 3}, 'UTC', 11)
+    assert worked_time_cache.get_worked_seconds(USER_ID, ['2022-01-03', '2022-01-05'], 'UTC') == (None, None)
+
+    worked_time_cache.clear_worked_seconds()
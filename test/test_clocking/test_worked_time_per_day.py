@@ -0,0 +1,104 @@
+import pytest
+import freezegun
+from datetime import datetime
+
+from clockzy.lib.clocking import get_worked_time_per_day, calculate_worked_time_per_day, get_worked_seconds_per_day, \
+                                 get_worked_seconds_per_month, calculate_worked_time
+from clockzy.lib.messages.slack_messages import build_time_history_message, build_clock_history_message, \
+                                            HISTORY_PERIODS_PER_BLOCK
+from clockzy.lib.models.clock import Clock
+from clockzy.lib.test_framework.database import no_intratime_user_parameters
+from clockzy.lib.utils.time import TimeContext
+
+
+def build_clocks(clocks):
+    return [Clock(no_intratime_user_parameters['id'], action, datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S'))
+            for action, date_time in clocks]
+
+
+test_parameters = [
+    ([], {'2022-01-03': 0, '2022-01-04': 0}),
+    ([('in', '2022-01-03 08:00:00'), ('pause', '2022-01-03 14:00:00'), ('return', '2022-01-03 15:00:00'),
+      ('out', '2022-01-03 17:30:00')], {'2022-01-03': 8.5 * 3600, '2022-01-04': 0}),
+    ([('in', '2022-01-03 22:00:00'), ('out', '2022-01-04 02:00:00')], {'2022-01-03': 7200, '2022-01-04': 7200}),
+    ([('in', '2022-01-02 20:00:00')], {'2022-01-03': 86400, '2022-01-04': 12 * 3600}),
+    ([('out', '2022-01-02 20:00:00'), ('in', '2022-01-04 08:00:00')], {'2022-01-03': 0, '2022-01-04': 4 * 3600})
+]
+test_ids = ['no_clocks', 'closed_day', 'across_midnight', 'open_since_previous_day', 'closed_before_range']
+
+
+@pytest.mark.parametrize('clocks, expected_worked_seconds', test_parameters, ids=test_ids)
+def test_get_worked_time_per_day(clocks, expected_worked_seconds):
+    days, total_worked_seconds = get_worked_time_per_day(build_clocks(clocks), '2022-01-03 00:00:00',
+                                                         '2022-01-04 12:00:00', '2022-01-04 12:00:00')
+
+    assert {day: day_data['worked_seconds'] for day, day_data in days.items()} == expected_worked_seconds
+    assert total_worked_seconds == sum(expected_worked_seconds.values())
+
+
+@pytest.mark.parametrize('clocking_data', [[
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'IN', 'date_time': '2022-01-02 20:00:00'},
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'OUT', 'date_time': '2022-01-03 02:00:00'},
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'IN', 'date_time': '2022-01-03 08:00:00'},
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'OUT', 'date_time': '2022-01-03 16:00:00'}
+]])
+def test_calculate_worked_time_per_day(clocking_data, clock):
+    days, total_worked_seconds = calculate_worked_time_per_day(no_intratime_user_parameters['id'],
+                                                               '2022-01-03 00:00:00', '2022-01-03 23:59:59')
+
+    assert [clock_item.action for clock_item in days['2022-01-03']['clocks']] == ['OUT', 'IN', 'OUT']
+    assert total_worked_seconds == 10 * 3600
+
+
+@pytest.mark.parametrize('clocking_data', [[
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'IN', 'date_time': '2022-01-31 08:00:00'},
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'OUT', 'date_time': '2022-01-31 16:00:00'},
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'IN', 'date_time': '2022-02-28 22:00:00'},
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'OUT', 'date_time': '2022-03-01 02:00:00'}
+]])
+def test_long_time_range(clocking_data, clock):
+    with freezegun.freeze_time('2022-05-17 10:00:00'):
+        worked_days, total_worked_seconds = get_worked_seconds_per_day(no_intratime_user_parameters['id'],
+                                                                       '2022-01-01 00:00:00', '2022-05-17 10:00:00',
+                                                                       'UTC')
+        worked_time = calculate_worked_time(no_intratime_user_parameters['id'], time_range='2022-01-01..2022-03-31',
+                                            timezone='UTC')
+
+    assert get_worked_seconds_per_month(worked_days) == {'2022-01': 8 * 3600, '2022-02': 2 * 3600,
+                                                         '2022-03': 2 * 3600, '2022-04': 0, '2022-05': 0}
+    assert total_worked_seconds == 12 * 3600 and worked_time == '12h 0m'
+
+
+@pytest.mark.parametrize('clocking_data', [[
+    {'user_id': no_intratime_user_parameters['id'], 'action': action, 'date_time': f"2022-01-{day} {hour}"}
+    for day in ('03', '04', '05', '06', '08') for action, hour in (('IN', '08:00:00'), ('OUT', '16:00:00'))
+]])
+def test_history_average(clocking_data, clock):
+    # Worked from Monday to Thursday and on Saturday (40h), the Friday is an absence
+    with freezegun.freeze_time('2022-01-10 10:00:00'):
+        time_context = TimeContext('UTC')
+        messages = [str(build_message(no_intratime_user_parameters['id'], '2022-01-03..2022-01-09', time_context))
+                    for build_message in (build_time_history_message, build_clock_history_message)]
+
+    # The average is per working day plus the worked non-working days (40h / 6 days), not per worked day (40h / 5)
+    for message in messages:
+        assert 'Worked days: *5* of *5* working days' in message
+        assert 'Average time: *6h 40m*' in message
+
+
+@pytest.mark.parametrize('clocking_data', [[
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'IN', 'date_time': '2022-01-03 08:00:00'},
+    {'user_id': no_intratime_user_parameters['id'], 'action': 'OUT', 'date_time': '2022-01-03 16:00:00'}
+]])
+@pytest.mark.parametrize('time_range, expected_periods', [('2022-01-01..2022-01-31', 31),
+                                                          ('2021-01-01..2022-12-31', 24)])
+def test_history_blocks(clocking_data, clock, time_range, expected_periods):
+    with freezegun.freeze_time('2023-01-10 10:00:00'):
+        blocks = build_time_history_message(no_intratime_user_parameters['id'], time_range, TimeContext('UTC'))
+
+    # The worked time of each day (or month) is split in several blocks, after the header and summary ones
+    period_blocks = [block['text']['text'] for block in blocks[4:]]
+
+    assert len(period_blocks) == -(-expected_periods // HISTORY_PERIODS_PER_BLOCK)
+    assert sum(period_block.count('\n') for period_block in period_blocks) == expected_periods
+    assert all(len(period_block) < 3000 for period_block in period_blocks)
@@ -0,0 +1,168 @@
+import asyncio
+import pytest
+from pymysql.err import OperationalError
+
+from clockzy.lib.db import aio, instrumentation, retry
+from clockzy.lib.models.clock import Clock
+from clockzy.lib.test_framework.database import intratime_user_parameters, config_parameters
+
+
+async def get_user_data(user_id):
+    return await asyncio.gather(aio.get_user_object(user_id), aio.get_config_object(user_id),
+                                aio.get_last_clock_from_user(user_id),
+                                aio.get_clock_data_in_time_range(user_id, '2022-01-03 00:00:00', '2022-01-03 23:59:59'))
+
+
+@pytest.mark.parametrize('user_parameters, config_parameters', [(intratime_user_parameters, config_parameters)])
+def test_concurrent_lookups(add_pre_user, add_pre_config, delete_post_user):
+    user_id = intratime_user_parameters['id']
+    Clock(user_id, 'in', '2022-01-03 08:00:00').save()
+    Clock(user_id, 'out', '2022-01-03 15:00:00').save()
+
+    user, config, last_clock, clocks = aio.run(get_user_data(user_id))
+
+    assert user.id == user_id and user.user_name == intratime_user_parameters['user_name']
+    assert config.time_zone == config_parameters['time_zone']
+    assert last_clock.action == 'out'
+    assert [clock.action for clock in clocks] == ['in', 'out']
+
+
+def test_missing_user_lookups():
+    user, config, last_clock, clocks = aio.run(get_user_data('not_registered_user'))
+
+    assert user is None and config is None and last_clock is None and clocks == []
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def execute(self, query, parameters):
+        self.pool.executions += 1
+
+        if self.pool.query_errors:
+            raise self.pool.query_errors.pop(0)
+
+    async def fetchall(self):
+        return [('user_id', 'user_name')]
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def cursor(self):
+        return FakeCursor(self.pool)
+
+
+class FakePool:
+    def __init__(self):
+        self.executions = 0
+        self.query_errors = []
+        self.closed = False
+
+    def acquire(self):
+        return FakeConnection(self)
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+class FakeAiomysql:
+    def __init__(self):
+        self.pools = []
+        self.creation_errors = []
+
+    async def create_pool(self, **kwargs):
+        await asyncio.sleep(0)
+
+        if self.creation_errors:
+            raise self.creation_errors.pop(0)
+
+        self.pools.append(FakePool())
+
+        return self.pools[-1]
+
+
+class FakeMySQLBackend:
+    name = 'mysql'
+
+
+@pytest.fixture
+def fake_aiomysql(monkeypatch):
+    """Run the asynchronous queries in fake aiomysql pools, retrying without waiting"""
+    fake_module = FakeAiomysql()
+    monkeypatch.setattr(aio, 'aiomysql', fake_module)
+    monkeypatch.setattr(aio, 'get_backend', lambda: FakeMySQLBackend())
+    monkeypatch.setattr(retry, 'get_backoff_delay', lambda attempt: 0)
+
+    return fake_module
+
+
+async def run_user_queries(num_queries):
+    return await asyncio.gather(*[aio.run_query('SELECT id, user_name FROM user WHERE id=%s', ('user_id',))
+                                  for _ in range(num_queries)])
+
+
+def test_shared_pool(fake_aiomysql):
+    results = aio.run(run_user_queries(3))
+
+    # Concurrent callers wait for the same pool creation, and the pool is closed with its event loop
+    assert results == [[('user_id', 'user_name')]] * 3
+    assert len(fake_aiomysql.pools) == 1 and fake_aiomysql.pools[0].closed
+    assert aio._pools == {}
+
+
+def test_failed_pool_creation(fake_aiomysql):
+    async def run_after_failed_creation():
+        fake_aiomysql.creation_errors.append(OperationalError(1045, 'Access denied'))
+
+        with pytest.raises(OperationalError):
+            await run_user_queries(2)
+
+        # The failed creation is not cached
+        assert aio._pools == {}
+
+        return await run_user_queries(1)
+
+    assert aio.run(run_after_failed_creation()) == [[('user_id', 'user_name')]]
+    assert len(fake_aiomysql.pools) == 1 and aio._pools == {}
+
+
+def test_query_retry(fake_aiomysql, monkeypatch):
+    async def run_failing_query(errors):
+        pool = await aio.get_pool()
+        pool.query_errors = errors
+
+        return await run_user_queries(1), pool.executions
+
+    monkeypatch.setattr(instrumentation, 'DB_INSTRUMENTATION', True)
+    instrumentation.start_request('aio')
+
+    try:
+        # The transient errors are retried, and all the attempts are measured
+        lost_connection = OperationalError(2013, 'Lost connection to MySQL server during query')
+        assert aio.run(run_failing_query([lost_connection])) == ([[('user_id', 'user_name')]], 2)
+        assert instrumentation.get_request_stats()['queries'] == 2
+        assert instrumentation.get_request_stats()['retries'] == 1
+
+        # The rest of errors are raised
+        with pytest.raises(OperationalError):
+            aio.run(run_failing_query([OperationalError(1054, "Unknown column 'user_name'")]))
+    finally:
+        instrumentation.end_request()
@@ -0,0 +1,125 @@
+import threading
+import pytest
+from pymysql.err import OperationalError
+
+from clockzy.lib.db.database import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.open = True
+        self.alive = True
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OperationalError(2006, 'MySQL server has gone away')
+
+    def close(self):
+        self.open = False
+
+
+class FakeBackend:
+    name = 'fake'
+
+    def __init__(self):
+        self.connections = []
+        self.fail = False
+
+    def connect(self, host, user, password, database_name, port):
+        if self.fail:
+            raise OperationalError(2003, "Can't connect to MySQL server")
+
+        self.connections.append(FakeConnection())
+
+        return self.connections[-1]
+
+
+@pytest.fixture
+def backend():
+    return FakeBackend()
+
+
+def get_pool(backend, **kwargs):
+    return ConnectionPool('localhost', 'root', 'password', 'clockzy', 3306, backend=backend, **kwargs)
+
+
+def test_checkout_and_release(backend):
+    pool = get_pool(backend, size=2)
+    connection = pool.get_connection()
+
+    assert pool.get_stats()['in_use'] == 1 and pool.get_stats()['idle'] == 0
+
+    pool.release_connection(connection)
+
+    assert pool.get_stats()['in_use'] == 0 and pool.get_stats()['idle'] == 1
+    # The idle connection is reused instead of opening a new one
+    assert pool.get_connection() is connection
+    assert pool.get_stats()['created'] == 1 and pool.get_stats()['checkouts'] == 2
+
+
+def test_recycled_connection(backend):
+    pool = get_pool(backend, recycle=60)
+    connection = pool.get_connection()
+    pool.release_connection(connection)
+    pool._creation_times[id(connection)] -= 61
+
+    new_connection = pool.get_connection()
+
+    assert new_connection is not connection and not connection.open
+    assert pool.get_stats()['recycled'] == 1 and pool.get_stats()['closed'] == 1 and pool.get_stats()['open'] == 1
+
+
+def test_pre_ping(backend):
+    pool = get_pool(backend)
+    connection = pool.get_connection()
+    pool.release_connection(connection)
+    connection.alive = False
+
+    assert pool.get_connection() is not connection
+    assert pool.get_stats()['failed_pings'] == 1 and pool.get_stats()['closed'] == 1
+
+    # Without pre-ping, the dead connection is handed out
+    pool = get_pool(backend, pre_ping=False)
+    connection = pool.get_connection()
+    pool.release_connection(connection)
+    connection.alive = False
+
+    assert pool.get_connection() is connection
+
+
+def test_exhausted_pool(backend):
+    pool = get_pool(backend, size=1, timeout=0.05)
+    connection = pool.get_connection()
+
+    with pytest.raises(OperationalError):
+        pool.get_connection()
+
+    assert pool.get_stats()['timeouts'] == 1
+
+    # A connection released while waiting is handed out
+    pool.timeout = 5
+    threading.Timer(0.05, pool.release_connection, (connection,)).start()
+
+    assert pool.get_connection() is connection
+    assert pool.get_stats()['created'] == 1
+
+
+def test_discarded_connections(backend):
+    pool = get_pool(backend, size=1, timeout=0.05)
+
+    # A failed connection does not take a slot of the pool
+    backend.fail = True
+    with pytest.raises(OperationalError):
+        pool.get_connection()
+
+    backend.fail = False
+    connection = pool.get_connection()
+    assert pool.get_stats()['open'] == 1
+
+    # A closed connection is not returned to the pool
+    connection.close()
+    pool.release_connection(connection)
+
+    assert pool.get_stats() == {'created': 1, 'closed': 1, 'checkouts': 1, 'recycled': 0, 'failed_pings': 0,
+                                'timeouts': 0, 'size': 1, 'open': 0, 'idle': 0, 'in_use': 0}
+    assert pool.get_connection() is backend.connections[-1] and len(backend.connections) == 2
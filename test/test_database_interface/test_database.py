@@ -0,0 +1,86 @@
+import pytest
+
+from clockzy.lib.db import instrumentation
+from clockzy.lib.db.database import Database, prepare_statement
+from clockzy.lib.test_framework.database import intratime_user_parameters
+
+
+USER_ID = intratime_user_parameters['id']
+ADD_CLOCK_QUERY = 'INSERT INTO clock (user_id, action, date_time, local_date_time) VALUES (%s, %s, %s, %s)'
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_query_result(add_pre_user, delete_post_user):
+    db = Database()
+
+    first_insert = db.run_query(ADD_CLOCK_QUERY, (USER_ID, 'IN', '2022-01-03 08:00:00', '2022-01-03 08:00:00'))
+    second_insert = db.run_query(ADD_CLOCK_QUERY, (USER_ID, 'OUT', '2022-01-03 16:00:00', '2022-01-03 16:00:00'))
+
+    assert first_insert.rowcount == second_insert.rowcount == 1
+    assert isinstance(first_insert.lastrowid, int) and second_insert.lastrowid > first_insert.lastrowid
+
+    # Affected rows of the UPDATE and DELETE statements, and returned rows of the SELECT ones
+    assert db.run_query('UPDATE clock SET action=%s WHERE user_id=%s', ('PAUSE', USER_ID)).rowcount == 2
+    assert db.run_query('DELETE FROM clock WHERE user_id=%s AND action=%s', (USER_ID, 'IN')).rowcount == 0
+
+    select_result = db.run_query('SELECT id, action FROM clock WHERE user_id=%s ORDER BY id', (USER_ID,))
+
+    assert select_result == [(first_insert.lastrowid, 'PAUSE'), (second_insert.lastrowid, 'PAUSE')]
+    assert select_result.rowcount == 2 and select_result.lastrowid is None
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_stream_query(add_pre_user, delete_post_user):
+    db = Database()
+    clocks_data = [(USER_ID, 'IN', f"2022-01-{day:02d} 08:00:00", '2022-02-01 08:00:00') for day in range(1, 11)]
+    db.run_many(ADD_CLOCK_QUERY, clocks_data)
+    in_use_connections = db.get_pool_stats()['in_use']
+
+    # More rows than the number of rows fetched at a time
+    rows = db.stream_query('SELECT date_time FROM clock WHERE user_id=%s ORDER BY date_time', (USER_ID,), batch_size=3)
+
+    assert [str(row[0]) for row in rows] == [date_time for _, _, date_time, _ in clocks_data]
+    assert db.get_pool_stats()['in_use'] == in_use_connections
+
+    # The connection is released when the generator is closed before the end
+    rows = db.stream_query('SELECT id FROM clock WHERE user_id=%s', (USER_ID,), batch_size=3)
+    next(rows)
+    assert db.get_pool_stats()['in_use'] == in_use_connections + 1
+
+    rows.close()
+    assert db.get_pool_stats()['in_use'] == in_use_connections
+
+    with pytest.raises(ValueError):
+        next(db.stream_query('DELETE FROM clock WHERE user_id=%s', (USER_ID,)))
+
+
+def test_multi_row_statement():
+    statement = prepare_statement('INSERT INTO config VALUES (%s, %s, %s) AS new ON DUPLICATE KEY UPDATE '
+                                  'time_zone=new.time_zone')
+
+    assert statement.get_multi_row_query(2) == 'INSERT INTO config VALUES (%s, %s, %s), (%s, %s, %s) AS new ' \
+                                               'ON DUPLICATE KEY UPDATE time_zone=new.time_zone'
+    # pymysql builds the multi-row statements of the queries without a row alias
+    assert prepare_statement('INSERT INTO config VALUES (%s, %s, %s)').multi_row_parts is None
+    assert prepare_statement('SELECT * FROM config WHERE user_id=%s').multi_row_parts is None
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_run_many_with_row_alias(add_pre_user, delete_post_user, monkeypatch):
+    db = Database()
+    upsert_query = 'INSERT INTO daily_worked_time VALUES (%s, %s, %s, %s) AS new ON DUPLICATE KEY UPDATE ' \
+                   'seconds=new.seconds, open_state=new.open_state'
+    monkeypatch.setattr(instrumentation, 'DB_INSTRUMENTATION', True)
+    instrumentation.start_request('run_many')
+
+    try:
+        # 5 rows in chunks of 2 rows are sent in 3 statements, inserting and then updating the rows
+        db.run_many(upsert_query, [(USER_ID, f"2022-01-0{day}", 3600, 0) for day in range(1, 6)], chunk_size=2)
+        db.run_many(upsert_query, [(USER_ID, f"2022-01-0{day}", 7200, 1) for day in range(1, 6)], chunk_size=2)
+
+        assert instrumentation.get_request_stats()['queries'] == 6
+    finally:
+        instrumentation.end_request()
+
+    assert db.run_query('SELECT COUNT(*), SUM(seconds), SUM(open_state) FROM daily_worked_time WHERE user_id=%s',
+                        (USER_ID,)) == [(5, 5 * 7200, 5)]
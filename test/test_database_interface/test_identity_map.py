@@ -0,0 +1,68 @@
+import pytest
+
+from clockzy.lib.db import database_interface, identity_map
+from clockzy.lib.db.database import transaction
+from clockzy.lib.models.clock import Clock
+from clockzy.lib.test_framework.database import intratime_user_parameters, config_parameters
+
+
+@pytest.fixture
+def request_queries(monkeypatch):
+    queries = []
+    run_query = database_interface.run_query
+
+    def counted_run_query(query, parameters=None):
+        queries.append(query)
+        return run_query(query, parameters)
+
+    monkeypatch.setattr(database_interface, 'run_query', counted_run_query)
+    identity_map.start_request()
+
+    yield queries
+
+    identity_map.end_request()
+
+
+@pytest.mark.parametrize('user_parameters, config_parameters', [(intratime_user_parameters, config_parameters)])
+def test_repeated_lookups(add_pre_user, add_pre_config, delete_post_user, request_queries):
+    user_id = intratime_user_parameters['id']
+
+    for _ in range(3):
+        user = database_interface.get_user_object(user_id)
+        config = database_interface.get_config_object(user_id)
+        last_clock = database_interface.get_last_clock_from_user(user_id)
+
+    assert user.user_name == intratime_user_parameters['user_name'] and last_clock is None
+    assert len(request_queries) == 3
+
+    # The callers get copies, so their unsaved changes are not seen by the next lookups
+    config.time_zone = 'America/New_York'
+    assert database_interface.get_config_object(user_id).time_zone == config_parameters['time_zone']
+
+
+@pytest.mark.parametrize('user_parameters, config_parameters', [(intratime_user_parameters, config_parameters)])
+def test_invalidation(add_pre_user, add_pre_config, delete_post_user, request_queries):
+    user_id = intratime_user_parameters['id']
+    config = database_interface.get_config_object(user_id)
+    database_interface.get_last_clock_from_user(user_id)
+
+    config.time_zone = 'America/New_York'
+    config.upsert()
+    Clock(user_id, 'in', '2022-01-03 08:00:00').save()
+
+    assert database_interface.get_config_object(user_id).time_zone == 'America/New_York'
+    assert database_interface.get_last_clock_from_user(user_id).action == 'in'
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_lookups_without_identity_map(add_pre_user, delete_post_user, request_queries):
+    user_id = intratime_user_parameters['id']
+
+    with transaction():
+        database_interface.get_user_object(user_id)
+        database_interface.get_user_object(user_id)
+
+    identity_map.end_request()
+    database_interface.get_user_object(user_id)
+
+    assert len(request_queries) == 3
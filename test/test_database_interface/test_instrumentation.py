@@ -0,0 +1,27 @@
+import pytest
+
+from clockzy.lib.db import instrumentation
+
+
+@pytest.mark.parametrize('query, expected_fingerprint', [
+    ('SELECT * FROM clock WHERE user_id=%s AND id IN (%s, %s, %s) LIMIT 1',
+     'SELECT * FROM clock WHERE user_id=? AND id IN (?+) LIMIT ?'),
+    ("SELECT  *\n FROM user WHERE user_name='test_user_1'", 'SELECT * FROM user WHERE user_name=?'),
+    ('INSERT INTO config VALUES (%s, %s, %s)', 'INSERT INTO config VALUES (?+)')
+])
+def test_fingerprint_query(query, expected_fingerprint):
+    assert instrumentation.fingerprint_query(query) == expected_fingerprint
+
+
+def test_request_stats():
+    instrumentation.start_request('/time-history')
+    instrumentation.record_query('SELECT * FROM user WHERE id=%s', 0.01, 1)
+    instrumentation.record_query('SELECT * FROM clock WHERE user_id=%s', 0.02, 10)
+
+    assert instrumentation.get_request_endpoint() == '/time-history'
+
+    stats = instrumentation.end_request()
+
+    assert stats['queries'] == 2 and stats['rows'] == 11 and stats['slow_queries'] == 0
+    assert stats['time'] == pytest.approx(0.03)
+    assert instrumentation.get_request_stats() is None
@@ -0,0 +1,70 @@
+import pytest
+
+from clockzy.lib.db import backends
+from clockzy.lib.db.database import Database
+from clockzy.scripts.initialize_database import MIGRATIONS, run_migrations, get_schema_version
+
+
+LAST_VERSION = MIGRATIONS[-1][0]
+
+
+@pytest.fixture
+def empty_database(tmp_path, monkeypatch):
+    """Database object of a new SQLite database file"""
+    monkeypatch.setattr(backends, '_backend', backends.SQLiteBackend(str(tmp_path / 'clockzy.db')))
+
+    # A new database name, so that its connections are taken from a new pool
+    yield Database(database_name=f"clockzy_{tmp_path.name}")
+
+
+def test_fresh_database(empty_database, capsys):
+    assert run_migrations(empty_database) == LAST_VERSION
+    assert [row[0] for row in empty_database.run_query('SELECT version FROM schema_version ORDER BY version')] == \
+        [version for version, _, _ in MIGRATIONS]
+    assert 'Applied migration 1' in capsys.readouterr().out
+
+    # Nothing to apply on the next runs
+    assert run_migrations(empty_database) == LAST_VERSION
+    assert empty_database.run_query('SELECT COUNT(*) FROM schema_version')[0][0] == len(MIGRATIONS)
+    assert capsys.readouterr().out == ''
+
+
+def test_resume_partially_applied_migration(empty_database):
+    run_migrations(empty_database, MIGRATIONS[:3])
+    empty_database.run_query("INSERT INTO user (id, user_name) VALUES ('U1', 'user_1'), ('U2', 'user_2')")
+    empty_database.run_query("INSERT INTO config VALUES ('U1', 0, 'Europe/Madrid'), ('U1', 1, NULL), "
+                             "('U2', 0, 'UTC')")
+    empty_database.run_query("INSERT INTO clock (user_id, action, date_time, local_date_time) VALUES "
+                             "('U1', 'IN', '2022-01-03 08:00:00', '2022-01-03 08:00:00'), "
+                             "('U1', 'PAUSE', '2022-01-03 14:00:00', '2022-01-03 14:00:00'), "
+                             "('U1', 'RETURN', '2022-01-03 15:00:00', '2022-01-03 15:00:00'), "
+                             "('U1', 'OUT', '2022-01-04 02:00:00', '2022-01-04 02:00:00'), "
+                             "('U2', 'IN', '2022-01-03 22:00:00', '2022-01-03 22:00:00')")
+
+    # The migration 4 was interrupted after deleting the duplicated configs, and the migration 5 never started
+    migration_4_statements = MIGRATIONS[3][2]
+    for statement in migration_4_statements[:3]:
+        empty_database.run_query(statement)
+
+    assert empty_database.run_query("SELECT COUNT(*) FROM config WHERE user_id='U1'")[0][0] == 0
+    assert get_schema_version(empty_database) == 3
+
+    assert run_migrations(empty_database) == LAST_VERSION
+    assert sorted(empty_database.run_query('SELECT user_id, intratime_integration, time_zone FROM config')) == \
+        [('U1', 1, 'Europe/Madrid'), ('U2', 0, 'UTC')]
+    assert sorted((user_id, str(day), seconds, open_state) for user_id, day, seconds, open_state in
+                  empty_database.run_query('SELECT user_id, day, seconds, open_state FROM daily_worked_time')) == \
+        [('U1', '2022-01-03', 15 * 3600, 1), ('U1', '2022-01-04', 2 * 3600, 0), ('U2', '2022-01-03', 2 * 3600, 1)]
+
+    # The data migrations can be run again without changing the result
+    for statement in migration_4_statements + MIGRATIONS[4][2][1:]:
+        if callable(statement):
+            empty_database.connect()
+            with empty_database.database_connection.cursor() as cursor:
+                statement(cursor)
+            empty_database.close_connection()
+        elif not statement.startswith('CREATE'):
+            empty_database.run_query(statement)
+
+    assert empty_database.run_query('SELECT COUNT(*) FROM config')[0][0] == 2
+    assert empty_database.run_query('SELECT SUM(seconds) FROM daily_worked_time')[0][0] == 19 * 3600
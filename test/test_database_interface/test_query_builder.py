@@ -0,0 +1,40 @@
+import pytest
+
+from clockzy.lib.db.query_builder import Query
+
+
+test_parameters = [
+    (Query('user'), 'SELECT * FROM user', ()),
+    (Query('user').select('id', 'user_name').where('id', 'test_user_1').limit(1),
+     'SELECT id, user_name FROM user WHERE id = %s LIMIT 1', ('test_user_1',)),
+    (Query('clock').where_equal({'user_id': 'test_user_1', 'action': 'in'}).order_by('id', descending=True),
+     'SELECT * FROM clock WHERE user_id = %s AND action = %s ORDER BY id DESC', ('test_user_1', 'in')),
+    (Query('clock').where_between('date_time', '2022-01-01 00:00:00', '2022-01-31 23:59:59').order_by('date_time')
+     .order_by('id'), 'SELECT * FROM clock WHERE date_time BETWEEN %s AND %s ORDER BY date_time ASC, id ASC',
+     ('2022-01-01 00:00:00', '2022-01-31 23:59:59')),
+    (Query('clock').where_in('action', ['in', 'return']).where('date_time', '2022-01-01', 'like'),
+     'SELECT * FROM clock WHERE action IN (%s, %s) AND date_time LIKE %s', ('in', 'return', '2022-01-01')),
+    (Query('clock').where_in('action', []), 'SELECT * FROM clock WHERE 1=0', ()),
+    (Query('user').select('id').where('id', 'test_user_1').for_update(),
+     'SELECT id FROM user WHERE id = %s FOR UPDATE', ('test_user_1',))
+]
+test_ids = ['all_rows', 'projection_and_limit', 'equal_and_order', 'range', 'in_list_and_like', 'empty_in_list',
+            'locking_read']
+
+
+@pytest.mark.parametrize('query, expected_query, expected_parameters', test_parameters, ids=test_ids)
+def test_build(query, expected_query, expected_parameters):
+    assert query.build() == (expected_query, expected_parameters)
+
+
+def test_build_exists():
+    query = Query('alias').select('id').where('alias', 'test').order_by('id')
+
+    assert query.build_exists() == ('SELECT EXISTS(SELECT 1 FROM alias WHERE alias = %s LIMIT 1)', ('test',))
+
+
+@pytest.mark.parametrize('table_name, column, operator', [('user; DROP TABLE user', 'id', '='),
+                                                          ('user', 'id=id OR 1', '='), ('user', 'id', 'OR')])
+def test_invalid_query(table_name, column, operator):
+    with pytest.raises(ValueError):
+        Query(table_name).where(column, 'test', operator)
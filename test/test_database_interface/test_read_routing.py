@@ -0,0 +1,38 @@
+import pytest
+
+from clockzy.lib.db.database import get_read_database, pin_to_primary, prepare_statement
+from clockzy.config.settings import DB_HOST, DB_PORT
+
+
+replicas = [('replica-1', 3307), ('replica-2', 3308)]
+
+
+def test_reads_are_balanced_between_replicas():
+    hosts = {(database.host, database.port) for database in [get_read_database(replicas) for _ in range(4)]}
+
+    assert hosts == set(replicas)
+
+
+def test_reads_without_replicas_go_to_primary():
+    database = get_read_database([])
+
+    assert (database.host, database.port) == (DB_HOST, DB_PORT)
+
+
+def test_pinned_reads_go_to_primary():
+    with pin_to_primary():
+        with pin_to_primary():
+            database = get_read_database(replicas)
+        assert (database.host, database.port) == (DB_HOST, DB_PORT)
+        assert (get_read_database(replicas).host, get_read_database(replicas).port) == (DB_HOST, DB_PORT)
+
+    assert get_read_database(replicas).host != DB_HOST
+
+
+@pytest.mark.parametrize('query, expected_result', [('SELECT id FROM user WHERE id=%s', False),
+                                                    ('SELECT id FROM user WHERE id=%s FOR UPDATE', True),
+                                                    ('SELECT id FROM user WHERE id=%s for share', True),
+                                                    ('SELECT id FROM user LOCK IN SHARE MODE', True),
+                                                    ('UPDATE user SET user_name=%s WHERE id=%s', False)])
+def test_locking_reads(query, expected_result):
+    assert prepare_statement(query).is_locking_read == expected_result
@@ -0,0 +1,81 @@
+import pytest
+from pymysql.err import OperationalError, IntegrityError
+
+from clockzy.lib.db import instrumentation, retry
+from clockzy.lib.db.database import run_in_transaction
+from clockzy.config.settings import DB_RETRY_BUDGET, DB_RETRY_MAX_ATTEMPTS
+
+
+DEADLOCK_ERROR = OperationalError(1213, 'Deadlock found when trying to get lock')
+CONNECTION_LOST_ERROR = OperationalError(2013, 'Lost connection to MySQL server during query')
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(retry.time, 'sleep', lambda delay: None)
+
+
+@pytest.mark.parametrize('error, is_select, transient, replayable', [
+    (DEADLOCK_ERROR, False, True, True),
+    (CONNECTION_LOST_ERROR, False, True, False),
+    (CONNECTION_LOST_ERROR, True, True, True),
+    (OperationalError(2003, "Can't connect to MySQL server"), False, True, True),
+    (IntegrityError(1062, 'Duplicate entry'), False, False, False),
+    (ValueError('Not a database error'), False, False, False)
+])
+def test_error_classification(error, is_select, transient, replayable):
+    assert retry.is_transient_error(error) == transient
+    assert retry.is_replayable_statement_error(error, is_select) == replayable
+
+
+def test_ambiguous_commit_error():
+    assert retry.is_ambiguous_commit_error(retry.CommitError(2013, 'Lost connection'))
+    assert not retry.is_ambiguous_commit_error(retry.CommitError(1213, 'Deadlock'))
+    assert not retry.is_ambiguous_commit_error(CONNECTION_LOST_ERROR)
+
+
+@pytest.mark.parametrize('attempt', [1, 2, 5, 20])
+def test_backoff_delay(attempt):
+    max_delay = min(retry.DB_RETRY_MAX_DELAY, retry.DB_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+    assert 0 <= retry.get_backoff_delay(attempt) <= max_delay
+
+
+def test_retry_attempts(no_backoff):
+    assert retry.retry_after_error(DEADLOCK_ERROR, DB_RETRY_MAX_ATTEMPTS)
+    assert not retry.retry_after_error(DEADLOCK_ERROR, DB_RETRY_MAX_ATTEMPTS + 1)
+    assert not retry.retry_after_error(IntegrityError(1062, 'Duplicate entry'), 1)
+
+
+def test_request_retry_budget(no_backoff):
+    instrumentation.start_request('/clock')
+    retries = [retry.retry_after_error(DEADLOCK_ERROR, 1) for _ in range(DB_RETRY_BUDGET + 1)]
+    stats = instrumentation.end_request()
+
+    assert retries == [True] * DB_RETRY_BUDGET + [False]
+    assert stats['retries'] == DB_RETRY_BUDGET
+
+
+def test_run_in_transaction_replay(no_backoff):
+    calls = []
+
+    def deadlocked_operation():
+        calls.append(1)
+        if len(calls) == 1:
+            raise DEADLOCK_ERROR
+        return len(calls)
+
+    assert run_in_transaction(deadlocked_operation) == 2
+
+
+def test_run_in_transaction_no_replay(no_backoff):
+    calls = []
+
+    def failed_operation():
+        calls.append(1)
+        raise IntegrityError(1062, 'Duplicate entry')
+
+    with pytest.raises(IntegrityError):
+        run_in_transaction(failed_operation)
+
+    assert len(calls) == 1
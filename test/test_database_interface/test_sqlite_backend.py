@@ -0,0 +1,30 @@
+import pytest
+
+from clockzy.lib.db.backends import translate_query_to_sqlite
+from clockzy.lib.db.db_schema import CLOCK_TABLE_SCHEMA
+
+
+test_parameters = [
+    ('SELECT * FROM clock WHERE user_id=%s AND action LIKE %s',
+     'SELECT * FROM clock WHERE user_id=? AND action LIKE ?'),
+    ("SELECT * FROM clock WHERE date_time LIKE '2022%%'", "SELECT * FROM clock WHERE date_time LIKE '2022%'"),
+    ('SELECT id FROM user WHERE id=%s FOR UPDATE', 'SELECT id FROM user WHERE id=?'),
+    ('INSERT INTO config VALUES (%s, %s, %s) AS new ON DUPLICATE KEY UPDATE time_zone=new.time_zone',
+     'INSERT INTO config VALUES (?, ?, ?) ON CONFLICT DO UPDATE SET time_zone=excluded.time_zone'),
+    ('INSERT IGNORE INTO config SELECT * FROM config_deduplication',
+     'INSERT OR IGNORE INTO config SELECT * FROM config_deduplication')
+]
+test_ids = ['placeholders', 'escaped_percent', 'locking_read', 'upsert', 'insert_ignore']
+
+
+@pytest.mark.parametrize('query, expected_query', test_parameters, ids=test_ids)
+def test_translate_query_to_sqlite(query, expected_query):
+    assert translate_query_to_sqlite(query) == expected_query
+
+
+def test_translate_table_schema_to_sqlite():
+    query = translate_query_to_sqlite(CLOCK_TABLE_SCHEMA)
+
+    assert 'id INTEGER PRIMARY KEY AUTOINCREMENT' in query
+    assert 'PRIMARY KEY (id)' not in query
+    assert 'Engine' not in query
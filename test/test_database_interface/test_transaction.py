@@ -0,0 +1,145 @@
+import threading
+import pytest
+from pymysql.err import OperationalError
+
+from clockzy.lib.db.database import transaction, in_transaction, on_commit, Database
+from clockzy.lib.db.database_interface import lock_user, run_query, item_exists
+from clockzy.lib.db.db_schema import CLOCK_TABLE
+from clockzy.lib.test_framework.database import intratime_user_parameters
+
+
+USER_ID = intratime_user_parameters['id']
+ADD_CLOCK_QUERY = 'INSERT INTO clock (user_id, action, date_time, local_date_time) VALUES (%s, %s, %s, %s)'
+
+
+def add_clock(date_time):
+    run_query(ADD_CLOCK_QUERY, (USER_ID, 'IN', date_time, date_time))
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_commit(add_pre_user, delete_post_user):
+    in_use_connections = Database().get_pool_stats()['in_use']
+
+    with transaction():
+        assert in_transaction()
+        add_clock('2022-01-03 08:00:00')
+
+        # Nested blocks join the outermost transaction
+        with transaction():
+            add_clock('2022-01-03 09:00:00')
+
+    assert not in_transaction()
+    assert item_exists({'user_id': USER_ID, 'date_time': '2022-01-03 08:00:00'}, CLOCK_TABLE)
+    assert item_exists({'user_id': USER_ID, 'date_time': '2022-01-03 09:00:00'}, CLOCK_TABLE)
+    # The transaction connection is returned to the pool
+    assert Database().get_pool_stats()['in_use'] == in_use_connections
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_rollback(add_pre_user, delete_post_user):
+    with pytest.raises(RuntimeError):
+        with transaction():
+            add_clock('2022-01-03 08:00:00')
+
+            with transaction():
+                add_clock('2022-01-03 09:00:00')
+
+            raise RuntimeError('Error after the writes')
+
+    assert not in_transaction()
+    assert not item_exists({'user_id': USER_ID}, CLOCK_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_on_commit(add_pre_user, delete_post_user):
+    calls = []
+
+    # Run immediately outside a transaction
+    on_commit(lambda: calls.append('no transaction'))
+    assert calls == ['no transaction']
+
+    with transaction():
+        on_commit(lambda: calls.append('committed'))
+        assert calls == ['no transaction']
+
+    assert calls == ['no transaction', 'committed']
+
+    # Discarded when the transaction is rolled back, also for the next transactions
+    with pytest.raises(RuntimeError):
+        with transaction():
+            on_commit(lambda: calls.append('rolled back'))
+            raise RuntimeError('rollback')
+
+    with transaction():
+        pass
+
+    assert calls == ['no transaction', 'committed']
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_failed_commit(add_pre_user, delete_post_user, monkeypatch):
+    calls = []
+
+    with pytest.raises(OperationalError):
+        with transaction() as database:
+            add_clock('2022-01-03 08:00:00')
+            on_commit(lambda: calls.append('committed'))
+
+            def failed_commit():
+                raise OperationalError(1213, 'Deadlock found when trying to get lock')
+
+            monkeypatch.setattr(database.database_connection, 'commit', failed_commit)
+
+    assert calls == []
+    assert not item_exists({'user_id': USER_ID}, CLOCK_TABLE)
+
+
+def test_failed_begin(monkeypatch):
+    pool_stats = Database().get_pool_stats()
+    connect = Database.connect
+
+    def failed_begin():
+        raise OperationalError(2013, 'Lost connection to MySQL server during query')
+
+    def connect_with_failed_begin(self):
+        connect(self)
+        monkeypatch.setattr(self.database_connection, 'begin', failed_begin)
+
+    monkeypatch.setattr(Database, 'connect', connect_with_failed_begin)
+
+    with pytest.raises(OperationalError):
+        with transaction():
+            pass
+
+    # The connection is discarded instead of leaking its pool slot
+    assert not in_transaction()
+    assert Database().get_pool_stats()['in_use'] == pool_stats['in_use']
+    assert Database().get_pool_stats()['closed'] == pool_stats['closed'] + 1
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_lock_user(add_pre_user, delete_post_user):
+    events = []
+    user_locked = threading.Event()
+
+    def concurrent_transaction():
+        user_locked.wait()
+
+        with transaction():
+            lock_user(USER_ID)
+            events.append('second transaction')
+
+    thread = threading.Thread(target=concurrent_transaction)
+    thread.start()
+
+    with transaction():
+        assert lock_user(USER_ID)
+        assert not lock_user('unknown_user')
+        user_locked.set()
+        # The other transaction waits for this one to end
+        thread.join(0.2)
+        events.append('first transaction')
+
+    thread.join()
+
+    assert events == ['first transaction', 'second transaction']
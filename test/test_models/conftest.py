@@ -1,6 +1,30 @@
+import pytest
+
+from clockzy.lib.db import instrumentation
+from clockzy.lib.db.database import Database
 from clockzy.lib.test_framework.database import clean_test_data
 
 
+BULK_CHUNK_SIZE = 2
+
+
 def pytest_sessionfinish():
     """Run this method when the test session ends"""
     clean_test_data()
+
+
+@pytest.fixture
+def count_bulk_statements(monkeypatch):
+    """Send the bulk operations in chunks of BULK_CHUNK_SIZE items, and count the statements sent to the database"""
+    run_many = Database.run_many
+
+    def run_many_in_small_chunks(self, query, parameters_list):
+        return run_many(self, query, parameters_list, chunk_size=BULK_CHUNK_SIZE)
+
+    monkeypatch.setattr(Database, 'run_many', run_many_in_small_chunks)
+    monkeypatch.setattr(instrumentation, 'DB_INSTRUMENTATION', True)
+    instrumentation.start_request('bulk_save')
+
+    yield lambda: instrumentation.get_request_stats()['queries']
+
+    instrumentation.end_request()
@@ -4,7 +4,7 @@ from clockzy.lib.models.alias import Alias
 from clockzy.lib.db.database_interface import item_exists
 from clockzy.lib.test_framework.database import intratime_user_parameters, alias_parameters
 from clockzy.lib.db.db_schema import ALIAS_TABLE
-from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, OPERATION_ERROR
 
 
 # Pytest tierdown fixture is executed from righ to left position
@@ -48,3 +48,27 @@ def test_delete_alias(add_pre_user, add_pre_alias, delete_post_user):
 
     # Query and check that the alias does not exist
     assert not item_exists({'id': test_alias.id}, ALIAS_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+@pytest.mark.parametrize('num_aliases, num_statements', [(4, 2), (5, 3)])
+def test_bulk_save_alias(add_pre_user, delete_post_user, count_bulk_statements, num_aliases, num_statements):
+    test_aliases = [Alias(intratime_user_parameters['id'], f"bulk_alias_{index}") for index in range(num_aliases)]
+
+    # Add all the aliases with a multi-row INSERT statement per chunk
+    assert Alias.bulk_save(test_aliases) == SUCCESS
+    assert count_bulk_statements() == num_statements
+
+    for test_alias in test_aliases:
+        assert item_exists({'user_id': test_alias.user_id, 'alias': test_alias.alias}, ALIAS_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_bulk_save_alias_rollback(add_pre_user, delete_post_user, count_bulk_statements):
+    # The last chunk fails (duplicated alias), so the previous chunks are rolled back
+    test_aliases = [Alias(intratime_user_parameters['id'], f"bulk_alias_{index}") for index in range(4)] + \
+        [Alias(intratime_user_parameters['id'], 'bulk_alias_0')]
+
+    assert Alias.bulk_save(test_aliases) == OPERATION_ERROR
+    assert count_bulk_statements() == 3
+    assert not item_exists({'user_id': intratime_user_parameters['id']}, ALIAS_TABLE)
@@ -1,7 +1,7 @@
 import pytest
 
 from clockzy.lib.models.clock import Clock
-from clockzy.lib.db.database_interface import item_exists
+from clockzy.lib.db.database_interface import item_exists, get_clock_object
 from clockzy.lib.test_framework.database import intratime_user_parameters, clock_parameters
 from clockzy.lib.db.db_schema import CLOCK_TABLE
 from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS
@@ -16,6 +16,10 @@ def test_save_clock(add_pre_user, delete_post_user, delete_post_clock):
     assert test_clock.save() == SUCCESS
     clock_parameters['id'] = test_clock.id
 
+    # The generated identifier is loaded into the object
+    assert isinstance(test_clock.id, int) and test_clock.id > 0
+    assert str(get_clock_object(test_clock.id).date_time) == test_clock.date_time
+
     # If we try to add the same CLOCK, check that it can not be inserted
     assert test_clock.save() == ITEM_ALREADY_EXISTS
 
@@ -48,3 +52,18 @@ def test_delete_clock(add_pre_user, add_pre_clock, delete_post_user):
 
     # Query and check that the clock does not exist
     assert not item_exists({'id': test_clock.id}, CLOCK_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_bulk_save_clock(add_pre_user, delete_post_user):
+    clocks_data = [('IN', '2022-01-03 08:00:00'), ('PAUSE', '2022-01-03 14:00:00'), ('RETURN', '2022-01-03 15:00:00'),
+                   ('OUT', '2022-01-03 18:00:00')]
+    test_clocks = [Clock(intratime_user_parameters['id'], action, date_time) for action, date_time in clocks_data]
+
+    # Add all the clocks in a single operation
+    assert Clock.bulk_save(test_clocks) == SUCCESS
+
+    # Query and check that all the clocks exist
+    for action, date_time in clocks_data:
+        assert item_exists({'user_id': intratime_user_parameters['id'], 'action': action, 'date_time': date_time},
+                           CLOCK_TABLE)
@@ -4,7 +4,7 @@ from clockzy.lib.models.command_history import CommandHistory
 from clockzy.lib.db.database_interface import item_exists
 from clockzy.lib.test_framework.database import intratime_user_parameters, command_history_parameters
 from clockzy.lib.db.db_schema import COMMANDS_HISTORY_TABLE
-from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, OPERATION_ERROR
 
 
 # Pytest tierdown fixture is executed from righ to left position
@@ -51,3 +51,31 @@ def test_delete_command_history(add_pre_user, add_pre_command_history, delete_po
 
     # Query and check that the command_history does not exist
     assert not item_exists({'id': test_command_history.id}, COMMANDS_HISTORY_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+@pytest.mark.parametrize('num_commands, num_statements', [(4, 2), (5, 3)])
+def test_bulk_save_command_history(add_pre_user, delete_post_user, count_bulk_statements, num_commands,
+                                   num_statements):
+    test_commands = [CommandHistory(intratime_user_parameters['id'], '/time', 'today', f"2022-01-03 08:0{index}:00")
+                     for index in range(num_commands)]
+
+    # Add all the command history items with a multi-row INSERT statement per chunk
+    assert CommandHistory.bulk_save(test_commands) == SUCCESS
+    assert count_bulk_statements() == num_statements
+
+    for test_command in test_commands:
+        assert item_exists({'user_id': test_command.user_id, 'date_time': test_command.date_time},
+                           COMMANDS_HISTORY_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_bulk_save_command_history_rollback(add_pre_user, delete_post_user, count_bulk_statements):
+    # The last chunk fails (command without name), so the previous chunks are rolled back
+    test_commands = [CommandHistory(intratime_user_parameters['id'], '/time', 'today', f"2022-01-03 08:0{index}:00")
+                     for index in range(4)] + [CommandHistory(intratime_user_parameters['id'], None, 'today',
+                                                              '2022-01-03 09:00:00')]
+
+    assert CommandHistory.bulk_save(test_commands) == OPERATION_ERROR
+    assert count_bulk_statements() == 3
+    assert not item_exists({'user_id': intratime_user_parameters['id']}, COMMANDS_HISTORY_TABLE)
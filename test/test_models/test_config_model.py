@@ -4,7 +4,7 @@ from clockzy.lib.models.config import Config
 from clockzy.lib.db.database_interface import item_exists
 from clockzy.lib.test_framework.database import intratime_user_parameters, config_parameters
 from clockzy.lib.db.db_schema import CONFIG_TABLE
-from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
 
 
 # Pytest tierdown fixture is executed from righ to left position
@@ -30,10 +30,22 @@ def test_update_config(add_pre_user, add_pre_config, delete_post_user, delete_po
     test_config.intratime_integration = True
     assert test_config.update() == SUCCESS
 
+    # The matched row is reported even if no value changes
+    assert test_config.update() == SUCCESS
+
     # Query and check that the config exist
     assert item_exists({'user_id': test_config.user_id, 'intratime_integration': True}, CONFIG_TABLE)
 
 
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_update_missing_config(add_pre_user, delete_post_user):
+    test_config = Config(**config_parameters)
+
+    # Unlike upsert, update does not create the config if it does not exist
+    assert test_config.update() == ITEM_NOT_EXISTS
+    assert not item_exists({'user_id': test_config.user_id}, CONFIG_TABLE)
+
+
 @pytest.mark.parametrize('user_parameters, config_parameters', [(intratime_user_parameters, config_parameters)])
 def test_delete_config(add_pre_user, add_pre_config, delete_post_user):
     test_config = Config(**config_parameters)
@@ -43,3 +55,18 @@ def test_delete_config(add_pre_user, add_pre_config, delete_post_user):
 
     # Query and check that the config does not exist
     assert not item_exists({'user_id': test_config.user_id}, CONFIG_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters, config_parameters', [(intratime_user_parameters, config_parameters)])
+def test_upsert_config(add_pre_user, delete_post_user, delete_post_config):
+    test_config = Config(**config_parameters)
+
+    # Insert the config when it does not exist
+    assert test_config.upsert() == SUCCESS
+    assert item_exists({'user_id': test_config.user_id}, CONFIG_TABLE)
+
+    # Replace the config when it already exists, and upsert it again without changes
+    test_config.intratime_integration = True
+    assert test_config.upsert() == SUCCESS
+    assert test_config.upsert() == SUCCESS
+    assert item_exists({'user_id': test_config.user_id, 'intratime_integration': True}, CONFIG_TABLE)
@@ -46,3 +46,19 @@ def test_delete_config(credentials_parameters, add_pre_user, add_pre_temporary_c
 
     # Query and check that the config does not exist
     assert not item_exists({'user_id': test_temporary_credentials.user_id}, TEMPORARY_CREDENTIALS_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters, credentials_parameters',
+                         [(intratime_user_parameters, temporary_credentials_parameters)])
+def test_upsert_temporary_credentials(credentials_parameters, add_pre_user, delete_post_user):
+    test_temporary_credentials = TemporaryCredentials(**credentials_parameters)
+
+    # Insert the credentials when they do not exist
+    assert test_temporary_credentials.upsert() == SUCCESS
+    assert item_exists({'user_id': test_temporary_credentials.user_id}, TEMPORARY_CREDENTIALS_TABLE)
+
+    # Replace the credentials when they already exist
+    test_temporary_credentials.password = 'upserted_password'
+    assert test_temporary_credentials.upsert() == SUCCESS
+    assert item_exists({'user_id': test_temporary_credentials.user_id, 'password': 'upserted_password'},
+                       TEMPORARY_CREDENTIALS_TABLE)
@@ -5,7 +5,7 @@ from clockzy.lib.models.user import User
 from clockzy.lib.db.database_interface import item_exists
 from clockzy.lib.test_framework.database import intratime_user_parameters, no_intratime_user_parameters
 from clockzy.lib.db.db_schema import USER_TABLE
-from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS
+from clockzy.lib.handlers.codes import SUCCESS, ITEM_ALREADY_EXISTS, ITEM_NOT_EXISTS
 
 
 @pytest.mark.parametrize('user_parameters', [intratime_user_parameters, no_intratime_user_parameters])
@@ -31,6 +31,9 @@ def test_update_user(user_parameters, add_pre_user, delete_post_user):
     test_user.user_name = user_name_updated
     assert test_user.update() == SUCCESS
 
+    # The matched row is reported even if no value changes
+    assert test_user.update() == SUCCESS
+
     # Query and check that the user exist
     assert item_exists({'id': test_user.id, 'user_name': user_name_updated}, USER_TABLE)
 
@@ -44,3 +47,31 @@ def test_delete_user(user_parameters, add_pre_user):
 
     # Query and check that the user does not exist
     assert not item_exists({'id': test_user.id}, USER_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_upsert_user(user_parameters, delete_post_user):
+    test_user = User(**user_parameters)
+
+    # Insert the user when it does not exist
+    assert test_user.upsert() == SUCCESS
+    assert item_exists({'id': test_user.id, 'user_name': test_user.user_name}, USER_TABLE)
+
+    # Replace the user data when it already exists, keeping its entry_data
+    test_user.user_name = 'user_name_updated'
+    test_user.entry_data = '2000-01-01 00:00:00'
+    assert test_user.upsert() == SUCCESS
+    assert item_exists({'id': test_user.id, 'user_name': 'user_name_updated'}, USER_TABLE)
+    assert not item_exists({'id': test_user.id, 'entry_data': '2000-01-01 00:00:00'}, USER_TABLE)
+
+
+@pytest.mark.parametrize('user_parameters', [intratime_user_parameters])
+def test_update_deleted_user(user_parameters, add_pre_user, delete_post_user):
+    test_user = User(**user_parameters)
+    test_user.delete()
+
+    # Unlike upsert, update does not create again a user deleted in the meantime
+    test_user.user_name = 'user_name_updated'
+    assert test_user.update() == ITEM_NOT_EXISTS
+
+    assert not item_exists({'id': test_user.id}, USER_TABLE)
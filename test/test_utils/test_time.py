@@ -0,0 +1,110 @@
+import pytest
+import freezegun
+from datetime import date, datetime
+
+from clockzy.lib.utils import time
+
+
+test_parameters = ['1970-01-01 00:00:00', '2022-01-03 08:30:15', '2022-02-28 23:59:59', '2024-02-29 12:00:00',
+                   '1969-12-31 23:00:00']
+
+
+@pytest.mark.parametrize('date_time', test_parameters)
+def test_epoch_seconds(date_time):
+    date_time_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
+    epoch_seconds = time.get_epoch_seconds(date_time)
+
+    assert epoch_seconds == int((date_time_object - datetime(1970, 1, 1)).total_seconds())
+    assert time.get_epoch_seconds(date_time_object) == time.get_epoch_seconds(epoch_seconds) == epoch_seconds
+    assert time.epoch_to_datetime(epoch_seconds) == date_time_object
+    assert time.epoch_to_str(epoch_seconds) == date_time
+
+
+@pytest.mark.parametrize('date_time', test_parameters)
+def test_day_index(date_time):
+    day_index = time.get_day_index(time.get_epoch_seconds(date_time))
+
+    assert time.day_index_to_str(day_index) == date_time.split(' ')[0]
+    assert time.epoch_to_str(time.get_day_start(day_index)) == f"{date_time.split(' ')[0]} 00:00:00"
+    assert time.get_epoch_seconds(date.fromisoformat(date_time.split(' ')[0])) == time.get_day_start(day_index)
+
+
+def test_day_starts():
+    day_starts = time.get_day_starts(time.get_epoch_seconds('2022-02-27 18:00:00'),
+                                     time.get_epoch_seconds('2022-03-01 00:00:00'))
+
+    assert [time.epoch_to_str(day_start) for day_start in day_starts] == \
+        ['2022-02-27 00:00:00', '2022-02-28 00:00:00', '2022-03-01 00:00:00']
+
+
+def test_get_time_difference():
+    assert time.get_time_difference('2022-01-03 08:00:00', '2022-01-04 09:30:00') == 91800
+    assert time.get_time_difference('2022-01-03 08:00:00', '2022-01-04 09:30:00', time.HOURS) == 25
+    assert time.get_time_difference('2022-01-04 09:30:00', '2022-01-03 08:00:00', time.DAYS) == -1
+
+
+@pytest.mark.parametrize('time_range, expected_limits', [
+    ('today', ('2022-05-17 00:00:00', '2022-05-17 10:00:00')),
+    ('quarter', ('2022-04-01 00:00:00', '2022-05-17 10:00:00')),
+    ('year', ('2022-01-01 00:00:00', '2022-05-17 10:00:00')),
+    ('2022-01-01..2022-03-31', ('2022-01-01 00:00:00', '2022-03-31 23:59:59')),
+    ('2022-05-01..2022-12-31', ('2022-05-01 00:00:00', '2022-05-17 10:00:00')),
+    ('2020-05-18..2022-05-17', ('2020-05-18 00:00:00', '2022-05-17 10:00:00'))
+])
+def test_time_range_limits(time_range, expected_limits):
+    with freezegun.freeze_time('2022-05-17 10:00:00'):
+        assert time.is_valid_time_range(time_range)
+        assert (time.get_lower_time_from_time_range(time_range, 'UTC'),
+                time.get_upper_time_from_time_range(time_range, 'UTC')) == expected_limits
+
+
+@pytest.mark.parametrize('time_range', ['decade', '2022-01-01', '2022-03-31..2022-01-01', '2022-01-01..2022-02-30',
+                                        '2022-01-01..2022-02-01..2022-03-01', '0001-01-01..0001-02-01',
+                                        '1999-12-31..2000-01-31', '2019-01-01..2022-01-01', '2022-05-19..2022-05-31'])
+def test_invalid_time_range(time_range):
+    with freezegun.freeze_time('2022-05-17 10:00:00'):
+        assert not time.is_valid_time_range(time_range)
+
+
+def test_future_time_range():
+    # The range has already started in the UTC+14 timezone, but not in the user one
+    with freezegun.freeze_time('2022-05-17 12:00:00'):
+        assert time.is_valid_time_range('2022-05-18..2022-05-31')
+        assert time.TimeContext('UTC').get_upper_time('2022-05-18..2022-05-31') == '2022-05-18 00:00:00'
+
+
+def test_time_context():
+    with freezegun.freeze_time('2022-05-15 22:30:00') as frozen_time:
+        # It is already Monday in Madrid (UTC+2), so the week starts that day
+        time_context = time.TimeContext('Europe/Madrid')
+        frozen_time.tick(3600)
+
+        assert time_context.current_date_time == '2022-05-16 00:30:00' and time_context.current_date == '2022-05-16'
+        assert time_context.current_epoch == time.get_epoch_seconds('2022-05-16 00:30:00')
+        assert (time_context.today_start, time_context.week_start, time_context.month_start,
+                time_context.quarter_start, time_context.year_start) == \
+            ('2022-05-16 00:00:00', '2022-05-16 00:00:00', '2022-05-01 00:00:00', '2022-04-01 00:00:00',
+             '2022-01-01 00:00:00')
+        assert time_context.get_upper_time(time.WEEK) == '2022-05-16 00:30:00'
+        assert time.TimeContext('UTC').week_start == '2022-05-09 00:00:00'
+        assert time.TimeContext('UTC').tz is time.get_timezone('UTC')
+
+
+@pytest.mark.parametrize('date_time', test_parameters)
+def test_parse_date_time(date_time):
+    date_time_object = datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S')
+
+    assert time.parse_date_time(date_time) == date_time_object
+    assert time.parse_date_time(date_time.split(' ')[0], time.DATE_FORMAT) == \
+        datetime.strptime(date_time.split(' ')[0], '%Y-%m-%d')
+    assert time.datetime_to_str(date_time_object) == date_time
+    assert time.datetime_to_str(date_time_object.replace(microsecond=500)) == date_time
+
+
+@pytest.mark.parametrize('date_time', ['2022-02-30 08:30:15', '2022-03-14 24:00:00', '2022-03-14T08:30:15',
+                                       '2022-03-14 08:30', '2022-03-14 08:30:15.5', '2022-03-14'])
+def test_invalid_date_time(date_time):
+    with pytest.raises(ValueError):
+        time.parse_date_time(date_time)
+
+    assert not time.validate_date_time_format(date_time)
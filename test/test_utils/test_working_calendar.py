@@ -0,0 +1,70 @@
+import pytest
+from datetime import date, timedelta
+
+from clockzy.lib.utils import time, working_calendar
+from clockzy.lib.clocking import get_num_average_days
+
+
+SPAIN_CALENDAR = working_calendar.get_working_calendar('es')
+
+
+def get_expected_working_days(calendar, day_from, day_to):
+    """Get the working days of a date range walking day by day."""
+    day, last_day = date.fromisoformat(day_from), date.fromisoformat(day_to)
+    working_days = []
+
+    while day <= last_day:
+        easter_offset = (day - working_calendar.get_easter_sunday(day.year)).days
+
+        if day.isoweekday() not in calendar.weekend_days and (day.month, day.day) not in calendar.yearly_holidays and \
+           day.toordinal() not in calendar.date_holidays and easter_offset not in calendar.easter_holidays:
+            working_days.append(day.toordinal())
+        day += timedelta(days=1)
+
+    return working_days
+
+
+@pytest.mark.parametrize('day_from, day_to', [('2022-04-11', '2022-04-17'), ('2022-01-01', '2022-12-31'),
+                                              ('2021-12-20', '2024-01-10'), ('2024-02-29', '2024-02-29'),
+                                              ('2022-05-01', '2022-04-30'), ('2026-12-01', '2031-01-31')])
+def test_working_days(day_from, day_to):
+    expected_working_days = get_expected_working_days(SPAIN_CALENDAR, day_from, day_to)
+
+    assert list(SPAIN_CALENDAR.get_working_days(day_from, day_to)) == expected_working_days
+    assert SPAIN_CALENDAR.count_working_days(day_from, day_to) == len(expected_working_days)
+
+
+def test_calendar_holidays():
+    # Good Friday (date holiday) and Labour Day (yearly holiday)
+    assert not SPAIN_CALENDAR.is_working_day('2022-04-15') and SPAIN_CALENDAR.is_working_day('2022-04-14 10:00:00')
+    assert not SPAIN_CALENDAR.is_working_day(date(2023, 5, 1))
+    assert not SPAIN_CALENDAR.is_working_day('2022-04-16')
+    assert SPAIN_CALENDAR.count_working_days('2022-04-11 00:00:00', '2022-04-17 23:59:59') == 4
+
+    default_calendar = working_calendar.get_working_calendar()
+    assert default_calendar.count_working_days('2022-04-11', '2022-04-17') == 5
+    assert time.get_working_days('2022-04-14 08:00:00', '2022-04-18 10:00:00', 'es') == \
+        ['2022-04-14 00:00:00', '2022-04-18 00:00:00']
+
+    custom_calendar = working_calendar.WorkingCalendar('custom', weekend_days=(5, 6, 7), holidays=[date(2022, 4, 14)])
+    assert custom_calendar.count_working_days('2022-04-11', '2022-04-17') == 3
+
+
+@pytest.mark.parametrize('year, easter_sunday', [(2022, date(2022, 4, 17)), (2024, date(2024, 3, 31)),
+                                                 (2027, date(2027, 3, 28)), (2038, date(2038, 4, 25)),
+                                                 (2285, date(2285, 3, 22))])
+def test_easter_holidays(year, easter_sunday):
+    good_friday = easter_sunday - timedelta(days=2)
+
+    assert working_calendar.get_easter_sunday(year) == easter_sunday
+    # Good Friday is computed for every year, without listing its dates
+    assert not SPAIN_CALENDAR.is_working_day(good_friday)
+    assert SPAIN_CALENDAR.is_working_day(good_friday - timedelta(days=1))
+
+
+def test_num_average_days():
+    # A holiday is not an absence, and a worked holiday counts as one more day
+    worked_seconds_per_day = {'2022-04-14': 8 * 3600, '2022-04-15': 3600, '2022-04-16': 0, '2022-04-17': 30}
+
+    assert get_num_average_days(worked_seconds_per_day, '2022-04-11 00:00:00', '2022-04-17 12:00:00', 'es') == (5, 4)
+    assert get_num_average_days(worked_seconds_per_day, '2022-04-11 00:00:00', '2022-04-17 12:00:00') == (5, 5)